@@ -1,6 +1,7 @@
 from setuptools import setup
 
 setup( name='typesystems'
-     , install_requires=['ply>=3', 'overrides']
+     , install_requires=['overrides']
+     , extras_require={'benchmarks': ['ply>=3']}
      , setup_requires=['nose']
      )
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 from .lambdacalculus import parse
-from .currytypes import UnificationError, TypeVariable
+from .currytypes import UnificationError
 from .currytypeassignment import principal_pair
+from .lambdacalculus.lambdacalculus import Variable
+from .lambdacalculus.normalization import reduction_sequence, CYCLE
+from .utils import NameSupply, fresh_names
 
 def repl():
     import re
@@ -14,13 +17,15 @@ def repl():
         return ''.join(r)
 
     while True:
-        TypeVariable.freshcounter = -1
         term = parse(input('>>> '))
-        try:
-            context, type_ = principal_pair(term)
-        except UnificationError as e:
-            print(e)
-        else:
+        names = NameSupply(Variable.freshtemplate)
+        names.reserve(v.symbol for v in term.variables)
+        with fresh_names(names):
+            try:
+                context, type_ = principal_pair(term)
+            except UnificationError as e:
+                print(e)
+                continue
             type_ = str(type_).replace('->', '⟶')
             type_ = re.sub('_\d+', subscriptify, type_)
             print('Type: {}'.format(type_))
@@ -32,7 +37,10 @@ def repl():
             if term.is_redex:
                 print('Reduction:')
                 print('  {}'.format(re.sub('_\d+', subscriptify, str(term))))
-                while term.is_redex:
-                    term = term.reduce()
+                sequence = reduction_sequence(term)
+                for term in sequence:
                     term_str = re.sub('_\d+', subscriptify, str(term))
                     print('  ⟶ᵦ {}'.format(term_str))
+                if sequence.outcome == CYCLE:
+                    print('  (loops back to step {})'
+                          .format(sequence.cycle[0]))
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""Batch type inference and normalization of newline-delimited terms.
+
+Each non-blank input line is parsed as a term, and one JSON object is
+written per term, in input order::
+
+    {"line": 3, "term": "\\\\x.x",
+     "type": "φ_00 -> φ_00", "context": {},
+     "normal_form": "\\\\x.x", "normal": true, "stopped": "normal"}
+
+A term that cannot be parsed gets an ``"error"`` instead, and one that
+cannot be typed a ``"type_error"``. Lines are processed in chunks by a
+pool of worker processes.
+
+Since results are written in order, a term that never stops reducing
+would hold up every line after it, so normalization is limited to
+``MAX_STEPS`` steps and ``TIMEOUT`` seconds per term unless told
+otherwise.
+
+"""
+import argparse
+import functools
+import itertools
+import json
+import sys
+
+from .currytypes import UnificationError
+from .currytypeassignment import principal_pair
+from .lambdacalculus.lambdacalculus import Variable
+from .lambdacalculus.lexparse import parse
+from .lambdacalculus.normalization import (normalize, normalize_bounded,
+                                           BACKENDS)
+from .utils import NameSupply, fresh_names, ordered_map
+
+MAX_STEPS = 100000
+TIMEOUT = 60.0
+
+def process(source, infer=True, reduce=True, max_steps=MAX_STEPS,
+            max_size=None, timeout=TIMEOUT, backend='rewrite'):
+    """Types and/or normalizes the term in ``source``.
+
+    Fresh variables are numbered from scratch for every term, so the
+    result does not depend on what was processed before, or in which
+    thread. Unless the ``'nbe'`` or ``'explicit'`` backend is used
+    without limits (all of ``max_steps``, ``max_size`` and ``timeout``
+    ``None``), normalization is done by ``normalize_bounded`` and
+    ``"stopped"`` says why it stopped.
+
+    Returns:
+        (dict) The fields of the term's JSON result, except ``"line"``.
+
+    """
+    result = {'term': source.strip()}
+    try:
+        term = parse(source)
+    except Exception as e:
+        result['error'] = str(e)
+        return result
+    names = NameSupply(Variable.freshtemplate)
+    names.reserve(v.symbol for v in term.variables)
+    with fresh_names(names):
+        if infer:
+            try:
+                context, type_ = principal_pair(term)
+            except UnificationError as e:
+                result['type_error'] = str(e)
+            else:
+                result['type'] = str(type_)
+                result['context'] = {k.symbol: str(v)
+                                     for k, v in context.items()}
+        if reduce:
+            if (backend != 'rewrite' and
+                    max_steps is max_size is timeout is None):
+                term = normalize(term, backend=backend)
+            else:
+                term, result['stopped'], _ = normalize_bounded(
+                    term, max_steps, max_size, timeout
+                )
+            result['normal_form'] = str(term)
+            result['normal'] = not term.is_redex
+    return result
+
+def _process_chunk(options, chunk):
+    return [json.dumps(dict(line=n, **process(source, **options)),
+                       ensure_ascii=False)
+            for n, source in chunk]
+
+def run(lines, out, workers=None, chunksize=64, **options):
+    """Processes lines of terms and writes JSON Lines results to ``out``.
+
+    Args:
+        lines (Iterable[str]): The input, read lazily.
+        out: A text file to write one result per non-blank line to.
+        workers (Optional[int]): The number of worker processes, see
+            ``utils.ordered_map``.
+        chunksize (int): The number of lines sent to a worker at once.
+        options: Passed on to ``process``.
+
+    """
+    numbered = ((n, line) for n, line in enumerate(lines, 1) if line.strip())
+    chunks = iter(lambda: list(itertools.islice(numbered, chunksize)), [])
+    function = functools.partial(_process_chunk, options)
+    for results in ordered_map(function, chunks, workers):
+        for result in results:
+            out.write(result)
+            out.write('\n')
+        out.flush()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m typesystems',
+        description='Type and/or normalize one lambda term per line, '
+                    'writing one JSON result per term.',
+    )
+    parser.add_argument('input', nargs='?', default='-',
+                        help='file of terms, or - for stdin (the default)')
+    parser.add_argument('-o', '--output', default='-',
+                        help='file to write results to, or - for stdout')
+    parser.add_argument('--infer', action='store_true',
+                        help='infer principal types')
+    parser.add_argument('--normalize', action='store_true',
+                        help='reduce to beta normal form')
+    parser.add_argument('--max-steps', type=int, default=MAX_STEPS,
+                        help='give up normalizing after this many steps, '
+                             '0 for no limit (default: %(default)s)')
+    parser.add_argument('--max-size', type=int, default=None,
+                        help='give up normalizing before a term gets bigger '
+                             'than this many nodes')
+    parser.add_argument('--timeout', type=float, default=TIMEOUT,
+                        help='give up normalizing a term after this many '
+                             'seconds, 0 for no limit (default: %(default)s)')
+    parser.add_argument('--backend', choices=BACKENDS, default='rewrite',
+                        help='normalization backend; nbe and explicit '
+                             'cannot be interrupted, so they are only used '
+                             'with --max-steps 0 --timeout 0')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='worker processes, 0 to work in this process '
+                             '(default: one per CPU)')
+    parser.add_argument('--chunksize', type=int, default=64,
+                        help='terms sent to a worker at once')
+    args = parser.parse_args(argv)
+    if not (args.infer or args.normalize):
+        args.infer = args.normalize = True
+
+    infile = (sys.stdin if args.input == '-' else
+              open(args.input, encoding='utf-8'))
+    outfile = (sys.stdout if args.output == '-' else
+               open(args.output, 'w', encoding='utf-8'))
+    try:
+        run(infile, outfile, workers=args.workers, chunksize=args.chunksize,
+            infer=args.infer, reduce=args.normalize,
+            max_steps=args.max_steps or None, max_size=args.max_size,
+            timeout=args.timeout or None, backend=args.backend)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
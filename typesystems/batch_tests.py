@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import os
+import tempfile
+import unittest
+from .batch import *
+
+LINES = [r'\x.x', '', r'(\x.xx)(\x.xx)', 'xy)', r'(\fx.f(fx))(\y.y)', 'z\n']
+
+class BatchTestCase(unittest.TestCase):
+    def results(self, lines=LINES, **kwargs):
+        out = io.StringIO()
+        run(lines, out, **kwargs)
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def testProcess(self):
+        self.assertEqual(process(r'\x.x'), {
+            'term': r'\x.x', 'type': 'φ_00 -> φ_00', 'context': {},
+            'normal_form': r'\x.x', 'normal': True, 'stopped': 'normal',
+        })
+        self.assertEqual(process('x(', infer=False),
+                         {'term': 'x(', 'error': 'Syntax error!'})
+        result = process(r'(\x.xx)(\x.xx)', max_steps=3)
+        self.assertIn('type_error', result)
+        self.assertFalse(result['normal'])
+        self.assertEqual(result['stopped'], 'fuel')
+        result = process(r'(\x.xxx)(\x.xxx)', max_size=30, timeout=10)
+        self.assertEqual(result['stopped'], 'size')
+        self.assertNotIn('stopped', process('x', backend='nbe',
+                                            max_steps=None, timeout=None))
+        self.assertEqual(process('x', backend='nbe')['stopped'], 'normal')
+        result = process(r'(\x.x)y', max_steps=1)
+        self.assertEqual(result['stopped'], 'normal')
+        self.assertTrue(result['normal'])
+        self.assertEqual(process('fx', reduce=False), {
+            'term': 'fx', 'type': 'φ_02',
+            'context': {'f': 'φ_01 -> φ_02', 'x': 'φ_01'},
+        })
+
+    def testDivergent(self):
+        # the default limits keep a divergent term from blocking the rest
+        results = self.results(workers=0)
+        self.assertEqual(results[1]['stopped'], 'fuel')
+        self.assertEqual(results[3]['normal_form'], r'\x.x')
+
+    def testRun(self):
+        results = self.results(workers=0, max_steps=10)
+        self.assertEqual([r['line'] for r in results], [1, 3, 4, 5, 6])
+        self.assertEqual(results[2]['error'], 'Syntax error!')
+        self.assertEqual(results[3]['normal_form'], r'\x.x')
+        self.assertEqual(results[4], dict(line=6, **process('z\n')))
+
+    def testWorkers(self):
+        expected = self.results(workers=0, max_steps=10)
+        self.assertEqual(self.results(workers=2, chunksize=1, max_steps=10),
+                         expected)
+
+    def testMain(self):
+        fd, path = tempfile.mkstemp()
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(LINES))
+        try:
+            main([path, '-o', path + '.out', '--infer', '-j', '0'])
+            with open(path + '.out', encoding='utf-8') as f:
+                results = [json.loads(line) for line in f]
+        finally:
+            os.remove(path)
+            os.remove(path + '.out')
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all('normal_form' not in r for r in results))
+        self.assertEqual(results[0]['type'], 'φ_00 -> φ_00')
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for reduction, inference, unification, parsing and
+construction of terms and types.
+
+Run them with ``python -m typesystems.benchmarks``; see ``--help``.
+
+"""
+from .runner import (BENCHMARKS, benchmark, throughput, measure, run, save,
+                     load, compare)
+
+# register the workloads
+from . import reduction, inference, unification, parsing, construction
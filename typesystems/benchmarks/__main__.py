@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import argparse
+import sys
+
+from . import run, save, load, compare
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m typesystems.benchmarks',
+        description='Time benchmarks and measure their peak memory, '
+                    'optionally comparing against a baseline.',
+    )
+    parser.add_argument('-k', '--pattern', default='',
+                        help='only run benchmarks whose names contain this')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='timed runs per benchmark and size')
+    parser.add_argument('--quick', action='store_true',
+                        help='only run the smallest size of each benchmark')
+    parser.add_argument('-o', '--output',
+                        help='file to save the results to, as JSON')
+    parser.add_argument('-b', '--baseline',
+                        help='results to compare against, as saved by -o')
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help='slowdown or memory growth factor above which '
+                             'a difference from the baseline is reported')
+    args = parser.parse_args(argv)
+
+    def report(name, size, measurements):
+        rates = ''.join(
+            ' {:12.0f} {}/s'.format(value, metric[:-len('_per_second')])
+            for metric, value in sorted(measurements.items())
+            if metric.endswith('_per_second')
+        )
+        print('{:36s} {:>8} {:12.6f} s {:12d} B{}'.format(
+            name, size, measurements['time'], measurements['peak_memory'],
+            rates
+        ))
+    results = run(args.pattern, args.repeat, args.quick, report)
+    if args.output:
+        save(results, args.output)
+    if args.baseline:
+        regressions = compare(results, load(args.baseline), args.tolerance)
+        for name, size, metric, ratio in regressions:
+            print('regression: {} at size {}: {} is {:.2f}x the baseline'
+                  .format(name, size, metric, ratio))
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Construction workloads: the cost of building terms and types.
+
+Each workload builds ``n`` nodes and keeps them alive until it returns,
+so ``peak_memory / n`` is the size of a node in bytes.
+
+"""
+from ..currytypes import ArrowType, TypeVariable
+from ..lambdacalculus.lambdacalculus import Variable, Abstraction, Application
+from ..utils import Substitution
+from .runner import benchmark
+
+@benchmark('construction.variables', [1000, 10000, 100000])
+def _variables(n):
+    return lambda: [Variable('x') for _ in range(n)]
+
+@benchmark('construction.terms', [1000, 10000, 100000])
+def _terms(n):
+    x, y = Variable('x'), Variable('y')
+    # n nodes: half abstractions and half applications
+    return lambda: [Abstraction(x, Application(x, y)) for _ in range(n // 2)]
+
+@benchmark('construction.types', [1000, 10000, 100000])
+def _types(n):
+    a = TypeVariable('a')
+    def build():
+        type_ = a
+        for _ in range(n):
+            type_ = ArrowType(a, type_)
+        return type_
+    return build
+
+@benchmark('construction.substitutions', [1000, 10000, 100000])
+def _substitutions(n):
+    a, b = TypeVariable('a'), TypeVariable('b')
+    return lambda: [Substitution({a: b}) for _ in range(n)]
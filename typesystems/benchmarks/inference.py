@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Type inference workloads."""
+from ..currytypes import UnificationError
+from ..currytypeassignment import principal_pair, PrincipalPairCache
+from ..lambdacalculus.lambdacalculus import Variable, Abstraction, Application
+from ..lambdacalculus.lambdacalculus_tests import church
+from .runner import benchmark
+
+def fat_y(n):
+    """``Y`` with ``f`` applied ``n`` times in each half; it has no type."""
+    def half(x):
+        body = Application(Variable(x), Variable(x))
+        for _ in range(n):
+            body = Application(Variable('f'), body)
+        return Abstraction(x, body)
+    return Abstraction('f', Application(half('x'), half('y')))
+
+def pairs(n):
+    """``\\x.P (P (... (P x)))`` with ``P = \\y f.f y y``, nested ``n`` times.
+
+    Its principal type has size exponential in ``n``.
+
+    """
+    term = Variable('x')
+    for i in range(n):
+        y, f = 'y_{}'.format(i), 'f_{}'.format(i)
+        pair = Abstraction(y, Abstraction(f, Application(
+            Application(Variable(f), Variable(y)), Variable(y)
+        )))
+        term = Application(pair, term)
+    return Abstraction('x', term)
+
+def untypeable(term):
+    try:
+        principal_pair(term)
+    except UnificationError:
+        pass
+    else:
+        raise AssertionError('{} has a type'.format(term))
+
+@benchmark('inference.y', [1, 100, 1000])
+def _y(n):
+    term = fat_y(n)
+    return lambda: untypeable(term)
+
+@benchmark('inference.church', [100, 1000, 5000])
+def _church(n):
+    term = church(n)
+    return lambda: principal_pair(term)
+
+@benchmark('inference.large_type', [5, 10, 15])
+def _large_type(n):
+    term = pairs(n)
+    return lambda: principal_pair(term)
+
+@benchmark('inference.cached', [10, 100, 1000])
+def _cached(n):
+    # the same few numerals over and over, under a cache
+    terms = [church(i % 10) for i in range(n)]
+    def workload():
+        cache = PrincipalPairCache()
+        for term in terms:
+            cache(term)
+    return workload
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""Parsing workloads, compared with the ply parser ``lexparse`` replaced.
+
+The bulk workloads report their throughput in terms and bytes per
+second, for comparison between the two parsers. The ply parser is only
+needed for the comparison, and is skipped if ply is not installed.
+
+"""
+import random
+
+from ..lambdacalculus.lambdacalculus import *
+from ..lambdacalculus.lexparse import parse_many
+from .runner import benchmark, throughput
+
+# ========================== PLY PARSER ================================
+
+tokens = ('VARIABLE',)
+literals = [ '(', ')', '\\', '.', '@' ]
+t_VARIABLE = r'[^\W\d_]'
+t_ignore = ' \t\r\n'
+
+def t_error(t):
+    raise Exception('Illegal character {:s}'.format(repr(t.value)))
+
+precedence = (
+    ('nonassoc', 'Abstraction'),
+    ('nonassoc', '\\'),
+    ('left', '('),
+    ('right', ')'),
+    ('left', 'VARIABLE'),
+    ('left', 'Application'),
+)
+
+def p_term_variable(p):
+    "term : VARIABLE"
+    p[0] = Variable(p[1])
+
+def p_term_brackets(p):
+    "term : '(' term ')'"
+    p[0] = p[2]
+
+def p_term_application(p):
+    "term : term term %prec Application"
+    p[0] = Application(p[1], p[2])
+
+def p_term_abstraction(p):
+    "term : '\\\\' variables '.' term %prec Abstraction"
+    for i in reversed(p[2]):
+        p[4] = Abstraction(i, p[4])
+    p[0] = p[4]
+
+def p_variables(p):
+    """variables : VARIABLE
+                 | variables VARIABLE"""
+    if len(p) == 2:
+        p[0] = [p[1]]
+    else:
+        p[1].append(p[2])
+        p[0] = p[1]
+
+def p_error(p):
+    raise Exception('Syntax error!')
+
+_ply_parser = None
+
+def ply_parse(source):
+    """Parses a term with the old ply parser.
+
+    Raises:
+        ImportError if ply is not installed.
+
+    """
+    global _ply_parser
+    if _ply_parser is None:
+        import ply.lex as lex
+        import ply.yacc as yacc
+        lexer = lex.lex()
+        _ply_parser = (yacc.yacc(debug=False, write_tables=False), lexer)
+    parser, lexer = _ply_parser
+    return parser.parse(source, lexer=lexer)
+
+def has_ply():
+    try:
+        ply_parse('x')
+    except ImportError:
+        return False
+    return True
+
+# ========================== WORKLOADS =================================
+
+def corpus(n, size=40, seed=0):
+    """``n`` random terms of about ``size`` nodes each, as source."""
+    from ..lambdacalculus.lambdacalculus_tests import random_term
+    rng = random.Random(seed)
+    return [str(random_term(rng, size)) for _ in range(n)]
+
+def _parse_corpus(parse_lines, n):
+    lines = corpus(n)
+    nbytes = sum(len(line.encode('utf-8')) for line in lines)
+    return throughput(lambda: list(parse_lines(lines)),
+                      terms=len(lines), bytes=nbytes)
+
+@benchmark('parsing.bulk', [10, 100, 1000])
+def _bulk(n):
+    return _parse_corpus(parse_many, n)
+
+@benchmark('parsing.deep', [100, 1000, 10000])
+def _deep(n):
+    source = '\\f.\\x.' + 'f(' * n + 'x' + ')' * n
+    return throughput(lambda: list(parse_many([source])),
+                      bytes=len(source))
+
+if has_ply():
+    @benchmark('parsing.bulk[ply]', [10, 100, 1000])
+    def _bulk_ply(n):
+        return _parse_corpus(lambda lines: map(ply_parse, lines), n)
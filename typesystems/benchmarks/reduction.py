@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Reduction workloads."""
+from ..lambdacalculus.lambdacalculus import Variable, Abstraction, Application
+from ..lambdacalculus.lambdacalculus_tests import ADD, TWO, THREE, church
+from ..lambdacalculus import explicit, graph, machines, nbe
+from ..lambdacalculus.normalization import normalize
+from .runner import benchmark
+
+def church_sum(n):
+    """``ADD THREE (ADD THREE (... TWO))``, with ``n`` additions."""
+    term = TWO
+    for _ in range(n):
+        term = Application(Application(ADD, THREE), term)
+    return term
+
+def identity_chain(n):
+    """``I (I (... (I y)))``, with ``n`` copies of a fresh identity."""
+    term = Variable('y')
+    for i in range(n):
+        x = 'x_{}'.format(i)
+        term = Application(Abstraction(x, Variable(x)), term)
+    return term
+
+def wide_abstraction(n):
+    """``(\\x_0 ... x_n-1. x_n-1 ... x_0) a_0 ... a_n-1``."""
+    xs = ['x_{}'.format(i) for i in range(n)]
+    body = Variable(xs[-1])
+    for x in reversed(xs[:-1]):
+        body = Application(body, Variable(x))
+    term = body
+    for x in reversed(xs):
+        term = Abstraction(x, term)
+    for i in range(n):
+        term = Application(term, Variable('a_{}'.format(i)))
+    return term
+
+NORMALIZERS = {
+    'rewrite': normalize,
+    'nbe': nbe.normalize,
+    'graph': graph.normalize,
+    'explicit': explicit.normalize,
+}
+
+for _backend, _normalize in NORMALIZERS.items():
+    @benchmark('reduction.church_sum[{}]'.format(_backend), [2, 8, 32])
+    def _church_sum(n, normalize=_normalize):
+        term = church_sum(n)
+        return lambda: normalize(term)
+
+@benchmark('reduction.church_power[nbe]', [3, 5, 7])
+def _church_power(n):
+    # 2^n, by applying n to TWO
+    term = Application(church(n), TWO)
+    return lambda: nbe.normalize(term)
+
+@benchmark('reduction.identity_chain', [100, 1000, 10000])
+def _identity_chain(n):
+    term = identity_chain(n)
+    return lambda: normalize(term)
+
+@benchmark('reduction.wide_abstraction', [10, 50, 200])
+def _wide_abstraction(n):
+    term = wide_abstraction(n)
+    return lambda: normalize(term)
+
+@benchmark('reduction.whnf[krivine]', [10, 100, 500])
+def _whnf(n):
+    term = identity_chain(n)
+    return lambda: machines.whnf(term)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Registering, running and comparing benchmarks.
+
+A benchmark is a function of a size that sets up a workload and returns
+a function of no arguments performing it. Only the returned function is
+measured: its best wall-clock time over a number of runs, and the peak
+memory it allocates as traced by ``tracemalloc`` in a separate run.
+Workloads wrapped in ``throughput`` also get their rates reported.
+
+"""
+import json
+import platform
+import time
+import tracemalloc
+
+BENCHMARKS = {}
+
+def benchmark(name, sizes):
+    """Registers a benchmark under ``name``, to be run at each size."""
+    def register(setup):
+        if name in BENCHMARKS:
+            raise ValueError('duplicate benchmark {!r}'.format(name))
+        BENCHMARKS[name] = (setup, tuple(sizes))
+        return setup
+    return register
+
+def throughput(workload, **amounts):
+    """Marks ``workload`` as processing ``amounts`` of things per run.
+
+    ``throughput(workload, terms=n)`` makes ``measure`` report
+    ``terms_per_second`` as well.
+
+    """
+    workload.amounts = amounts
+    return workload
+
+def measure(setup, size, repeat=3):
+    """Measures one benchmark at one size.
+
+    Returns:
+        (dict) ``time``, the best of ``repeat`` runs in seconds, and
+        ``peak_memory``, in bytes. For a workload wrapped in
+        ``throughput``, also ``<thing>_per_second`` for each amount.
+
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        workload = setup(size)
+        start = time.perf_counter()
+        workload()
+        best = min(best, time.perf_counter() - start)
+
+    workload = setup(size)
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    workload()
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    if not tracing:
+        tracemalloc.stop()
+    measurements = {'time': best, 'peak_memory': peak}
+    for thing, amount in getattr(workload, 'amounts', {}).items():
+        measurements[thing + '_per_second'] = amount / best
+    return measurements
+
+def run(pattern='', repeat=3, quick=False, report=None):
+    """Runs the registered benchmarks whose names contain ``pattern``.
+
+    Args:
+        pattern (str): Only run benchmarks whose names contain this.
+        repeat (int): The number of timed runs per benchmark and size.
+        quick (bool): Only run each benchmark at its smallest size.
+        report (Optional[Callable]): Called with the name, size and
+            measurements of each benchmark as soon as it has run.
+
+    Returns:
+        (dict) The measurements, as ``save`` writes them.
+
+    """
+    results = {}
+    for name in sorted(BENCHMARKS):
+        if pattern not in name:
+            continue
+        setup, sizes = BENCHMARKS[name]
+        for size in sizes[:1] if quick else sizes:
+            measurements = measure(setup, size, repeat)
+            results.setdefault(name, {})[str(size)] = measurements
+            if report is not None:
+                report(name, size, measurements)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'results': results,
+    }
+
+def save(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def compare(results, baseline, tolerance=1.25):
+    """Finds the measurements that got worse than a baseline.
+
+    Only ``time`` and ``peak_memory`` are compared; rates follow from
+    the time. Benchmarks and sizes missing from either side are ignored.
+
+    Args:
+        tolerance (float): How many times worse than the baseline a
+            measurement may be before it counts.
+
+    Returns:
+        (List[Tuple[str, str, str, float]]) The name, size, metric and
+        ratio to the baseline of each regression.
+
+    """
+    regressions = []
+    for name, sizes in sorted(results['results'].items()):
+        for size, measurements in sorted(sizes.items()):
+            old = baseline['results'].get(name, {}).get(size)
+            if old is None:
+                continue
+            for metric in ('peak_memory', 'time'):
+                if old.get(metric) and metric in measurements:
+                    ratio = measurements[metric] / old[metric]
+                    if ratio > tolerance:
+                        regressions.append((name, size, metric, ratio))
+    return regressions
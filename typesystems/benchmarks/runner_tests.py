@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from .runner import *
+from . import BENCHMARKS as REGISTERED
+
+class RunnerTestCase(unittest.TestCase):
+    def testMeasure(self):
+        calls = []
+        def setup(n):
+            calls.append(n)
+            return lambda: [0] * n
+        measurements = measure(setup, 100000, repeat=2)
+        self.assertEqual(calls, [100000] * 3)
+        self.assertGreater(measurements['time'], 0)
+        self.assertGreaterEqual(measurements['peak_memory'], 8 * 100000)
+
+    def testThroughput(self):
+        setup = lambda n: throughput(lambda: [0] * n, items=n, runs=1)
+        measurements = measure(setup, 1000, repeat=1)
+        self.assertAlmostEqual(measurements['items_per_second'],
+                               1000 / measurements['time'])
+        self.assertAlmostEqual(measurements['runs_per_second'],
+                               1 / measurements['time'])
+        self.assertEqual(compare({'results': {'a': {'1': measurements}}},
+                                 {'results': {'a': {'1': measurements}}}), [])
+
+    def testCompare(self):
+        baseline = {'results': {
+            'a': {'1': {'time': 1.0, 'peak_memory': 100}},
+            'b': {'1': {'time': 1.0, 'peak_memory': 100}},
+        }}
+        results = {'results': {
+            'a': {'1': {'time': 2.0, 'peak_memory': 100},
+                  '2': {'time': 9.0, 'peak_memory': 900}},
+            'b': {'1': {'time': 1.1, 'peak_memory': 300}},
+            'c': {'1': {'time': 9.0, 'peak_memory': 900}},
+        }}
+        self.assertEqual(compare(results, baseline), [
+            ('a', '1', 'time', 2.0), ('b', '1', 'peak_memory', 3.0),
+        ])
+        self.assertEqual(compare(results, baseline, tolerance=5), [])
+
+    def testSaveLoad(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            results = run('unification.deep', repeat=1, quick=True)
+            save(results, path)
+            self.assertEqual(load(path), results)
+        finally:
+            os.remove(path)
+        self.assertEqual(list(results['results']), ['unification.deep'])
+        self.assertEqual(list(results['results']['unification.deep']),
+                         ['100'])
+
+class WorkloadsTestCase(unittest.TestCase):
+    def testSmallestSizes(self):
+        self.assertIs(BENCHMARKS, REGISTERED)
+        self.assertGreaterEqual(len(BENCHMARKS), 10)
+        for name, (setup, sizes) in sorted(BENCHMARKS.items()):
+            with self.subTest(name=name):
+                setup(sizes[0])()
+
+    def testDuplicateName(self):
+        with self.assertRaises(ValueError):
+            benchmark('unification.deep', [1])(lambda n: None)
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""Unification workloads."""
+from ..currytypes import ArrowType, TypeVariable, unify
+from ..currytypes_tests import arrows
+from .runner import benchmark
+
+def doubling(n):
+    """Types whose unifier maps ``b_i`` to ``b_i-1 -> b_i-1``.
+
+    Written out, the type of ``b_n`` has size exponential in ``n``.
+
+    """
+    bs = [TypeVariable('b_{}'.format(i)) for i in range(n + 1)]
+    left = bs[n]
+    right = ArrowType(bs[n - 1], bs[n - 1])
+    for i in reversed(range(1, n)):
+        left = ArrowType(bs[i], left)
+        right = ArrowType(ArrowType(bs[i - 1], bs[i - 1]), right)
+    return left, right
+
+@benchmark('unification.deep', [100, 1000, 10000])
+def _deep(n):
+    a = arrows(n)
+    b = arrows(n, lambda i: TypeVariable('b_{}'.format(i)))
+    return lambda: unify(a, b)
+
+@benchmark('unification.doubling', [10, 100, 1000])
+def _doubling(n):
+    left, right = doubling(n)
+    return lambda: unify(left, right)
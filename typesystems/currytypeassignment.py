@@ -1,8 +1,16 @@
+from collections import namedtuple, OrderedDict
+import itertools
+
 from .currytypes import *
-from .utils import Substitution
+from .utils import Substitution, fresh_names, ordered_map
+from . import instrumentation
 from .lambdacalculus.lambdacalculus import *
+from .lambdacalculus.debruijn import alpha_key
+from .serialization import encode_many, decode_many
 
 class Context(Substitution):
+    __slots__ = ()
+
     def apply_substitution(self, sub):
         return self.__class__({k: sub(v) for k, v in self.items()})
 
@@ -13,29 +21,223 @@ def unify_contexts(a, b):
             s = unify(s(a[k]), s(b[k])) >> s
     return s
 
+@instrumentation.timed('principal_pair')
 def principal_pair(term):
-    if term.kind == 'variable':
-        type_ = TypeVariable.fresh()
-        return Context({term: type_}), type_
-
-    elif term.kind == 'abstraction':
-        context, type_ = principal_pair(term.term)
-        if term.binds in context:
-            type_ = ArrowType(context(term.binds), type_)
-            del context[term.binds]
-            return context, type_
+    """Infers the principal pair (context and type) of a term.
+
+    This is algorithm J: all types are nodes of one ``Unifier``, so
+    unification updates them in place and substitutions never have to be
+    applied to contexts. Contexts map term variables to nodes and are
+    merged smaller into larger. Only the final pair is zonked back into
+    ``CurryType`` values.
+
+    Raises:
+        UnificationError if the term has no type.
+
+    """
+    unifier = Unifier()
+    fresh = lambda: unifier.variable(TypeVariable.fresh().name)
+    recorder = instrumentation.recorder
+
+    # subterms are visited in post-order with an explicit stack, so that
+    # deeply nested terms do not exhaust the recursion limit.
+    results = []
+    stack = [(term, False)]
+    while stack:
+        term, expanded = stack.pop()
+        if term.kind == 'variable':
+            type_ = fresh()
+            results.append(({term: type_}, type_))
+
+        elif term.kind == 'abstraction':
+            if not expanded:
+                stack.append((term, True))
+                stack.append((term.term, False))
+                continue
+            context, type_ = results.pop()
+            if term.binds in context:
+                type_ = unifier.arrow(context.pop(term.binds), type_)
+                results.append((context, type_))
+            else:
+                results.append((context, fresh()))
+
+        elif term.kind == 'application':
+            if not expanded:
+                stack.append((term, True))
+                stack.append((term.right, False))
+                stack.append((term.left, False))
+                continue
+            context_r, type_r = results.pop()
+            context_l, type_l = results.pop()
+            type_ = fresh()
+            unifier.unify(type_l, unifier.arrow(type_r, type_))
+            if len(context_l) < len(context_r):
+                context_l, context_r = context_r, context_l
+            for k, v in context_r.items():
+                if k in context_l:
+                    unifier.unify(context_l[k], v)
+                else:
+                    context_l[k] = v
+            results.append((context_l, type_))
+
+        else:
+            raise Exception('no case found for {!r}'.format(term))
+
+        if recorder is not None:
+            recorder.observe('context_size', len(results[-1][0]))
+
+    context, type_ = results.pop()
+    unifier.check()
+    context = Context({k: unifier.zonk(v) for k, v in context.items()})
+    return context, unifier.zonk(type_)
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+class PrincipalPairCache:
+    """A least recently used cache in front of ``principal_pair``.
+
+    Terms are looked up by ``alpha_key``, so a term hits the cache if an
+    alpha equivalent one was typed before. Free variables are part of the
+    key, so the cached context always has the right variables. On a hit
+    the type variables of the cached pair are replaced by fresh ones, so
+    pairs returned for different terms never share type variables.
+    Untypeable terms are cached too.
+
+    Attributes:
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that ran inference.
+
+    """
+    def __init__(self, maxsize=1024):
+        """
+        Args:
+            maxsize (Optional[int]): The number of pairs to keep, or
+                ``None`` for no limit.
+
+        """
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._pairs = OrderedDict()
+
+    def __len__(self):
+        return len(self._pairs)
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self))
+
+    def clear(self):
+        self._pairs.clear()
+        self.hits = self.misses = 0
+
+    def __call__(self, term):
+        """Infers the principal pair of a term, like ``principal_pair``.
+
+        Raises:
+            UnificationError if the term has no type.
+
+        """
+        key = alpha_key(term)
+        if key in self._pairs:
+            self.hits += 1
+            self._pairs.move_to_end(key)
+            pair = self._pairs[key]
+            if isinstance(pair, UnificationError):
+                raise UnificationError(*pair.types)
+            return _refresh(*pair)
+
+        self.misses += 1
+        try:
+            context, type_ = principal_pair(term)
+        except UnificationError as e:
+            self._store(key, e)
+            raise
+        self._store(key, (context.copy(), type_))
+        return context, type_
+
+    def _store(self, key, pair):
+        self._pairs[key] = pair
+        if self.maxsize is not None and len(self._pairs) > self.maxsize:
+            self._pairs.popitem(last=False)
+
+def _refresh(context, type_):
+    """Renames the type variables of a principal pair to fresh ones."""
+    s = Substitution()
+    for t in itertools.chain(context.values(), [type_]):
+        stack = [t]
+        while stack:
+            t = stack.pop()
+            if t.kind == 'arrowtype':
+                stack.append(t.right)
+                stack.append(t.left)
+            elif t.kind == 'typevariable' and t not in s:
+                s[t] = TypeVariable.fresh()
+    return context.apply_substitution(s), s(type_)
+
+def _principal_pair_or_error(term):
+    # every term gets its own fresh names, so results do not depend on
+    # which other terms were typed first, or where.
+    with fresh_names():
+        try:
+            return principal_pair(term)
+        except UnificationError as e:
+            return e
+
+def _type_chunk(data):
+    """Types a chunk of serialized terms, in a worker process.
+
+    Returns:
+        (List[Tuple[bool, bytes]]) For each term, whether it could be
+        typed and either its context's variables and types followed by
+        its type, or the two types that could not be unified.
+
+    """
+    out = []
+    for term in decode_many(data):
+        result = _principal_pair_or_error(term)
+        if isinstance(result, UnificationError):
+            out.append((False, encode_many(result.types)))
         else:
-            return context, TypeVariable.fresh()
-        
-    elif term.kind == 'application':
-        context_l, type_l = principal_pair(term.left)
-        context_r, type_r = principal_pair(term.right)
-        type_ = TypeVariable.fresh()
-        s = unify(type_l, ArrowType(type_r, type_))
-        s = unify_contexts(s(context_l), s(context_r)) >> s
-
-        context_l.update(context_r)
-        return s(context_l), s(type_) 
-    
-    else:
-        raise Exception('no case found for {!r}'.format(term))
+            context, type_ = result
+            objs = [obj for item in context.items() for obj in item]
+            out.append((True, encode_many(objs + [type_])))
+    return out
+
+def _decode_chunk(results):
+    for ok, data in results:
+        objs = decode_many(data)
+        if ok:
+            context = Context(zip(objs[:-1:2], objs[1:-1:2]))
+            yield context, objs[-1]
+        else:
+            yield UnificationError(*objs)
+
+def principal_pairs(terms, workers=None, chunksize=256):
+    """Infers the principal pairs of many terms, in parallel.
+
+    Terms are sent to a pool of worker processes in chunks, encoded with
+    ``serialization.encode_many``. Each term is typed as if it were the
+    only one, with type variables numbered from scratch, so the
+    results do not depend on ``workers`` or ``chunksize``.
+
+    Args:
+        terms (Iterable[LambdaTerm]): The terms to type. They are read
+            lazily, a few chunks ahead of the results.
+        workers (Optional[int]): The number of worker processes, by
+            default one per CPU. With ``0`` the terms are typed in this
+            process instead.
+        chunksize (int): The number of terms sent to a worker at once.
+
+    Yields:
+        The principal pair of each term, in order, or the
+        ``UnificationError`` it raised if the term has no type.
+
+    """
+    terms = iter(terms)
+    if workers == 0:
+        for term in terms:
+            yield _principal_pair_or_error(term)
+        return
+
+    chunks = iter(lambda: list(itertools.islice(terms, chunksize)), [])
+    for results in ordered_map(_type_chunk, map(encode_many, chunks), workers):
+        yield from _decode_chunk(results)
@@ -2,6 +2,7 @@ import unittest
 from .lambdacalculus.lambdacalculus import *
 from .currytypes import *
 from .currytypeassignment import *
+from .utils import NameSupply, fresh_names
 
 M = Abstraction('x', 
     Application(
@@ -82,3 +83,173 @@ class PrincipalPairTestCase(unittest.TestCase):
         self.assertCannotType(Application(Variable('a'), Variable('a')))
         self.assertCannotType(Y)
 
+
+def recursive_principal_pair(term):
+    """The original, recursive ``principal_pair``."""
+    if term.kind == 'variable':
+        type_ = TypeVariable.fresh()
+        return Context({term: type_}), type_
+    elif term.kind == 'abstraction':
+        context, type_ = recursive_principal_pair(term.term)
+        if term.binds in context:
+            type_ = ArrowType(context(term.binds), type_)
+            del context[term.binds]
+            return context, type_
+        else:
+            return context, TypeVariable.fresh()
+    else:
+        context_l, type_l = recursive_principal_pair(term.left)
+        context_r, type_r = recursive_principal_pair(term.right)
+        type_ = TypeVariable.fresh()
+        s = unify(type_l, ArrowType(type_r, type_))
+        s = unify_contexts(s(context_l), s(context_r)) >> s
+        context_l.update(context_r)
+        return s(context_l), s(type_)
+
+def canonical(pair):
+    """Renames the type variables of a principal pair in a fixed order."""
+    context, type_ = pair
+    names = {}
+    def rename(type_):
+        if type_.kind == 'arrowtype':
+            return ArrowType(rename(type_.left), rename(type_.right))
+        elif type_.kind == 'typevariable':
+            names.setdefault(type_.name, 'a{}'.format(len(names)))
+            return TypeVariable(names[type_.name])
+        return type_
+    type_ = rename(type_)
+    context = [(k.symbol, rename(v)) for k, v in
+               sorted(context.items(), key=lambda item: item[0].symbol)]
+    return repr((context, type_))
+
+class AlgorithmJTestCase(unittest.TestCase):
+    def typed(self, principal_pair, term):
+        try:
+            return canonical(principal_pair(term))
+        except UnificationError:
+            return UnificationError
+
+    def testSameAsSubstitutionBased(self):
+        import random
+        from .lambdacalculus.lambdacalculus_tests import random_term
+        rng = random.Random(0)
+        typeable = 0
+        for _ in range(300):
+            term = random_term(rng, rng.randint(1, 30))
+            res = self.typed(principal_pair, term)
+            self.assertEqual(res, self.typed(recursive_principal_pair, term))
+            typeable += res is not UnificationError
+        self.assertGreater(typeable, 50)
+
+    def testDiscardedInfiniteType(self):
+        # \z.zz cannot be typed, even though its type is thrown away
+        term = Application(
+            Abstraction('x', Variable('y')),
+            Abstraction('z', Application(Variable('z'), Variable('z')))
+        )
+        self.assertRaises(UnificationError, lambda: principal_pair(term))
+
+    def testDeepTerm(self):
+        from .lambdacalculus.lambdacalculus_tests import church
+        context, type_ = principal_pair(church(5000))
+        self.assertFalse(context)
+        a = TypeVariable('a')
+        self.assertTrue(unifiable(
+            type_, ArrowType(ArrowType(a, a), ArrowType(a, a))
+        ))
+
+class PrincipalPairsTestCase(unittest.TestCase):
+    def setUp(self):
+        import random
+        from .lambdacalculus.lambdacalculus_tests import random_term
+        rng = random.Random(1)
+        self.terms = [random_term(rng, rng.randint(1, 20)) for _ in range(60)]
+        self.terms.append(Y)
+
+    def expected(self, term):
+        with fresh_names():
+            try:
+                return repr(principal_pair(term))
+            except UnificationError as e:
+                return str(e)
+
+    def results(self, **kwargs):
+        return [str(res) if isinstance(res, UnificationError) else repr(res)
+                for res in principal_pairs(self.terms, **kwargs)]
+
+    def testInProcess(self):
+        names = NameSupply(TypeVariable.freshtemplate, start=41)
+        with fresh_names(type_variables=names):
+            results = self.results(workers=0)
+        self.assertEqual(names.counter, 41)
+        self.assertEqual(results, [self.expected(t) for t in self.terms])
+
+    def testWorkers(self):
+        expected = self.results(workers=0)
+        self.assertEqual(self.results(workers=2, chunksize=7), expected)
+        self.assertTrue(expected[-1].startswith('could not unify'))
+
+    def testErrors(self):
+        terms = [Y, Abstraction('x', Variable('x'))]
+        error, (context, type_) = principal_pairs(terms, workers=1)
+        self.assertIsInstance(error, UnificationError)
+        self.assertEqual(len(error.types), 2)
+        self.assertFalse(context)
+        self.assertEqual(type_, ArrowType(TypeVariable('φ_00'),
+                                          TypeVariable('φ_00')))
+        self.assertEqual(list(principal_pairs([], workers=1)), [])
+
+    def testUnificationErrorPickles(self):
+        import pickle
+        e = UnificationError(TypeVariable('a'), ConstantType('int'))
+        e2 = pickle.loads(pickle.dumps(e))
+        self.assertEqual(str(e2), str(e))
+        self.assertEqual(e2.types, e.types)
+
+class PrincipalPairCacheTestCase(unittest.TestCase):
+    def testHits(self):
+        cache = PrincipalPairCache()
+        I, J = (Abstraction(x, Variable(x)) for x in 'xy')
+        context, type_ = cache(I)
+        context2, type2 = cache(J)
+        self.assertEqual(cache.info(), CacheInfo(1, 1, 1024, 1))
+        self.assertFalse(context2)
+        self.assertEqual(type2.kind, 'arrowtype')
+        self.assertEqual(type2.left, type2.right)
+        self.assertNotEqual(type2.left, type_.left)
+
+    def testFreeVariables(self):
+        cache = PrincipalPairCache()
+        fx = Application(Variable('f'), Variable('x'))
+        gx = Application(Variable('g'), Variable('x'))
+        cache(fx)
+        context, type_ = cache(gx)
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(set(context), {Variable('g'), Variable('x')})
+        context, type_ = cache(fx)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(context[Variable('f')],
+                         ArrowType(context[Variable('x')], type_))
+        context[Variable('y')] = type_
+        context, _ = cache(fx)
+        self.assertNotIn(Variable('y'), context)
+
+    def testSameAsPrincipalPair(self):
+        import random
+        from .lambdacalculus.lambdacalculus_tests import random_term
+        cache = PrincipalPairCache(maxsize=20)
+        rng = random.Random(2)
+        terms = [random_term(rng, rng.randint(1, 8)) for _ in range(200)]
+        typed = AlgorithmJTestCase().typed
+        for term in terms:
+            self.assertEqual(typed(cache, term), typed(principal_pair, term))
+        self.assertGreater(cache.hits, 0)
+        self.assertEqual(len(cache), 20)
+
+    def testErrors(self):
+        cache = PrincipalPairCache(maxsize=None)
+        for _ in range(2):
+            self.assertRaises(UnificationError, lambda: cache(Y))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.clear()
+        self.assertEqual(cache.info(), CacheInfo(0, 0, None, 0))
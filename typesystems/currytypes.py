@@ -3,26 +3,33 @@ from abc import ABCMeta, abstractmethod, abstractproperty
 from collections.abc import MutableMapping  
 from overrides import overrides
 
-from .utils import Finalisable, Substitution
+from .utils import (Immutable, Substitution, current_supply,
+                    type_variable_names)
+from . import instrumentation
 
 class UnificationError(Exception):
     def __init__(self, t1, t2):
         message = "could not unify types {} and {}".format(str(t1), str(t2))
         super().__init__(message)
+        self.types = (t1, t2)
 
-class CurryType(Finalisable, metaclass=ABCMeta):
-    kind = 'currytype'
+    def __reduce__(self):
+        return (self.__class__, self.types)
+
+_set = object.__setattr__
 
-    def __setattr__(self, name, value):
-        if not hasattr(self, '_mutable') or self._mutable:
-            super().__setattr__(name, value)
-        else:
-            raise AttributeError("LambdaTerms are immutable once instantiated.")
+class CurryType(Immutable, metaclass=ABCMeta):
+    __slots__ = ()
+    kind = 'currytype'
 
     @abstractmethod
     def __eq__(self, other):
         NotImplemented
 
+    @abstractmethod
+    def __hash__(self):
+        NotImplemented
+
     @abstractmethod
     def __contains__(self, other):
         NotImplemented
@@ -35,46 +42,119 @@ class CurryType(Finalisable, metaclass=ABCMeta):
         return self.apply_substitution(Substitution((a, b)))
 
 class ArrowType(CurryType):
+    __slots__ = ('left', 'right', '_hash')
     kind = 'arrowtype'
 
     def __init__(self, left, right):
-        self.left = left
-        self.right = right
-        self.finalise()
+        _set(self, 'left', left)
+        _set(self, 'right', right)
+        _set(self, '_hash', hash((self.kind, left._hash, right._hash)))
 
     @overrides
     def __eq__(self, other):
-        return (other.kind == self.kind and 
-                self.left == other.left and self.right == other.right)
+        stack = [(self, other)]
+        while stack:
+            a, b = stack.pop()
+            if a is b:
+                continue
+            elif a.kind != 'arrowtype':
+                if a != b:
+                    return False
+            elif b.kind != a.kind or b._hash != a._hash:
+                return False
+            else:
+                stack.append((a.right, b.right))
+                stack.append((a.left, b.left))
+        return True
+
+    @overrides
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (self.__class__, (self.left, self.right))
 
     @overrides
     def __contains__(self, other):
-        return self == other or other in self.left or other in self.right
+        stack = [self]
+        while stack:
+            type_ = stack.pop()
+            if type_ == other:
+                return True
+            elif type_.kind == 'arrowtype':
+                stack.append(type_.right)
+                stack.append(type_.left)
+        return False
 
     @overrides
     def apply_substitution(self, sub):
-        left = self.left.apply_substitution(sub)
-        right = self.right.apply_substitution(sub)
-        return ArrowType(left, right)
+        results = []
+        stack = [(self, False)]
+        while stack:
+            type_, expanded = stack.pop()
+            if expanded:
+                right = results.pop()
+                left = results.pop()
+                if left is type_.left and right is type_.right:
+                    results.append(type_)
+                else:
+                    results.append(ArrowType(left, right))
+            elif type_.kind == 'arrowtype':
+                stack.append((type_, True))
+                stack.append((type_.right, False))
+                stack.append((type_.left, False))
+            else:
+                results.append(type_.apply_substitution(sub))
+        return results.pop()
 
     def __repr__(self):
-        return 'ArrowType({!r}, {!r})'.format(self.left, self.right)
+        out = []
+        stack = [self]
+        while stack:
+            type_ = stack.pop()
+            if isinstance(type_, str):
+                out.append(type_)
+            elif type_.kind == 'arrowtype':
+                out.append('ArrowType(')
+                stack.extend([')', type_.right, ', ', type_.left])
+            else:
+                out.append(repr(type_))
+        return ''.join(out)
 
     def __str__(self):
-        left = ('({})'.format(self.left) if self.left.kind == 'arrowtype'
-                else self.left)
-        return "{} -> {}".format(left, self.right)
+        out = []
+        stack = [self]
+        while stack:
+            type_ = stack.pop()
+            if isinstance(type_, str):
+                out.append(type_)
+            elif type_.kind != 'arrowtype':
+                out.append(str(type_))
+            elif type_.left.kind == 'arrowtype':
+                out.append('(')
+                stack.extend([type_.right, ') -> ', type_.left])
+            else:
+                stack.extend([type_.right, ' -> ', type_.left])
+        return ''.join(out)
 
 class ConstantType(CurryType):
+    __slots__ = ('name', '_hash')
     kind = 'constanttype'
 
     def __init__(self, name):
-        self.name = name
-        self.finalise()
+        _set(self, 'name', name)
+        _set(self, '_hash', hash((self.kind, name)))
 
     @overrides
     def __eq__(self, other):
-        return self.name == other.name
+        return self.kind == other.kind and self.name == other.name
+
+    @overrides
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (self.__class__, (self.name,))
 
     @overrides
     def __contains__(self, other):
@@ -91,17 +171,23 @@ class ConstantType(CurryType):
         return self.name
 
 class TypeVariable(CurryType):
+    __slots__ = ('name', '_hash')
     kind = 'typevariable'
-    freshcounter = -1
+    freshtemplate = 'φ_{:02d}'
 
     def __init__(self, name):
-        self.name = name
-        self.finalise()
+        _set(self, 'name', name)
+        _set(self, '_hash', hash((self.kind, name)))
 
     @classmethod
     def fresh(cls):
-        cls.freshcounter += 1
-        return cls('φ_{:02d}'.format(cls.freshcounter))
+        """A type variable named by the current ``utils.NameSupply``.
+
+        See ``utils.fresh_names`` for scoping the supply.
+
+        """
+        name = current_supply(type_variable_names, cls.freshtemplate).fresh()
+        return cls(name)
 
     @overrides
     def __eq__(self, other):
@@ -109,7 +195,10 @@ class TypeVariable(CurryType):
 
     @overrides
     def __hash__(self):
-        return hash(self.name) ^ hash(self.kind)
+        return self._hash
+
+    def __reduce__(self):
+        return (self.__class__, (self.name,))
 
     @overrides
     def __contains__(self, other):
@@ -125,28 +214,213 @@ class TypeVariable(CurryType):
     def __str__(self):
         return self.name
 
+class _Node:
+    """A mutable stand-in for a type, as used by ``Unifier``.
+
+    ``parent`` points towards the representative of the node's class.
+    Representatives of classes that contain a type variable remember its
+    name in ``var``, for error messages. A representative always has the
+    shape of the class, so the node of a type variable takes on the shape
+    of a proper type when union by rank keeps it over that type's node.
+
+    """
+    def __init__(self, kind, name=None, left=None, right=None):
+        self.kind = kind
+        self.name = name
+        self.left = left
+        self.right = right
+        self.var = name if kind == 'typevariable' else None
+        self.parent = self
+        self.rank = 0
+
+class Unifier:
+    """Unification by union-find over type nodes, after Huet.
+
+    Types are converted to nodes, and unifying two nodes merges their
+    equivalence classes; type variables are never substituted into
+    anything. The occurs check is deferred to ``zonk``, which turns a
+    node back into a ``CurryType`` and fails if it would be infinite.
+    With path compression and union by rank the whole process is close
+    to linear in the size of the types.
+
+    Attributes:
+        variables (Dict[str, _Node]): The node of each type variable.
+
+    """
+    def __init__(self):
+        self.variables = {}
+        self._zonked = {}
+
+    def variable(self, name):
+        if name not in self.variables:
+            self.variables[name] = _Node('typevariable', name)
+        return self.variables[name]
+
+    def constant(self, name):
+        return _Node('constanttype', name)
+
+    def arrow(self, left, right):
+        return _Node('arrowtype', left=left, right=right)
+
+    def node(self, type_):
+        """Converts a ``CurryType`` to a node."""
+        results = []
+        stack = [(type_, False)]
+        while stack:
+            type_, expanded = stack.pop()
+            if expanded:
+                right = results.pop()
+                results.append(self.arrow(results.pop(), right))
+            elif type_.kind == 'arrowtype':
+                stack.append((type_, True))
+                stack.append((type_.right, False))
+                stack.append((type_.left, False))
+            elif type_.kind == 'typevariable':
+                results.append(self.variable(type_.name))
+            else:
+                results.append(self.constant(type_.name))
+        return results.pop()
+
+    @staticmethod
+    def find(node):
+        root = node
+        while root.parent is not root:
+            root = root.parent
+        while node.parent is not root:
+            node.parent, node = root, node.parent
+        return root
+
+    @staticmethod
+    def _link(a, b):
+        """Merges the classes of two representatives."""
+        if a.rank > b.rank:
+            a, b = b, a
+        elif a.rank == b.rank:
+            b.rank += 1
+        a.parent = b
+        b.var = b.var or a.var
+        return b
+
+    def unify(self, a, b):
+        """Merges the classes of two nodes and of their corresponding parts.
+
+        Raises:
+            UnificationError if the nodes have incompatible shapes.
+
+        """
+        if instrumentation.recorder is not None:
+            instrumentation.recorder.count('unify_calls')
+        self._zonked.clear()
+        stack = [(a, b)]
+        while stack:
+            a, b = stack.pop()
+            a, b = self.find(a), self.find(b)
+            if a is b:
+                continue
+            if b.kind == 'typevariable' and a.kind != 'typevariable':
+                a, b = b, a
+            if a.kind == 'typevariable':
+                if b.kind == 'typevariable':
+                    self._link(a, b)
+                elif self._link(a, b) is a:
+                    a.kind, a.name = b.kind, b.name
+                    a.left, a.right = b.left, b.right
+            elif a.kind == b.kind == 'arrowtype':
+                self._link(a, b)
+                stack.append((a.right, b.right))
+                stack.append((a.left, b.left))
+            elif a.kind == b.kind == 'constanttype' and a.name == b.name:
+                self._link(a, b)
+            else:
+                raise UnificationError(self._describe(a), self._describe(b))
+
+    def zonk(self, node):
+        """The ``CurryType`` a node stands for.
+
+        Raises:
+            UnificationError if that type would have to contain itself.
+
+        """
+        if instrumentation.recorder is not None:
+            instrumentation.recorder.count('occurs_checks')
+        return self._zonk(node, self._zonked, cut=False)
+
+    def _describe(self, node):
+        # like zonk, but cuts infinite types short for error messages
+        return self._zonk(node, {}, cut=True)
+
+    def _zonk(self, node, memo, cut):
+        path = set()
+        results = []
+        stack = [(node, False)]
+        while stack:
+            node, expanded = stack.pop()
+            node = self.find(node)
+            if expanded:
+                path.discard(node)
+                right = results.pop()
+                memo[node] = ArrowType(results.pop(), right)
+                results.append(memo[node])
+            elif node in memo:
+                results.append(memo[node])
+            elif node.kind == 'typevariable':
+                memo[node] = TypeVariable(node.name)
+                results.append(memo[node])
+            elif node.kind == 'constanttype':
+                memo[node] = ConstantType(node.name)
+                results.append(memo[node])
+            elif node in path:
+                var = TypeVariable(node.var or '...')
+                if not cut:
+                    raise UnificationError(var, self._describe(node))
+                results.append(var)
+            else:
+                path.add(node)
+                stack.append((node, True))
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+        return results.pop()
+
+    def check(self):
+        """Checks that no type variable stands for an infinite type.
+
+        Every cycle among the nodes passes through the class of some type
+        variable, so this catches them all, even in types that are no
+        longer referred to.
+
+        Raises:
+            UnificationError if there is such a type variable.
+
+        """
+        for node in self.variables.values():
+            self.zonk(node)
+
+    def substitution(self):
+        """The most general unifier of everything unified so far."""
+        s = Substitution()
+        for name, node in self.variables.items():
+            type_ = self.zonk(node)
+            if type_.kind != 'typevariable' or type_.name != name:
+                s[TypeVariable(name)] = type_
+        return s
+
+@instrumentation.timed('unify')
 def unify(a, b, *args):
-    if args:
-        s0 = unify(a, b)
-        s1 = unify(s0(b), *map(s0, args))
-        return s1 >> s0
-    if a.kind == 'typevariable':
-        if b.kind == 'typevariable' and a.name == b.name: 
-            return Substitution()
-        elif b.kind == 'typevariable' or a not in b: 
-            return Substitution({a: b})
-        else:
-            raise UnificationError(a, b)
-    elif b.kind == 'typevariable':
-        return unify(b, a)
-    elif a.kind == b.kind == 'arrowtype':
-        s0 = unify(a.left, b.left)
-        s1 = unify(s0(a.right), s0(b.right))
-        return s0 >> s1
-    elif a.kind == b.kind == 'constanttype' and a.name == b.name:
-        return Substitution()
-    else:
-        raise UnificationError(a, b)
+    """Finds the most general unifier of two or more types.
+
+    Returns:
+        (Substitution) An idempotent substitution ``s`` such that ``s(a)``,
+        ``s(b)`` and ``s(arg)`` for each other argument are all equal.
+
+    Raises:
+        UnificationError if there is no such substitution.
+
+    """
+    unifier = Unifier()
+    nodes = [unifier.node(type_) for type_ in (a, b) + args]
+    for x, y in zip(nodes, nodes[1:]):
+        unifier.unify(x, y)
+    return unifier.substitution()
 
 def unifiable(*args):
     try:
@@ -1,5 +1,6 @@
 import unittest
 from .currytypes import *
+from .utils import Substitution, NameSupply, fresh_names
 
 class UnificationTestCase(unittest.TestCase):
     def assertUnifiable(self, *args):
@@ -56,3 +57,213 @@ class UnificationTestCase(unittest.TestCase):
         self.assertUnifiable(*[ArrowType(TypeVariable(a), TypeVariable(b))
                                for a, b in (('a','b'), ('a','c'), ('b','c'))])
 
+
+    def testComposition(self):
+        self.assertUnifiable(
+            ArrowType(TypeVariable('a'), TypeVariable('b')),
+            ArrowType(TypeVariable('b'), TypeVariable('c')),
+        )
+        self.assertUnifiable(
+            ArrowType(ArrowType(TypeVariable('a'), TypeVariable('b')),
+                      TypeVariable('a')),
+            ArrowType(ArrowType(TypeVariable('c'), TypeVariable('c')),
+                      ConstantType('A')),
+        )
+
+    def testOccursThroughOtherVariables(self):
+        a, b, c = TypeVariable('a'), TypeVariable('b'), TypeVariable('c')
+        self.assertNotUnifiable(
+            ArrowType(a, b),
+            ArrowType(ArrowType(b, c), a),
+        )
+        self.assertNotUnifiable(
+            ArrowType(a, ArrowType(a, b)),
+            ArrowType(c, ArrowType(ArrowType(c, b), b)),
+        )
+
+    def testIdempotent(self):
+        a, b, c = TypeVariable('a'), TypeVariable('b'), TypeVariable('c')
+        s = unify(ArrowType(a, ArrowType(b, c)),
+                  ArrowType(ArrowType(b, c), ArrowType(c, ConstantType('A'))))
+        for v in (a, b, c):
+            self.assertEqual(s(s(v)), s(v))
+        self.assertEqual(s(a), ArrowType(ConstantType('A'), ConstantType('A')))
+
+def baseline_unify(a, b):
+    """``unify`` as it was before it used a ``Unifier``, for two types."""
+    if a.kind == 'typevariable':
+        if b.kind == 'typevariable' and a.name == b.name:
+            return Substitution()
+        elif b.kind == 'typevariable' or a not in b:
+            return Substitution({a: b})
+        else:
+            raise UnificationError(a, b)
+    elif b.kind == 'typevariable':
+        return baseline_unify(b, a)
+    elif a.kind == b.kind == 'arrowtype':
+        s0 = baseline_unify(a.left, b.left)
+        s1 = baseline_unify(s0(a.right), s0(b.right))
+        # the bug: s1 was found after s0, so it has to be applied after it
+        return s0 >> s1
+    elif a.kind == b.kind == 'constanttype' and a.name == b.name:
+        return Substitution()
+    else:
+        raise UnificationError(a, b)
+
+class CompositionOrderTestCase(unittest.TestCase):
+    """Regression tests for the order of composition in the arrow case."""
+    def testArrow(self):
+        a, b, c = TypeVariable('a'), TypeVariable('b'), TypeVariable('c')
+        left, right = ArrowType(a, b), ArrowType(b, c)
+        # the baseline's s0 >> s1 maps a -> b to b -> c and b -> c to c -> c
+        old = baseline_unify(left, right)
+        self.assertNotEqual(old(left), old(right))
+        s = unify(left, right)
+        self.assertEqual(s(left), s(right))
+        # most general: all three variables become one variable
+        self.assertEqual(s(a), s(b))
+        self.assertEqual(s(b), s(c))
+        self.assertEqual(s(a).kind, 'typevariable')
+        self.assertEqual(s(s(a)), s(a))
+
+    def testNested(self):
+        a, b, c = TypeVariable('a'), TypeVariable('b'), TypeVariable('c')
+        left = ArrowType(ArrowType(a, b), a)
+        right = ArrowType(ArrowType(c, c), ConstantType('A'))
+        old = baseline_unify(left, right)
+        self.assertNotEqual(old(left), old(right))
+        s = unify(left, right)
+        self.assertEqual(s(left), s(right))
+        self.assertEqual(s(left), ArrowType(
+            ArrowType(ConstantType('A'), ConstantType('A')), ConstantType('A')
+        ))
+
+class UnifierTestCase(unittest.TestCase):
+    def testIncremental(self):
+        unifier = Unifier()
+        a, b = unifier.variable('a'), unifier.variable('b')
+        f = unifier.arrow(a, b)
+        unifier.unify(a, unifier.constant('A'))
+        unifier.unify(b, a)
+        self.assertEqual(unifier.zonk(f),
+                         ArrowType(ConstantType('A'), ConstantType('A')))
+        self.assertIs(unifier.find(a), unifier.find(b))
+        self.assertRaises(UnificationError,
+                          lambda: unifier.unify(f, unifier.constant('A')))
+
+    def testRank(self):
+        unifier = Unifier()
+        a, b, c, d = (unifier.variable(name) for name in 'abcd')
+        unifier.unify(a, b)
+        unifier.unify(c, d)
+        unifier.unify(a, c)
+        root = unifier.find(a)
+        self.assertEqual(root.rank, 2)
+        # a rank 0 arrow goes under the variables' representative
+        f = unifier.arrow(unifier.constant('A'), unifier.variable('e'))
+        unifier.unify(f, d)
+        self.assertIs(unifier.find(f), root)
+        self.assertEqual(root.rank, 2)
+        self.assertEqual(root.kind, 'arrowtype')
+        for node in (a, b, c, d, f):
+            self.assertEqual(unifier.zonk(node),
+                             ArrowType(ConstantType('A'), TypeVariable('e')))
+        self.assertRaises(UnificationError,
+                          lambda: unifier.unify(b, unifier.constant('A')))
+
+    def testInfiniteType(self):
+        unifier = Unifier()
+        a = unifier.variable('a')
+        unifier.unify(a, unifier.arrow(a, unifier.variable('b')))
+        self.assertRaises(UnificationError, lambda: unifier.zonk(a))
+        self.assertRaises(UnificationError, unifier.substitution)
+
+def arrows(n, leaf=lambda i: TypeVariable('a_{}'.format(i))):
+    """``a_0 -> (a_1 -> ... -> a_n)``, built without recursion."""
+    type_ = leaf(n)
+    for i in reversed(range(n)):
+        type_ = ArrowType(leaf(i), type_)
+    return type_
+
+class HashTestCase(unittest.TestCase):
+    def testHash(self):
+        a, b = TypeVariable('a'), TypeVariable('b')
+        self.assertEqual(hash(ArrowType(a, b)), hash(ArrowType(a, b)))
+        self.assertNotEqual(hash(ArrowType(a, b)), hash(ArrowType(b, a)))
+        types = {ArrowType(a, b): 1, ArrowType(b, a): 2, ConstantType('a'): 3}
+        self.assertEqual(types[ArrowType(a, b)], 1)
+        self.assertNotIn(a, types)
+        self.assertNotEqual(ConstantType('a'), a)
+        self.assertNotEqual(a, ConstantType('a'))
+
+class ImmutabilityTestCase(unittest.TestCase):
+    def testImmutable(self):
+        a = TypeVariable('a')
+        for type_ in (a, ConstantType('int'), ArrowType(a, a)):
+            self.assertRaises(AttributeError, setattr, type_, 'kind', 'x')
+            self.assertFalse(hasattr(type_, '__dict__'))
+        self.assertFalse(hasattr(Substitution(), '__dict__'))
+
+    def testPickle(self):
+        import pickle
+        a, b = TypeVariable('a'), TypeVariable('b')
+        type_ = ArrowType(ConstantType('int'), ArrowType(a, b))
+        self.assertEqual(pickle.loads(pickle.dumps(type_)), type_)
+        s = Substitution({a: b})
+        self.assertEqual(pickle.loads(pickle.dumps(s)), s)
+
+class FreshNamesTestCase(unittest.TestCase):
+    def testScoped(self):
+        with fresh_names():
+            a, b = TypeVariable.fresh(), TypeVariable.fresh()
+            with fresh_names():
+                self.assertEqual(TypeVariable.fresh(), a)
+            self.assertNotIn(TypeVariable.fresh(), (a, b))
+        self.assertEqual((a.name, b.name), ('φ_00', 'φ_01'))
+
+        names = NameSupply('t{}', start=5)
+        names.reserve(['t6'])
+        with fresh_names(type_variables=names):
+            self.assertEqual([TypeVariable.fresh().name for _ in range(2)],
+                             ['t5', 't7'])
+
+    def testThreads(self):
+        import threading
+        results = {}
+        def fresh(i):
+            with fresh_names():
+                results[i] = [TypeVariable.fresh().name for _ in range(1000)]
+        threads = [threading.Thread(target=fresh, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(all(names == results[0] for names in results.values()))
+
+class DeepTypeTestCase(unittest.TestCase):
+    depth = 20000
+
+    def testTraversals(self):
+        type_ = arrows(self.depth)
+        self.assertEqual(type_, arrows(self.depth))
+        self.assertNotEqual(type_, arrows(self.depth - 1))
+        self.assertIn(TypeVariable('a_{}'.format(self.depth)), type_)
+        self.assertNotIn(TypeVariable('b'), type_)
+        self.assertTrue(str(type_).startswith('a_0 -> a_1 -> '))
+        self.assertTrue(repr(type_).endswith("TypeVariable('a_{}')".format(
+            self.depth) + ')' * self.depth))
+        s = Substitution({TypeVariable('a_0'): TypeVariable('b')})
+        self.assertEqual(s(type_).left, TypeVariable('b'))
+        self.assertIs(s(type_).right, type_.right)
+
+    def testUnify(self):
+        depth = self.depth
+        a = arrows(depth)
+        b = arrows(depth, lambda i: TypeVariable('b'))
+        s = unify(a, b)
+        self.assertEqual(s(a), s(b))
+        self.assertEqual(s(a), b)
+        self.assertFalse(unifiable(
+            arrows(depth),
+            ArrowType(TypeVariable('a_{}'.format(depth)), arrows(depth))
+        ))
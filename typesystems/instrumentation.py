@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Opt-in counters and timers for the hot paths of reduction and inference.
+
+Instrumented code checks the module attribute ``recorder`` and only does
+any work when it is not ``None``, which it is unless code is running
+inside ``record()``. Per-step events cost that one check when recording
+is off, and timed functions one extra call::
+
+    with instrumentation.record() as rec:
+        principal_pair(term)
+    rec.counters['unify_calls']
+
+The events are:
+
+- counters: ``beta_steps``, ``substitutions``, ``alpha_renames`` and
+  ``fresh_variables`` (in beta reduction), ``unify_calls``,
+  ``compositions`` (``Substitution.__rshift__``) and ``occurs_checks``
+  (each ``Unifier.zonk``, which is where the occurs check happens).
+- observations: ``context_size``, the size of the context at each node
+  visited by ``principal_pair``.
+- timers: ``principal_pair``, ``unify`` and ``normalize``.
+
+Recording is per process and not thread safe.
+
+"""
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+import functools
+import time
+
+recorder = None
+
+class Recorder:
+    """Collects the events of one ``record()`` block.
+
+    Attributes:
+        counters (Counter): The number of times each counter was hit.
+        observations (Dict[str, Counter]): For each observed quantity,
+            how often each value was seen.
+        timers (Dict[str, List[float]]): For each timer, the total time in
+            seconds and the number of times it ran.
+        hook (Optional[Callable[[str, str, object], None]]): Called with
+            the kind (``'count'``, ``'observe'`` or ``'time'``), name and
+            value of every event.
+
+    """
+    def __init__(self, hook=None):
+        self.counters = Counter()
+        self.observations = defaultdict(Counter)
+        self.timers = defaultdict(lambda: [0.0, 0])
+        self.hook = hook
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+        if self.hook is not None:
+            self.hook('count', name, n)
+
+    def observe(self, name, value):
+        self.observations[name][value] += 1
+        if self.hook is not None:
+            self.hook('observe', name, value)
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            timer = self.timers[name]
+            timer[0] += elapsed
+            timer[1] += 1
+            if self.hook is not None:
+                self.hook('time', name, elapsed)
+
+    def summary(self):
+        """The recorded events as plain dicts, e.g. for ``json.dump``."""
+        return {
+            'counters': dict(self.counters),
+            'observations': {
+                name: {'count': sum(values.values()),
+                       'mean': (sum(k * v for k, v in values.items()) /
+                                sum(values.values())),
+                       'max': max(values)}
+                for name, values in self.observations.items()
+            },
+            'timers': {name: {'seconds': seconds, 'calls': calls}
+                       for name, (seconds, calls) in self.timers.items()},
+        }
+
+@contextmanager
+def record(hook=None):
+    """Records the events of the code in a ``with`` block.
+
+    Blocks can be nested; events go to the innermost one.
+
+    Args:
+        hook: See ``Recorder.hook``.
+
+    Yields:
+        (Recorder) The recorder collecting the events.
+
+    """
+    global recorder
+    outer, recorder = recorder, Recorder(hook)
+    try:
+        yield recorder
+    finally:
+        recorder = outer
+
+def timed(name):
+    """Decorates a function to be timed under ``name`` when recording."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if recorder is None:
+                return function(*args, **kwargs)
+            with recorder.timer(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,60 @@
+import json
+import unittest
+from . import instrumentation
+from .instrumentation import *
+from .currytypes import *
+from .currytypeassignment import principal_pair
+from .utils import Substitution
+from .lambdacalculus.lambdacalculus import *
+from .lambdacalculus.lambdacalculus_tests import K, TWO, ONE, ADD
+from .lambdacalculus.normalization import normalize
+
+class RecordTestCase(unittest.TestCase):
+    def testDisabled(self):
+        self.assertIsNone(instrumentation.recorder)
+        normalize(Application(Application(ADD, ONE), TWO))
+        self.assertIsNone(instrumentation.recorder)
+
+    def testReduction(self):
+        # contracting K (\y.y) has to rename the y bound by K
+        with record() as rec:
+            normalize(Application(Application(ADD, ONE), TWO))
+            Application(K, Abstraction('y', Variable('y'))).reduce()
+        self.assertGreater(rec.counters['beta_steps'], 1)
+        self.assertGreaterEqual(rec.counters['substitutions'],
+                                rec.counters['beta_steps'])
+        self.assertGreaterEqual(rec.counters['alpha_renames'], 1)
+        self.assertEqual(rec.counters['fresh_variables'],
+                         rec.counters['alpha_renames'])
+        self.assertEqual(rec.timers['normalize'][1], 1)
+        self.assertIsNone(instrumentation.recorder)
+
+    def testInference(self):
+        term = Application(Variable('f'), Application(Variable('g'),
+                                                      Variable('x')))
+        with record() as rec:
+            principal_pair(term)
+            unify(TypeVariable('a'), ConstantType('int'))
+            Substitution() >> Substitution()
+        self.assertEqual(rec.counters['unify_calls'], 3)
+        self.assertEqual(rec.counters['compositions'], 1)
+        self.assertGreater(rec.counters['occurs_checks'], 0)
+        # one observation per node: f, g, x, gx, f(gx)
+        self.assertEqual(rec.observations['context_size'],
+                         {1: 3, 2: 1, 3: 1})
+        self.assertEqual(rec.timers['principal_pair'][1], 1)
+        self.assertEqual(rec.timers['unify'][1], 1)
+        summary = rec.summary()
+        json.dumps(summary)
+        self.assertEqual(summary['observations']['context_size'],
+                         {'count': 5, 'mean': 1.6, 'max': 3})
+
+    def testHookAndNesting(self):
+        events = []
+        with record(lambda *event: events.append(event)) as outer:
+            with record() as inner:
+                Variable.fresh()
+            Variable.fresh()
+        self.assertEqual(inner.counters['fresh_variables'], 1)
+        self.assertEqual(outer.counters['fresh_variables'], 1)
+        self.assertEqual(events, [('count', 'fresh_variables', 1)])
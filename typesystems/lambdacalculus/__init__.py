@@ -3,16 +3,20 @@ from . import *
 
 # expose parse and repl
 from .lexparse import parse
+from . import normalization
 
 def repl():
-    import string
+    from ..utils import NameSupply, fresh_names
     while True:
-        lambdacalculus.Variable.freshcounter = -1
-        lambdacalculus.Variable.freshletters = set(string.ascii_lowercase)
         term = parse(input('>>> '))
-        try:
-            while term.is_redex:
-                term = term.reduce()
-                print(term)
-        except KeyboardInterrupt:
-            pass
+        names = NameSupply(lambdacalculus.Variable.freshtemplate)
+        names.reserve(v.symbol for v in term.variables)
+        with fresh_names(names):
+            sequence = normalization.reduction_sequence(term)
+            try:
+                for term in sequence:
+                    print(term)
+            except KeyboardInterrupt:
+                pass
+        if sequence.outcome == normalization.CYCLE:
+            print('(loops back to step {})'.format(sequence.cycle[0]))
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""Compact, array-backed storage for many lambda terms.
+
+Every ``LambdaTerm`` node is a full Python object. A ``TermArena``
+instead stores nodes as a struct of arrays: one byte for the kind of each
+node and two machine integers that hold either child indices or symbol
+ids. Children are always stored before their parents, so a term is just
+the index of its root node and whole-arena scans run over flat arrays.
+
+"""
+from array import array
+
+from .lambdacalculus import Variable, Abstraction, Application
+
+VARIABLE, ABSTRACTION, APPLICATION = 0, 1, 2
+KINDS = ('variable', 'abstraction', 'application')
+
+class TermArena:
+    """A store for lambda terms as flat arrays.
+
+    Node ``i`` has kind ``kinds[i]`` and fields ``first[i]`` and
+    ``second[i]``:
+
+    - variable: the symbol id, unused
+    - abstraction: the symbol id of the binder, the body's node
+    - application: the left and right nodes' indices
+
+    Attributes:
+        symbols (List[str]): The symbol of each symbol id.
+        roots (array): The root node of each term added with ``add``.
+
+    """
+    def __init__(self, share=False):
+        """
+        Args:
+            share (bool): Store identical subterms only once. This saves
+                space on repetitive corpora, but costs a dict entry per
+                distinct node while terms are being added, until
+                ``freeze`` is called.
+
+        """
+        self.kinds = array('B')
+        self.first = array('l')
+        self.second = array('l')
+        self.symbols = []
+        self.roots = array('l')
+        self._symbol_ids = {}
+        self._nodes = {} if share else None
+
+    @classmethod
+    def from_terms(cls, terms, share=False):
+        """An arena holding ``terms``, frozen once they are added."""
+        arena = cls(share)
+        arena.extend(terms)
+        arena.freeze()
+        return arena
+
+    def freeze(self):
+        """Drops the table used to share nodes, once all terms are added.
+
+        Terms added afterwards are still stored, but no longer share
+        nodes with the ones already there.
+
+        """
+        self._nodes = None
+
+    def __len__(self):
+        return len(self.roots)
+
+    def __getitem__(self, index):
+        return self.view(self.roots[index])
+
+    def __iter__(self):
+        return (self.view(root) for root in self.roots)
+
+    @property
+    def nbytes(self):
+        """The memory taken by the node arrays, in bytes."""
+        return sum(a.itemsize * len(a) for a in
+                   (self.kinds, self.first, self.second, self.roots))
+
+    def _symbol(self, symbol):
+        if symbol not in self._symbol_ids:
+            self._symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return self._symbol_ids[symbol]
+
+    def _node(self, kind, first, second=0):
+        if self._nodes is not None:
+            key = (kind, first, second)
+            if key in self._nodes:
+                return self._nodes[key]
+            self._nodes[key] = len(self.kinds)
+        self.kinds.append(kind)
+        self.first.append(first)
+        self.second.append(second)
+        return len(self.kinds) - 1
+
+    def store(self, term):
+        """Stores the nodes of a term without adding it to ``roots``.
+
+        Returns:
+            (int) The index of the term's root node.
+
+        """
+        results = []
+        stack = [(term, False)]
+        while stack:
+            term, expanded = stack.pop()
+            if term.kind == 'variable':
+                results.append(self._node(VARIABLE, self._symbol(term.symbol)))
+            elif term.kind == 'abstraction':
+                if expanded:
+                    results.append(self._node(
+                        ABSTRACTION, self._symbol(term.binds.symbol),
+                        results.pop()
+                    ))
+                else:
+                    stack.append((term, True))
+                    stack.append((term.term, False))
+            elif term.kind == 'application':
+                if expanded:
+                    right = results.pop()
+                    results.append(self._node(APPLICATION, results.pop(),
+                                              right))
+                else:
+                    stack.append((term, True))
+                    stack.append((term.right, False))
+                    stack.append((term.left, False))
+            else:
+                raise Exception('no case found for {!r}'.format(term))
+        return results.pop()
+
+    def add(self, term):
+        """Adds a term to the arena.
+
+        Returns:
+            (int) The position of the term in ``roots``.
+
+        """
+        self.roots.append(self.store(term))
+        return len(self.roots) - 1
+
+    def extend(self, terms):
+        for term in terms:
+            self.add(term)
+
+    def view(self, node):
+        """A read-only view of the term rooted at node ``node``."""
+        return _VIEWS[self.kinds[node]](self, node)
+
+    def to_term(self, node):
+        """Converts the term rooted at node ``node`` to a ``LambdaTerm``.
+
+        Shared nodes become shared subterms.
+
+        """
+        kinds, first, second, symbols = (self.kinds, self.first, self.second,
+                                         self.symbols)
+        done = {}
+        stack = [node]
+        while stack:
+            i = stack[-1]
+            if i in done:
+                stack.pop()
+            elif kinds[i] == VARIABLE:
+                done[i] = Variable(symbols[first[i]])
+                stack.pop()
+            elif kinds[i] == ABSTRACTION:
+                if second[i] in done:
+                    done[i] = Abstraction(symbols[first[i]], done[second[i]])
+                    stack.pop()
+                else:
+                    stack.append(second[i])
+            else:
+                if first[i] in done and second[i] in done:
+                    done[i] = Application(done[first[i]], done[second[i]])
+                    stack.pop()
+                else:
+                    stack.append(second[i])
+                    stack.append(first[i])
+        return done[node]
+
+    def to_terms(self):
+        """Converts every term added with ``add`` back, in order."""
+        return (self.to_term(root) for root in self.roots)
+
+    def count(self, kind):
+        """The number of stored nodes of a kind, e.g. ``'abstraction'``."""
+        return self.kinds.count(KINDS.index(kind))
+
+class ArenaTerm:
+    """A view of a term stored in a ``TermArena``.
+
+    Views have the read-only attributes of the corresponding
+    ``LambdaTerm`` classes, but hold nothing except the arena and a node
+    index. They compare equal to views of identical terms and to the
+    equivalent ``LambdaTerm``.
+
+    """
+    kind = 'term'
+
+    def __init__(self, arena, node):
+        self.arena = arena
+        self.node = node
+
+    def to_term(self):
+        return self.arena.to_term(self.node)
+
+    @property
+    def free_variables(self):
+        return self.to_term().free_variables
+
+    @property
+    def bound_variables(self):
+        return self.to_term().bound_variables
+
+    def __eq__(self, other):
+        if isinstance(other, ArenaTerm):
+            if other.arena is self.arena and other.node == self.node:
+                return True
+            other = other.to_term()
+        return self.to_term() == other
+
+    def __hash__(self):
+        return hash(self.to_term())
+
+    def __repr__(self):
+        return repr(self.to_term())
+
+    def __str__(self):
+        return str(self.to_term())
+
+class ArenaVariable(ArenaTerm):
+    kind = 'variable'
+
+    @property
+    def symbol(self):
+        return self.arena.symbols[self.arena.first[self.node]]
+
+class ArenaAbstraction(ArenaTerm):
+    kind = 'abstraction'
+
+    @property
+    def binds(self):
+        return Variable(self.arena.symbols[self.arena.first[self.node]])
+
+    @property
+    def term(self):
+        return self.arena.view(self.arena.second[self.node])
+
+class ArenaApplication(ArenaTerm):
+    kind = 'application'
+
+    @property
+    def left(self):
+        return self.arena.view(self.arena.first[self.node])
+
+    @property
+    def right(self):
+        return self.arena.view(self.arena.second[self.node])
+
+_VIEWS = (ArenaVariable, ArenaAbstraction, ArenaApplication)
@@ -0,0 +1,59 @@
+import unittest
+import sys
+from .lambdacalculus import *
+from .lambdacalculus_tests import S, K, TWO, THREE, church
+from .arena import *
+
+class TermArenaTestCase(unittest.TestCase):
+    terms = [S, K, TWO, Variable('y'), Application(Variable('w'), K)]
+
+    def testRoundTrip(self):
+        arena = TermArena.from_terms(self.terms)
+        self.assertEqual(len(arena), len(self.terms))
+        self.assertEqual(list(arena.to_terms()), self.terms)
+
+    def testViews(self):
+        arena = TermArena()
+        arena.add(THREE)
+        view = arena[0]
+        self.assertEqual(view.kind, 'abstraction')
+        self.assertEqual(view.binds, Variable('f'))
+        self.assertEqual(view.term.term.left.symbol, 'f')
+        self.assertEqual(view.term.term.right.right.kind, 'application')
+        self.assertEqual(view, THREE)
+        self.assertEqual(THREE, view)
+        self.assertEqual(str(view), str(THREE))
+        self.assertEqual(hash(view), hash(THREE))
+        self.assertEqual(view.free_variables, frozenset())
+
+    def testSharing(self):
+        arena = TermArena(share=True)
+        arena.extend([TWO, TWO, THREE])
+        self.assertEqual(arena.roots[0], arena.roots[1])
+        # f, x, fx, f(fx), \x.f(fx), \fx.f(fx), f(f(fx)), \x.., \fx..
+        self.assertEqual(len(arena.kinds), 9)
+        self.assertEqual(arena.count('variable'), 2)
+        self.assertEqual(list(arena.to_terms()), [TWO, TWO, THREE])
+        term = arena.to_term(arena.roots[2])
+        self.assertIs(term.term.term.left, term.term.term.right.left)
+
+    def testFreeze(self):
+        arena = TermArena.from_terms([TWO, TWO], share=True)
+        self.assertEqual(arena.roots[0], arena.roots[1])
+        self.assertIsNone(arena._nodes)
+        arena.add(TWO)
+        # six shared nodes, then seven unshared ones
+        self.assertEqual(len(arena.kinds), 6 + 7)
+        self.assertEqual(list(arena.to_terms()), [TWO, TWO, TWO])
+
+    def testCompact(self):
+        terms = [church(n) for n in range(100)]
+        arena = TermArena.from_terms(terms)
+        self.assertEqual(arena.count('application'), sum(range(100)))
+        per_node = arena.nbytes / len(arena.kinds)
+        self.assertLess(per_node, sys.getsizeof(Variable('x')))
+
+    def testDeep(self):
+        arena = TermArena()
+        arena.add(church(20000))
+        self.assertEqual(arena.to_term(arena.roots[0]), church(20000))
@@ -0,0 +1,607 @@
+# -*- coding: utf-8 -*-
+"""Nameless (de Bruijn indexed) lambda terms.
+
+A bound variable is written as the number of binders between it and the
+abstraction that binds it, so alpha equivalent terms are represented
+identically and capture-avoiding substitution never needs to rename
+anything. Free variables keep their names.
+
+"""
+from abc import ABCMeta, abstractmethod, abstractproperty
+from collections import Counter
+from overrides import overrides
+import string
+
+from ..utils import Finalisable
+from .lambdacalculus import (Variable, Abstraction, Application,
+                             NotReduceable)
+
+class NamelessTerm(Finalisable, metaclass=ABCMeta):
+    kind = 'term'
+
+    @abstractproperty
+    def loose(self):
+        """One more than the largest index that is free in the term.
+
+        Zero iff the term has no free indices (is locally closed).
+
+        """
+        NotImplemented
+
+    @abstractproperty
+    def is_redex(self):
+        """Checks if the term can be reduced by beta-reduction."""
+        NotImplemented
+
+    @abstractmethod
+    def shift(self, d, cutoff=0):
+        """Adds ``d`` to every index that is free above ``cutoff``."""
+        NotImplemented
+
+    @abstractmethod
+    def _instantiate(self, term, depth):
+        """Replaces index ``depth`` with ``term`` and lowers the others.
+
+        This is substitution for the variable bound by a removed binder:
+        ``term`` is shifted up by ``depth`` where it is inserted, indices
+        above ``depth`` are shifted down by one, and subterms without an
+        occurence of ``depth`` are shared.
+
+        """
+        NotImplemented
+
+    def instantiate(self, term):
+        return self._instantiate(term, 0)
+
+    @abstractmethod
+    def reduce(self):
+        """Performs 1 step of beta reduction.
+
+        Redexes are chosen in the same (leftmost outermost) order as
+        ``LambdaTerm.reduce``.
+
+        Raises:
+            NotReduceable if the term is not a redex.
+
+        """
+        NotImplemented
+
+    def normalize(self, max_steps=None):
+        """Reduces the term until it is in normal form.
+
+        Args:
+            max_steps (Optional[int]): Stop after this many steps, even if
+                the term is still a redex.
+
+        """
+        term = self
+        steps = 0
+        while term.is_redex and (max_steps is None or steps < max_steps):
+            term = term.reduce()
+            steps += 1
+        return term
+
+    @abstractmethod
+    def __eq__(self, other):
+        """True iff two terms are equal, ignoring binder names."""
+        NotImplemented
+
+    @abstractmethod
+    def __hash__(self):
+        NotImplemented
+
+class Index(NamelessTerm):
+    kind = 'index'
+
+    def __init__(self, index):
+        assert index >= 0
+        self.index = index
+        self._hash = hash((self.kind, index))
+        self.finalise()
+
+    @property
+    @overrides
+    def loose(self):
+        return self.index + 1
+
+    @property
+    @overrides
+    def is_redex(self):
+        return False
+
+    @overrides
+    def shift(self, d, cutoff=0):
+        return Index(self.index + d) if self.index >= cutoff else self
+
+    @overrides
+    def _instantiate(self, term, depth):
+        if self.index == depth:
+            return term.shift(depth)
+        elif self.index > depth:
+            return Index(self.index - 1)
+        else:
+            return self
+
+    @overrides
+    def reduce(self):
+        raise NotReduceable(self)
+
+    @overrides
+    def __eq__(self, other):
+        return other.kind == self.kind and other.index == self.index
+
+    @overrides
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return 'Index({!r})'.format(self.index)
+
+    def __str__(self):
+        return str(self.index)
+
+class Free(NamelessTerm):
+    kind = 'free'
+
+    def __init__(self, symbol):
+        assert isinstance(symbol, str)
+        self.symbol = symbol
+        self._hash = hash((self.kind, symbol))
+        self.finalise()
+
+    @property
+    @overrides
+    def loose(self):
+        return 0
+
+    @property
+    @overrides
+    def is_redex(self):
+        return False
+
+    @overrides
+    def shift(self, d, cutoff=0):
+        return self
+
+    @overrides
+    def _instantiate(self, term, depth):
+        return self
+
+    @overrides
+    def reduce(self):
+        raise NotReduceable(self)
+
+    @overrides
+    def __eq__(self, other):
+        return other.kind == self.kind and other.symbol == self.symbol
+
+    @overrides
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return 'Free({!r})'.format(self.symbol)
+
+    def __str__(self):
+        return self.symbol
+
+class NamelessAbstraction(NamelessTerm):
+    kind = 'abstraction'
+
+    def __init__(self, term, hint=None):
+        """
+        Args:
+            term (NamelessTerm): The body of the abstraction.
+            hint (Optional[str]): The name the binder had, used when
+                converting back to a named term. Ignored by ``==``.
+
+        """
+        self.term = term
+        self.hint = hint
+        self._loose = max(term.loose - 1, 0)
+        self._is_redex = term.is_redex
+        self._hash = hash((self.kind, term._hash))
+        self.finalise()
+
+    @property
+    @overrides
+    def loose(self):
+        return self._loose
+
+    @property
+    @overrides
+    def is_redex(self):
+        return self._is_redex
+
+    @overrides
+    def shift(self, d, cutoff=0):
+        return _shift(self, d, cutoff)
+
+    @overrides
+    def _instantiate(self, term, depth):
+        return _instantiate(self, term, depth)
+
+    def apply(self, term):
+        return self.term.instantiate(term)
+
+    @overrides
+    def reduce(self):
+        return _reduce(self)
+
+    @overrides
+    def __eq__(self, other):
+        return self is other or _equal(self, other)
+
+    @overrides
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return _repr(self)
+
+    def __str__(self):
+        return _str(self)
+
+class NamelessApplication(NamelessTerm):
+    kind = 'application'
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self._loose = max(left.loose, right.loose)
+        self._is_redex = (left.kind == 'abstraction' or
+                          left.is_redex or right.is_redex)
+        self._hash = hash((self.kind, left._hash, right._hash))
+        self.finalise()
+
+    @property
+    @overrides
+    def loose(self):
+        return self._loose
+
+    @property
+    @overrides
+    def is_redex(self):
+        return self._is_redex
+
+    @overrides
+    def shift(self, d, cutoff=0):
+        return _shift(self, d, cutoff)
+
+    @overrides
+    def _instantiate(self, term, depth):
+        return _instantiate(self, term, depth)
+
+    @overrides
+    def reduce(self):
+        return _reduce(self)
+
+    @overrides
+    def __eq__(self, other):
+        return self is other or _equal(self, other)
+
+    @overrides
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return _repr(self)
+
+    def __str__(self):
+        return _str(self)
+
+# Nameless terms are as deep as the named terms they come from, so the
+# operations on compound terms below work through explicit stacks.
+
+def _equal(a, b):
+    stack = [(a, b)]
+    while stack:
+        a, b = stack.pop()
+        if a is b:
+            continue
+        if b.kind != a.kind or hash(b) != a._hash:
+            return False
+        if a.kind == 'index':
+            if a.index != b.index:
+                return False
+        elif a.kind == 'free':
+            if a.symbol != b.symbol:
+                return False
+        elif a.kind == 'abstraction':
+            stack.append((a.term, b.term))
+        else:
+            stack.append((a.right, b.right))
+            stack.append((a.left, b.left))
+    return True
+
+def _str(term):
+    out = []
+    stack = [term]
+    while stack:
+        term = stack.pop()
+        if isinstance(term, str):
+            out.append(term)
+        elif term.kind == 'abstraction':
+            out.append('\\.')
+            stack.append(term.term)
+        elif term.kind == 'application':
+            if term.right.kind in ['application', 'abstraction']:
+                stack.extend([')', term.right, '('])
+            else:
+                stack.append(term.right)
+            stack.append(' ')
+            if term.left.kind == 'abstraction':
+                stack.extend([')', term.left, '('])
+            else:
+                stack.append(term.left)
+        else:
+            out.append(str(term))
+    return ''.join(out)
+
+def _repr(term):
+    out = []
+    stack = [term]
+    while stack:
+        term = stack.pop()
+        if isinstance(term, str):
+            out.append(term)
+        elif term.kind == 'abstraction':
+            out.append('NamelessAbstraction(')
+            stack.extend([', hint={!r})'.format(term.hint), term.term])
+        elif term.kind == 'application':
+            out.append('NamelessApplication(')
+            stack.extend([')', term.right, ', ', term.left])
+        else:
+            out.append(repr(term))
+    return ''.join(out)
+
+def _rebuild(term, children):
+    """A copy of ``term`` with new children, or ``term`` if unchanged."""
+    if term.kind == 'abstraction':
+        body, = children
+        if body is term.term:
+            return term
+        return NamelessAbstraction(body, term.hint)
+    else:
+        left, right = children
+        if left is term.left and right is term.right:
+            return term
+        return NamelessApplication(left, right)
+
+def _shift(term, d, cutoff):
+    results = []
+    stack = [(term, cutoff, False)]
+    while stack:
+        term, cutoff, expanded = stack.pop()
+        if expanded:
+            if term.kind == 'abstraction':
+                results.append(_rebuild(term, (results.pop(),)))
+            else:
+                right = results.pop()
+                results.append(_rebuild(term, (results.pop(), right)))
+        elif term.loose <= cutoff:
+            results.append(term)
+        elif term.kind == 'index':
+            results.append(Index(term.index + d))
+        elif term.kind == 'abstraction':
+            stack.append((term, cutoff, True))
+            stack.append((term.term, cutoff + 1, False))
+        else:
+            stack.append((term, cutoff, True))
+            stack.append((term.right, cutoff, False))
+            stack.append((term.left, cutoff, False))
+    return results.pop()
+
+def _instantiate(term, arg, depth):
+    # copies of arg shifted for each depth it is inserted at
+    shifted = {}
+    results = []
+    stack = [(term, depth, False)]
+    while stack:
+        term, depth, expanded = stack.pop()
+        if expanded:
+            if term.kind == 'abstraction':
+                results.append(_rebuild(term, (results.pop(),)))
+            else:
+                right = results.pop()
+                results.append(_rebuild(term, (results.pop(), right)))
+        elif term.loose <= depth:
+            results.append(term)
+        elif term.kind == 'index':
+            if term.index == depth:
+                if depth not in shifted:
+                    shifted[depth] = arg.shift(depth)
+                results.append(shifted[depth])
+            else:
+                results.append(Index(term.index - 1))
+        elif term.kind == 'abstraction':
+            stack.append((term, depth, True))
+            stack.append((term.term, depth + 1, False))
+        else:
+            stack.append((term, depth, True))
+            stack.append((term.right, depth, False))
+            stack.append((term.left, depth, False))
+    return results.pop()
+
+def _reduce(term):
+    """Performs 1 step of beta reduction, see ``NamelessTerm.reduce``."""
+    if not term.is_redex:
+        raise NotReduceable(term)
+    path = []
+    while not (term.kind == 'application' and
+               term.left.kind == 'abstraction'):
+        path.append(term)
+        if term.kind == 'abstraction':
+            term = term.term
+        elif term.left.is_redex:
+            term = term.left
+        else:
+            term = term.right
+    term = term.left.apply(term.right)
+    for parent in reversed(path):
+        if parent.kind == 'abstraction':
+            term = NamelessAbstraction(term, parent.hint)
+        elif parent.left.is_redex:
+            term = NamelessApplication(term, parent.right)
+        else:
+            term = NamelessApplication(parent.left, term)
+    return term
+
+def to_debruijn(term):
+    """Converts a named ``LambdaTerm`` to a nameless term."""
+    results = []
+    depths = {}
+    stack = [(term, 0, False)]
+    while stack:
+        term, depth, expanded = stack.pop()
+        if term.kind == 'variable':
+            if term in depths:
+                results.append(Index(depth - depths[term] - 1))
+            else:
+                results.append(Free(term.symbol))
+        elif term.kind == 'abstraction':
+            if expanded:
+                results.append(NamelessAbstraction(results.pop(),
+                                                   term.binds.symbol))
+            else:
+                # as in alpha_key, Barendregt's convention means no other
+                # binder of the variable is visited before its occurences
+                depths[term.binds] = depth
+                stack.append((term, depth, True))
+                stack.append((term.term, depth + 1, False))
+        elif term.kind == 'application':
+            if expanded:
+                right = results.pop()
+                results.append(NamelessApplication(results.pop(), right))
+            else:
+                stack.append((term, depth, True))
+                stack.append((term.right, depth, False))
+                stack.append((term.left, depth, False))
+        else:
+            raise Exception('no case found for {!r}'.format(term))
+    return results.pop()
+
+def alpha_key(term):
+    """A key that is the same for exactly the alpha equivalent terms.
+
+    The key is the term in prefix order with bound variables replaced by
+    de Bruijn indices, as a flat tuple, so hashing and comparing keys
+    takes no recursion. Free variables keep their names.
+
+    """
+    key = []
+    depths = {}
+    stack = [(term, 0)]
+    while stack:
+        term, depth = stack.pop()
+        if term.kind == 'variable':
+            if term in depths:
+                key.append(depth - depths[term] - 1)
+            else:
+                key.append((term.symbol,))
+        elif term.kind == 'abstraction':
+            # by Barendregt's convention, no other binder of the same
+            # variable is visited before its occurences below this one
+            depths[term.binds] = depth
+            key.append('λ')
+            stack.append((term.term, depth + 1))
+        elif term.kind == 'application':
+            key.append('@')
+            stack.append((term.right, depth))
+            stack.append((term.left, depth))
+        else:
+            raise Exception('no case found for {!r}'.format(term))
+    return tuple(key)
+
+def free_symbols(term):
+    """The names of the free variables of a nameless term."""
+    symbols = set()
+    stack = [term]
+    while stack:
+        term = stack.pop()
+        if term.kind == 'free':
+            symbols.add(term.symbol)
+        elif term.kind == 'abstraction':
+            stack.append(term.term)
+        elif term.kind == 'application':
+            stack.append(term.right)
+            stack.append(term.left)
+    return symbols
+
+def from_debruijn(term):
+    """Converts a nameless term to a named ``LambdaTerm``.
+
+    Binders keep their hint wherever that respects Barendregt's
+    convention, so ``from_debruijn(to_debruijn(t)) == t``. Otherwise a
+    name is picked that clashes with neither the free variables nor the
+    enclosing binders.
+
+    """
+    return _NameChooser(free_symbols(term)).named(term, [])
+
+class _NameChooser:
+    def __init__(self, free):
+        self.free = free
+        self.counter = -1
+
+    def choose(self, hint, enclosing):
+        taken = lambda s: s in self.free or s in enclosing
+        if hint is not None and not taken(hint):
+            return hint
+        for letter in string.ascii_lowercase:
+            if not taken(letter):
+                return letter
+        while True:
+            self.counter += 1
+            symbol = 'x_{:02d}'.format(self.counter)
+            if not taken(symbol):
+                return symbol
+
+    def named(self, term, names):
+        """Names ``term`` under the enclosing binders ``names``.
+
+        ``names`` lists the symbols of the enclosing binders, innermost
+        last; it is extended and restored as binders are entered and left.
+
+        """
+        enclosing = Counter(names)
+        results = []
+        stack = [(term, False)]
+        while stack:
+            term, expanded = stack.pop()
+            if term.kind == 'index':
+                if term.index >= len(names):
+                    raise ValueError(
+                        'index {} is not bound'.format(term.index)
+                    )
+                results.append(Variable(names[-term.index - 1]))
+            elif term.kind == 'free':
+                results.append(Variable(term.symbol))
+            elif term.kind == 'abstraction':
+                if expanded:
+                    symbol = names.pop()
+                    enclosing[symbol] -= 1
+                    if not enclosing[symbol]:
+                        del enclosing[symbol]
+                    results.append(Abstraction(symbol, results.pop()))
+                else:
+                    symbol = self.choose(term.hint, enclosing)
+                    names.append(symbol)
+                    enclosing[symbol] += 1
+                    stack.append((term, True))
+                    stack.append((term.term, False))
+            elif term.kind == 'application':
+                if expanded:
+                    right = results.pop()
+                    results.append(Application(results.pop(), right))
+                else:
+                    stack.append((term, True))
+                    stack.append((term.right, False))
+                    stack.append((term.left, False))
+            else:
+                raise Exception('no case found for {!r}'.format(term))
+        return results.pop()
+
+def normalize(term, max_steps=None):
+    """Normalizes a named ``LambdaTerm`` by way of de Bruijn indices."""
+    return from_debruijn(to_debruijn(term).normalize(max_steps))
@@ -0,0 +1,134 @@
+import unittest
+from .lambdacalculus import *
+from .lambdacalculus_tests import S, K, FALSE, ONE, TWO, THREE, ADD, church
+from .debruijn import *
+
+def named_normal_form(term):
+    while term.is_redex:
+        term = term.reduce()
+    return term
+
+class ConversionTestCase(unittest.TestCase):
+    def testToDeBruijn(self):
+        self.assertEqual(to_debruijn(Variable('x')), Free('x'))
+        self.assertEqual(
+            to_debruijn(K),
+            NamelessAbstraction(NamelessAbstraction(Index(1)))
+        )
+        self.assertEqual(
+            to_debruijn(Abstraction('x', Application(Variable('x'),
+                                                     Variable('y')))),
+            NamelessAbstraction(NamelessApplication(Index(0), Free('y')))
+        )
+
+    def testRoundTrip(self):
+        for term in (S, K, FALSE, TWO, ADD, Variable('x'),
+                     Application(Abstraction('x', Variable('x')),
+                                 Variable('y'))):
+            self.assertEqual(from_debruijn(to_debruijn(term)), term)
+
+    def testAlphaInvariance(self):
+        self.assertEqual(to_debruijn(K), to_debruijn(
+            Abstraction('a', Abstraction('b', Variable('a')))
+        ))
+        self.assertEqual(hash(to_debruijn(K)), hash(to_debruijn(
+            Abstraction('a', Abstraction('b', Variable('a')))
+        )))
+        self.assertNotEqual(to_debruijn(K), to_debruijn(FALSE))
+
+    def testNameClash(self):
+        # \y.(\x.x)y with the hint of the inner binder clashing
+        term = NamelessAbstraction(
+            NamelessApplication(
+                NamelessAbstraction(Free('x'), 'x'),
+                Index(0)
+            ),
+            'x'
+        )
+        named = from_debruijn(term)
+        self.assertEqual(to_debruijn(named), term)
+        self.assertNotIn(named.binds, named.free_variables)
+
+    def testUnbound(self):
+        self.assertRaises(ValueError, lambda: from_debruijn(Index(0)))
+
+    def testDeep(self):
+        depth = 20000
+        nameless = to_debruijn(church(depth))
+        self.assertEqual(nameless.loose, 0)
+        self.assertEqual(free_symbols(nameless), set())
+        self.assertEqual(from_debruijn(nameless), church(depth))
+
+class AlphaKeyTestCase(unittest.TestCase):
+    def testAlphaKey(self):
+        from .lambdacalculus_tests import church
+        self.assertEqual(alpha_key(Abstraction('x', Variable('x'))),
+                         alpha_key(Abstraction('y', Variable('y'))))
+        self.assertNotEqual(alpha_key(Abstraction('x', Variable('z'))),
+                            alpha_key(Abstraction('y', Variable('w'))))
+        self.assertNotEqual(alpha_key(Abstraction('x', Variable('x'))),
+                            alpha_key(Abstraction('x', Variable('z'))))
+        # the same binder in disjoint subterms
+        I = Abstraction('x', Variable('x'))
+        K = Abstraction('x', Abstraction('y', Variable('x')))
+        self.assertEqual(alpha_key(Application(I, K)),
+                         ('@', 'λ', 0, 'λ', 'λ', 1))
+        self.assertEqual(len(alpha_key(church(5000))), 2 * 5000 + 3)
+
+class NamelessReductionTestCase(unittest.TestCase):
+    def testInstantiate(self):
+        # (\.\.1 0) applied to a free variable
+        body = NamelessAbstraction(NamelessApplication(Index(1), Index(0)))
+        self.assertEqual(
+            body.instantiate(Free('y')),
+            NamelessAbstraction(NamelessApplication(Free('y'), Index(0)))
+        )
+        # the argument is shifted under binders
+        self.assertEqual(
+            body.instantiate(Index(3)),
+            NamelessAbstraction(NamelessApplication(Index(4), Index(0)))
+        )
+
+    def testSameOrderAsNamed(self):
+        term = Application(Application(ADD, ONE), TWO)
+        nameless = to_debruijn(term)
+        while term.is_redex:
+            self.assertTrue(nameless.is_redex)
+            term, nameless = term.reduce(), nameless.reduce()
+            self.assertEqual(to_debruijn(term), nameless)
+        self.assertFalse(nameless.is_redex)
+        self.assertRaises(NotReduceable, nameless.reduce)
+
+    def testNormalize(self):
+        self.assertTrue(normalize(Application(S, K)).alpha_eq(FALSE))
+        self.assertTrue(normalize(
+            Application(Application(ADD, ONE), TWO)
+        ).alpha_eq(THREE))
+        term = Application(Application(ADD, TWO), THREE)
+        self.assertTrue(
+            normalize(term).alpha_eq(named_normal_form(term))
+        )
+
+    def testMaxSteps(self):
+        term = to_debruijn(Application(Application(ADD, ONE), TWO))
+        self.assertEqual(term.normalize(max_steps=1), term.reduce())
+        self.assertEqual(term.normalize(max_steps=0), term)
+
+    def teststr(self):
+        self.assertEqual(str(to_debruijn(K)), r'\.\.1')
+        self.assertEqual(
+            str(to_debruijn(Application(Variable('f'), K))),
+            r'f (\.\.1)'
+        )
+
+    def testDeep(self):
+        depth = 5000
+        nameless = to_debruijn(church(depth))
+        self.assertEqual(nameless, to_debruijn(church(depth)))
+        self.assertNotEqual(nameless, to_debruijn(church(depth - 1)))
+        self.assertEqual(len(str(nameless)), 4 * depth + 3)
+        self.assertEqual(repr(nameless).count('NamelessApplication('), depth)
+        self.assertIs(nameless.shift(1), nameless)
+        self.assertEqual(nameless.term.term.shift(1).loose, 3)
+        term = Application(Application(ADD, church(depth)), church(depth))
+        self.assertTrue(normalize(term).alpha_eq(church(2 * depth)))
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""Normal order reduction with explicit substitutions.
+
+Beta reduction in ``LambdaTerm.apply`` substitutes the argument into the
+whole body straight away, even into parts of the body that are thrown
+away a few steps later (think of ``K`` or ``FALSE`` selecting one of
+their arguments). Here reduction works on de Bruijn terms in the λυ
+calculus instead, where a substitution is a term of its own::
+
+    (λa) b       →  a[b/]
+    (a b)[s]     →  a[s] b[s]
+    (λa)[s]      →  λ(a[⇑s])
+    0[b/]        →  b          (n+1)[b/]    →  n
+    0[⇑s]        →  0          (n+1)[⇑s]    →  n[s][↑]
+    n[↑]         →  n+1
+
+A closure ``a[s]`` is only pushed into ``a`` when reduction needs to
+see the head of the term, or at the very end when the normal form is
+read back, so a substitution into a discarded subterm costs nothing.
+Closures around locally closed terms are never built at all, since no
+substitution can change them.
+
+"""
+from .debruijn import (to_debruijn, from_debruijn, NamelessTerm, Index,
+                       NamelessAbstraction, NamelessApplication)
+
+class _Shift:
+    """The substitution ``↑``, adding one to every index."""
+    grow = 1
+    base = 0
+
+SHIFT = _Shift()
+
+class _Slash:
+    """The substitution ``b/``, replacing index 0 by ``term``."""
+    grow = -1
+
+    def __init__(self, term):
+        self.term = term
+        self.base = term.loose
+
+class _Lift:
+    """The substitution ``⇑s``, which is ``s`` under one more binder."""
+    def __init__(self, sub):
+        self.sub = sub
+        self.grow = sub.grow
+        self.base = sub.base + 1
+
+# For a term ``a`` with ``a.loose > 0``, ``a[s].loose`` is at most
+# ``max(a.loose + s.grow, s.base)``.
+
+class _Closure:
+    """The term ``a[s]``: ``term`` with ``sub`` still to be applied."""
+    kind = 'closure'
+
+    def __init__(self, term, sub):
+        self.term = term
+        self.sub = sub
+        self.loose = max(term.loose + sub.grow, sub.base)
+
+class _Abstraction:
+    kind = 'abstraction'
+
+    def __init__(self, term, hint):
+        self.term = term
+        self.hint = hint
+        self.loose = max(term.loose - 1, 0)
+
+class _Application:
+    kind = 'application'
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.loose = max(left.loose, right.loose)
+
+def _close(term, subs):
+    """Wraps ``term`` in closures, from the last substitution to the first."""
+    for sub in reversed(subs):
+        if not term.loose:
+            break
+        term = _Closure(term, sub)
+    return term
+
+_ABSTRACTION = 'abstraction'
+_APPLICATION = 'application'
+
+class Reducer:
+    """Normalizes nameless terms with explicit substitutions.
+
+    Terms are ``NamelessTerm``s; subterms the reducer has not touched are
+    shared with the input, and those without a redex are not rebuilt.
+
+    Attributes:
+        beta_steps (int): The number of beta steps taken so far.
+        substitution_steps (int): The number of times a substitution has
+            been pushed one step further into a term.
+
+    """
+    def __init__(self):
+        self.beta_steps = 0
+        self.substitution_steps = 0
+
+    def push(self, term):
+        """Pushes the closures at the root of ``term`` down one level.
+
+        Returns:
+            A term that is not a closure, equal to ``term`` in λυ.
+
+        """
+        subs = []
+        while True:
+            if subs and not term.loose:
+                return term
+            kind = term.kind
+            if kind == 'closure':
+                # term[s] under the pending subs: s comes first
+                subs.append(term.sub)
+                term = term.term
+                continue
+            if not subs or kind == 'free':
+                return term
+            self.substitution_steps += 1
+            if kind == 'index':
+                sub, n = subs.pop(), term.index
+                if sub is SHIFT:
+                    term = Index(n + 1)
+                elif isinstance(sub, _Slash):
+                    term = sub.term if n == 0 else Index(n - 1)
+                elif n > 0:
+                    subs.append(SHIFT)
+                    subs.append(sub.sub)
+                    term = Index(n - 1)
+            elif kind == 'abstraction':
+                return _Abstraction(_close(term.term,
+                                           [_Lift(sub) for sub in subs]),
+                                    term.hint)
+            else:
+                return _Application(_close(term.left, subs),
+                                    _close(term.right, subs))
+
+    def whnf(self, term):
+        """Reduces ``term`` to weak head normal form.
+
+        Returns:
+            (Tuple[term, List[term]]) The head, which is an abstraction
+            (and then there are no arguments), an index or a free
+            variable, and the arguments it is applied to in order.
+
+        """
+        spine = []
+        while True:
+            kind = term.kind
+            if kind == 'closure':
+                term = self.push(term)
+            elif kind == 'application':
+                spine.append(term.right)
+                term = term.left
+            elif kind == 'abstraction' and spine:
+                self.beta_steps += 1
+                term = _close(term.term, [_Slash(spine.pop())])
+            else:
+                spine.reverse()
+                return term, spine
+
+    def normalize(self, term):
+        """Computes the beta normal form of a ``NamelessTerm``.
+
+        Diverges if the term has no normal form.
+
+        """
+        work, done = [term], []
+        while work:
+            item = work.pop()
+            if isinstance(item, tuple):
+                if item[0] is _ABSTRACTION:
+                    done.append(NamelessAbstraction(done.pop(), item[1]))
+                else:
+                    _, result, n = item
+                    if n:
+                        for arg in done[-n:]:
+                            result = NamelessApplication(result, arg)
+                        del done[-n:]
+                    done.append(result)
+            elif isinstance(item, NamelessTerm) and not item.is_redex:
+                done.append(item)
+            else:
+                head, args = self.whnf(item)
+                if head.kind == 'abstraction':
+                    work.append((_ABSTRACTION, head.hint))
+                    work.append(head.term)
+                else:
+                    work.append((_APPLICATION, head, len(args)))
+                    work.extend(reversed(args))
+        return done.pop()
+
+def normalize(term):
+    """Computes the beta normal form of a ``LambdaTerm``.
+
+    Diverges if the term has no normal form.
+
+    """
+    return from_debruijn(Reducer().normalize(to_debruijn(term)))
@@ -0,0 +1,68 @@
+import unittest
+from .lambdacalculus import *
+from .lambdacalculus_tests import S, K, FALSE, ONE, TWO, THREE, ADD, church
+from .normalization import normalize as rewrite
+from .normalization_tests import I, OMEGA
+from .debruijn import to_debruijn
+from .explicit import *
+
+class ExplicitSubstitutionTestCase(unittest.TestCase):
+    def assertSameNormalForm(self, term):
+        self.assertEqual(to_debruijn(normalize(term)),
+                         to_debruijn(rewrite(term)))
+
+    def testClosed(self):
+        self.assertTrue(normalize(Application(S, K)).alpha_eq(FALSE))
+        self.assertTrue(
+            normalize(Application(Application(ADD, ONE), TWO)).alpha_eq(THREE)
+        )
+        self.assertSameNormalForm(Application(Application(ADD, THREE), THREE))
+        self.assertSameNormalForm(Application(THREE, TWO))
+        self.assertSameNormalForm(Application(TWO, THREE))
+
+    def testOpen(self):
+        term = Application(Application(THREE, Variable('g')), Variable('v'))
+        self.assertEqual(normalize(term), rewrite(term))
+        self.assertSameNormalForm(Abstraction('w',
+            Application(Variable('w'), Application(I, Variable('v')))
+        ))
+        # the argument is open under the binders it is substituted under
+        self.assertSameNormalForm(Abstraction('a', Abstraction('b',
+            Application(Application(S, Application(K, Variable('a'))),
+                        Application(Variable('b'), Variable('a')))
+        )))
+        self.assertSameNormalForm(Abstraction('z', Application(
+            Application(TWO, Abstraction('y', Application(Variable('z'),
+                                                          Variable('y')))),
+            Variable('z')
+        )))
+
+    def testNormalForm(self):
+        self.assertEqual(normalize(S), S)
+        self.assertEqual(normalize(Variable('x')), Variable('x'))
+        nameless = to_debruijn(S)
+        reducer = Reducer()
+        self.assertIs(reducer.normalize(nameless), nameless)
+        self.assertEqual(reducer.beta_steps, 0)
+
+    def testLazy(self):
+        term = Application(Application(K, Variable('v')), OMEGA)
+        self.assertEqual(normalize(term), Variable('v'))
+
+    def testDiscardedArgument(self):
+        # the argument K throws away is never substituted into
+        def steps(n):
+            term = Abstraction('w', Application(
+                Application(K, Variable('w')),
+                Application(church(n), Variable('w'))
+            ))
+            reducer = Reducer()
+            reducer.normalize(to_debruijn(term))
+            return reducer.beta_steps, reducer.substitution_steps
+
+        self.assertEqual(steps(2), steps(50))
+
+    def testBackend(self):
+        term = Application(Application(ADD, TWO), THREE)
+        self.assertEqual(to_debruijn(rewrite(term, backend='explicit')),
+                         to_debruijn(rewrite(term)))
@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""Call-by-need graph reduction.
+
+``Abstraction.apply`` copies the argument into every occurence of the
+bound variable, so an argument that is still a redex gets reduced once
+per copy. Here terms are graphs instead: beta reduction makes every
+occurence of the bound variable point at the one argument node, and a
+reduced application is overwritten with (an indirection to) its result,
+so a shared argument is reduced at most once, wherever it occurs.
+
+Only the parts of an abstraction's body that mention the bound variable
+are copied when it is applied; everything else is shared as well.
+
+"""
+from .debruijn import (from_debruijn, Index, Free, NamelessAbstraction,
+                       NamelessApplication)
+
+class Node:
+    """A mutable node of a term graph.
+
+    Depending on ``kind``, a node has these attributes:
+
+    - ``'variable'``: ``binder``, the abstraction node binding it (or
+      ``None`` if it is free) and ``symbol``.
+    - ``'abstraction'``: ``binds``, the symbol of the bound variable,
+      and ``body``.
+    - ``'application'``: ``left`` and ``right``.
+    - ``'indirection'``: ``target``, the node it was reduced to.
+
+    ``free`` is a superset of the abstraction nodes whose variables occur
+    free below this node (reduction can only remove occurences).
+
+    """
+    def __init__(self, kind, **fields):
+        self.kind = kind
+        self.__dict__.update(fields)
+
+    @classmethod
+    def variable(cls, binder, symbol):
+        free = frozenset() if binder is None else frozenset((binder,))
+        return cls('variable', binder=binder, symbol=symbol, free=free)
+
+    @classmethod
+    def abstraction(cls, binds, body=None):
+        node = cls('abstraction', binds=binds, body=body)
+        if body is not None:
+            node.free = body.free - {node}
+        return node
+
+    @classmethod
+    def application(cls, left, right):
+        return cls('application', left=left, right=right,
+                   free=left.free | right.free)
+
+    def become(self, target):
+        """Overwrites this node with an indirection to ``target``."""
+        self.kind = 'indirection'
+        self.target = target
+        self.free = target.free
+        for name in ('left', 'right'):
+            self.__dict__.pop(name, None)
+
+def deref(node):
+    while node.kind == 'indirection':
+        node = node.target
+    return node
+
+def _from_term(term, binders):
+    results = []
+    stack = [(term, False)]
+    while stack:
+        term, expanded = stack.pop()
+        if term.kind == 'variable':
+            results.append(Node.variable(binders.get(term), term.symbol))
+        elif term.kind == 'abstraction':
+            if expanded:
+                # by Barendregt's convention, the binder is still ours
+                node = binders[term.binds]
+                node.body = results.pop()
+                node.free = node.body.free - {node}
+                results.append(node)
+            else:
+                binders[term.binds] = Node.abstraction(term.binds.symbol)
+                stack.append((term, True))
+                stack.append((term.term, False))
+        elif term.kind == 'application':
+            if expanded:
+                right = results.pop()
+                results.append(Node.application(results.pop(), right))
+            else:
+                stack.append((term, True))
+                stack.append((term.right, False))
+                stack.append((term.left, False))
+        else:
+            raise Exception('no case found for {!r}'.format(term))
+    return results.pop()
+
+def _instantiate(node, mapping, memo):
+    """Copies the parts of ``node`` that mention a binder in ``mapping``.
+
+    Variables bound by a key of ``mapping`` are replaced by the node it
+    maps to. Everything else is shared with the original.
+
+    """
+    mapping = dict(mapping)
+    results = []
+    stack = [(node, None)]
+    while stack:
+        node, res = stack.pop()
+        if res is not None:
+            # every child of node has been copied
+            if node.kind == 'abstraction':
+                del mapping[node]
+                res.body = results.pop()
+                res.free = res.body.free - {res}
+            else:
+                right = results.pop()
+                res = Node.application(results.pop(), right)
+            memo[id(node)] = res
+            results.append(res)
+            continue
+        node = deref(node)
+        if node.free.isdisjoint(mapping):
+            results.append(node)
+        elif id(node) in memo:
+            results.append(memo[id(node)])
+        elif node.kind == 'variable':
+            res = memo[id(node)] = mapping[node.binder]
+            results.append(res)
+        elif node.kind == 'abstraction':
+            res = Node.abstraction(node.binds)
+            mapping[node] = Node.variable(res, node.binds)
+            stack.append((node, res))
+            stack.append((node.body, None))
+        else:
+            stack.append((node, True))
+            stack.append((node.right, None))
+            stack.append((node.left, None))
+    return results.pop()
+
+class _OutOfSteps(Exception):
+    pass
+
+class Graph:
+    """A lambda term as a graph, reduced with sharing.
+
+    Attributes:
+        root (Node): The node of the whole term.
+        beta_steps (int): The number of beta reductions performed.
+
+    """
+    def __init__(self, term):
+        self.root = _from_term(term, {})
+        self.beta_steps = 0
+
+    def _whnf(self, node, max_steps):
+        """Reduces ``node`` to weak head normal form in place.
+
+        Returns:
+            (Tuple[Node, List[Node]]) The head of the result and the
+            arguments it is applied to.
+
+        """
+        spine = []
+        node = deref(node)
+        while True:
+            if node.kind == 'application':
+                spine.append(node)
+                node = deref(node.left)
+            elif node.kind == 'abstraction' and spine:
+                if max_steps is not None and self.beta_steps >= max_steps:
+                    raise _OutOfSteps
+                app = spine.pop()
+                app.become(_instantiate(node.body, {node: app.right}, {}))
+                self.beta_steps += 1
+                node = deref(app)
+            else:
+                return node, [app.right for app in reversed(spine)]
+
+    def normalize(self, max_steps=None):
+        """Reduces the graph to beta normal form in place.
+
+        Args:
+            max_steps (Optional[int]): Stop once this many beta steps have
+                been performed in total.
+
+        Returns:
+            (bool) ``True`` iff the graph is now in normal form.
+
+        """
+        seen = {}
+        todo = [self.root]
+        try:
+            while todo:
+                node = todo.pop()
+                head, args = self._whnf(node, max_steps)
+                node = deref(node)
+                if id(node) in seen:
+                    continue
+                seen[id(node)] = node
+                todo.extend(reversed(args))
+                if head.kind == 'abstraction':
+                    todo.append(head.body)
+        except _OutOfSteps:
+            return False
+        return True
+
+    def to_nameless(self):
+        """Unshares the graph into a nameless term.
+
+        Closed subgraphs are converted once and shared between their
+        occurences, as nameless terms are immutable.
+
+        """
+        return _to_nameless(self.root, 0, {}, {})
+
+    def to_term(self):
+        """Unshares the graph into an ordinary ``LambdaTerm`` tree."""
+        return from_debruijn(self.to_nameless())
+
+    def to_dag(self):
+        """Exports the graph with its sharing intact.
+
+        Returns:
+            (List[tuple]) One entry per node, the root first. Entries
+            refer to other nodes by their position in the list:
+            ``('free', symbol)``, ``('variable', binder)``,
+            ``('abstraction', symbol, body)`` or
+            ``('application', left, right)``.
+
+        """
+        entries, index = [], {}
+        stack = [(self.root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            node = deref(node)
+            if expanded:
+                # the children were numbered after this node
+                i = index[id(node)]
+                if node.kind == 'abstraction':
+                    entries[i] = ('abstraction', node.binds,
+                                  index[id(deref(node.body))])
+                else:
+                    entries[i] = ('application', index[id(deref(node.left))],
+                                  index[id(deref(node.right))])
+                continue
+            if id(node) in index:
+                continue
+            i = index[id(node)] = len(entries)
+            entries.append(None)
+            if node.kind == 'variable':
+                if node.binder is None:
+                    entries[i] = ('free', node.symbol)
+                else:
+                    entries[i] = ('variable', index[id(node.binder)])
+            elif node.kind == 'abstraction':
+                stack.append((node, True))
+                stack.append((node.body, False))
+            else:
+                stack.append((node, True))
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+        return entries
+
+def _to_nameless(node, depth, levels, memo):
+    results = []
+    stack = [(node, depth, False)]
+    while stack:
+        node, depth, expanded = stack.pop()
+        if expanded:
+            if node.kind == 'abstraction':
+                del levels[node]
+                res = NamelessAbstraction(results.pop(), node.binds)
+            else:
+                right = results.pop()
+                res = NamelessApplication(results.pop(), right)
+            if not node.free:
+                memo[id(node)] = res
+            results.append(res)
+            continue
+        node = deref(node)
+        if not node.free and id(node) in memo:
+            results.append(memo[id(node)])
+        elif node.kind == 'variable':
+            if node.binder is None:
+                res = Free(node.symbol)
+            else:
+                res = Index(depth - levels[node.binder] - 1)
+            if not node.free:
+                memo[id(node)] = res
+            results.append(res)
+        elif node.kind == 'abstraction':
+            levels[node] = depth
+            stack.append((node, depth, True))
+            stack.append((node.body, depth + 1, False))
+        else:
+            stack.append((node, depth, True))
+            stack.append((node.right, depth, False))
+            stack.append((node.left, depth, False))
+    return results.pop()
+
+def normalize(term, max_steps=None):
+    """Normalizes a ``LambdaTerm`` by call-by-need graph reduction."""
+    graph = Graph(term)
+    graph.normalize(max_steps)
+    return graph.to_term()
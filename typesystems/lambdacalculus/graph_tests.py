@@ -0,0 +1,72 @@
+import unittest
+from .lambdacalculus import *
+from .lambdacalculus_tests import S, K, FALSE, ONE, TWO, THREE, ADD, church
+from .normalization import Zipper, normalize as rewrite
+from .normalization_tests import I, OMEGA
+from .debruijn import to_debruijn
+from .graph import *
+
+class GraphReductionTestCase(unittest.TestCase):
+    def assertSameNormalForm(self, term):
+        self.assertEqual(to_debruijn(normalize(term)),
+                         to_debruijn(rewrite(term)))
+
+    def testNormalize(self):
+        self.assertTrue(normalize(Application(S, K)).alpha_eq(FALSE))
+        self.assertTrue(
+            normalize(Application(Application(ADD, ONE), TWO)).alpha_eq(THREE)
+        )
+        self.assertSameNormalForm(Application(Application(ADD, THREE), THREE))
+        self.assertSameNormalForm(Application(TWO, THREE))
+        self.assertSameNormalForm(
+            Application(Application(THREE, Variable('g')), Variable('v'))
+        )
+        self.assertEqual(normalize(S), S)
+
+    def testLazy(self):
+        term = Application(Application(K, Variable('v')), OMEGA)
+        self.assertEqual(normalize(term), Variable('v'))
+
+    def testSharing(self):
+        term = Application(Application(TWO, TWO), TWO)
+        graph = Graph(term)
+        self.assertTrue(graph.normalize())
+        zipper = Zipper(term)
+        while zipper.step():
+            pass
+        self.assertEqual(graph.to_nameless(), to_debruijn(zipper.term))
+        self.assertLess(graph.beta_steps, zipper.steps)
+
+    def testMaxSteps(self):
+        graph = Graph(OMEGA)
+        self.assertFalse(graph.normalize(max_steps=10))
+        self.assertEqual(graph.beta_steps, 10)
+        self.assertEqual(graph.to_nameless(), to_debruijn(OMEGA))
+
+    def testDag(self):
+        # (\x.xx)(Iv) shares the argument instead of copying it
+        term = Application(
+            Abstraction('x', Application(Variable('x'), Variable('x'))),
+            Application(I, Variable('v'))
+        )
+        graph = Graph(term)
+        graph.normalize()
+        self.assertEqual(graph.beta_steps, 2)
+        self.assertEqual(graph.to_dag(),
+                         [('application', 1, 1), ('free', 'v')])
+        self.assertEqual(graph.to_term(),
+                         Application(Variable('v'), Variable('v')))
+        self.assertEqual(
+            Graph(K).to_dag(),
+            [('abstraction', 'x', 1), ('abstraction', 'y', 2),
+             ('variable', 0)]
+        )
+
+    def testDeep(self):
+        depth = 20000
+        graph = Graph(Application(Abstraction('n', Abstraction('g',
+            Application(Variable('n'), Variable('g'))
+        )), church(depth)))
+        self.assertTrue(graph.normalize())
+        self.assertEqual(len(graph.to_dag()), depth + 4)
+        self.assertTrue(graph.to_term().alpha_eq(church(depth)))
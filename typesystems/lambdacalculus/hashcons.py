@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""Hash-consed construction of lambda terms."""
+from weakref import WeakValueDictionary
+
+from .lambdacalculus import Variable, Abstraction, Application
+
+class TermStore:
+    """A factory that shares structurally identical terms.
+
+    Every term built through a store is interned: asking for a node
+    whose children are already in the store returns the existing node
+    instead of a new one. Two terms from the same store are therefore
+    equal iff they are the same object.
+
+    The store only holds weak references, so an interned term is evicted
+    as soon as nothing else refers to it.
+
+    """
+    def __init__(self):
+        self._table = WeakValueDictionary()
+
+    def __len__(self):
+        return len(self._table)
+
+    def __contains__(self, term):
+        return self._table.get(self._key(term)) is term
+
+    @staticmethod
+    def _key(term):
+        # children of an interned term are interned and kept alive by
+        # their parent, so their ids are stable for as long as the
+        # parent's entry exists.
+        if term.kind == 'variable':
+            return (term.kind, term.symbol)
+        elif term.kind == 'abstraction':
+            return (term.kind, id(term.binds), id(term.term))
+        else:
+            return (term.kind, id(term.left), id(term.right))
+
+    def _lookup(self, term):
+        key = self._key(term)
+        existing = self._table.get(key)
+        if existing is None:
+            self._table[key] = term
+            return term
+        return existing
+
+    def variable(self, symbol):
+        existing = self._table.get(('variable', symbol))
+        if existing is None:
+            existing = self._lookup(Variable(symbol))
+        return existing
+
+    def abstraction(self, binds, term):
+        if isinstance(binds, Variable):
+            binds = binds.symbol
+        binds = self.variable(binds)
+        term = self.intern(term)
+        existing = self._table.get(('abstraction', id(binds), id(term)))
+        if existing is None:
+            existing = self._lookup(Abstraction(binds, term))
+        return existing
+
+    def application(self, left, right):
+        left = self.intern(left)
+        right = self.intern(right)
+        existing = self._table.get(('application', id(left), id(right)))
+        if existing is None:
+            existing = self._lookup(Application(left, right))
+        return existing
+
+    def intern(self, term):
+        """Returns the shared copy of ``term``, adding it if necessary."""
+        results = []
+        stack = [(term, False)]
+        while stack:
+            term, expanded = stack.pop()
+            if term in self:
+                results.append(term)
+            elif term.kind == 'variable':
+                results.append(self.variable(term.symbol))
+            elif term.kind == 'abstraction':
+                if expanded:
+                    body = results.pop()
+                    results.append(self.abstraction(term.binds, body))
+                else:
+                    stack.append((term, True))
+                    stack.append((term.term, False))
+            elif term.kind == 'application':
+                if expanded:
+                    right = results.pop()
+                    results.append(self.application(results.pop(), right))
+                else:
+                    stack.append((term, True))
+                    stack.append((term.right, False))
+                    stack.append((term.left, False))
+            else:
+                raise Exception('no case found for {!r}'.format(term))
+        return results.pop()
+
+    def reduce(self, term):
+        """Performs 1 step of beta reduction and interns the result."""
+        return self.intern(term.reduce())
+
+    def apply_substitution(self, term, sub):
+        """Applies a substitution and interns the result."""
+        return self.intern(term.apply_substitution(sub))
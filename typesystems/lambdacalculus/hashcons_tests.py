@@ -0,0 +1,52 @@
+import gc
+import unittest
+from .lambdacalculus import *
+from .lambdacalculus_tests import ADD, ONE, TWO, THREE
+from .hashcons import TermStore
+
+class TermStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.store = TermStore()
+
+    def testVariable(self):
+        self.assertIs(self.store.variable('x'), self.store.variable('x'))
+        self.assertIsNot(self.store.variable('x'), self.store.variable('y'))
+
+    def testSharing(self):
+        a = self.store.application(Variable('f'), Variable('x'))
+        b = self.store.application(Variable('f'), Variable('x'))
+        self.assertIs(a, b)
+        c = self.store.abstraction('x', a)
+        self.assertIs(c.term, a)
+        self.assertIs(c.binds, a.right)
+
+    def testIntern(self):
+        a = self.store.intern(THREE)
+        b = self.store.intern(parse_three())
+        self.assertIs(a, b)
+        self.assertEqual(a, THREE)
+        self.assertIn(a, self.store)
+        self.assertNotIn(THREE, self.store)
+        # f occurs three times but is stored once
+        self.assertIs(a.term.term.left, a.term.term.right.left)
+
+    def testReduce(self):
+        term = self.store.intern(Application(Application(ADD, ONE), TWO))
+        while term.is_redex:
+            term = self.store.reduce(term)
+            self.assertIn(term, self.store)
+        self.assertTrue(term.alpha_eq(THREE))
+
+    def testEviction(self):
+        term = self.store.intern(TWO)
+        size = len(self.store)
+        self.assertGreater(size, 0)
+        del term
+        gc.collect()
+        self.assertEqual(len(self.store), 0)
+
+def parse_three():
+    f, x = Variable('f'), Variable('x')
+    return Abstraction('f', Abstraction('x',
+        Application(f, Application(f, Application(f, x)))
+    ))
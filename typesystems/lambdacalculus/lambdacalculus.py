@@ -2,9 +2,9 @@
 from abc import ABCMeta, abstractmethod, abstractproperty
 from copy import deepcopy
 from overrides import overrides
-import string
 
-from ..utils import Finalisable
+from ..utils import Immutable, current_supply, variable_names
+from .. import instrumentation
 
 linesep = '\n'
 def padlines(lines, pad):
@@ -24,7 +24,11 @@ class BarendregtViolation(Exception):
 
 BarendregtViolation = BarendregtViolation()
 
-class LambdaTerm(Finalisable, metaclass=ABCMeta):
+_set = object.__setattr__
+
+class LambdaTerm(Immutable, metaclass=ABCMeta):
+    # weakly referenced by ``hashcons.TermStore``
+    __slots__ = ('__weakref__',)
     kind = 'term'
 
     @property
@@ -49,6 +53,8 @@ class LambdaTerm(Finalisable, metaclass=ABCMeta):
                 variable.
         
         """
+        if instrumentation.recorder is not None:
+            instrumentation.recorder.count('substitutions')
         return self.apply_substitution({name: term})
 
     @abstractmethod
@@ -73,6 +79,11 @@ class LambdaTerm(Finalisable, metaclass=ABCMeta):
         """Checks if the term can be reduced by beta-reduction."""
         NotImplemented
 
+    @abstractproperty
+    def size(self):
+        """The number of nodes in the term."""
+        NotImplemented
+
     @abstractmethod
     def reduce(self):
         """Performs 1 step of beta reduction.
@@ -152,33 +163,35 @@ class AlphaEqResult:
         return 'AlphaEqResult({!r}, {!r})'.format(self.res, self.sub)
 
 class Variable(LambdaTerm):
+    __slots__ = ('symbol', '_hash')
     kind = 'variable'
-    freshcounter = -1
-    freshletters = set(string.ascii_lowercase)
+    freshtemplate = 'x_{:02d}'
 
     def __init__(self, symbol):
         assert isinstance(symbol, str)
-        self.freshletters.discard(symbol)
-        self.symbol = symbol
-        self.finalise()
+        _set(self, 'symbol', symbol)
+        _set(self, '_hash', hash((self.kind, symbol)))
 
     @classmethod
     def fresh(cls):
-        if cls.freshletters:
-            return cls(cls.freshletters.pop())
-        else:
-            cls.freshcounter += 1
-            return cls('x_{:02d}'.format(cls.freshcounter))
+        """A variable named by the current ``utils.NameSupply``.
+
+        See ``utils.fresh_names`` for scoping the supply.
+
+        """
+        if instrumentation.recorder is not None:
+            instrumentation.recorder.count('fresh_variables')
+        return cls(current_supply(variable_names, cls.freshtemplate).fresh())
 
     @property
     @overrides
     def free_variables(self):
-        return {self}
+        return frozenset((self,))
 
     @property
     @overrides
     def bound_variables(self):
-        return set()
+        return frozenset()
 
     @overrides
     def apply_substitution(self, sub):
@@ -189,6 +202,11 @@ class Variable(LambdaTerm):
     def is_redex(self):
         return False
 
+    @property
+    @overrides
+    def size(self):
+        return 1
+
     @overrides
     def reduce(self):
         raise NotReduceable(self)
@@ -218,7 +236,10 @@ class Variable(LambdaTerm):
 
     @overrides
     def __hash__(self):
-        return hash(self.symbol) ^ hash(self.kind)
+        return self._hash
+
+    def __reduce__(self):
+        return (self.__class__, (self.symbol,))
 
     def __repr__(self):
         return 'Variable({!r})'.format(self.symbol)
@@ -229,186 +250,425 @@ class Variable(LambdaTerm):
 
 
 class Abstraction(LambdaTerm):
+    __slots__ = ('binds', 'term', '_free_variables', '_bound_variables',
+                 '_is_redex', '_size', '_hash')
     kind = 'abstraction'
 
     def __init__(self, binds, term):
-        self.binds = Variable(binds)
-        self.term = term
-        self.finalise()
-
-        if self.free_variables & self.bound_variables:
+        if not isinstance(binds, Variable):
+            binds = Variable(binds)
+        if binds in term.bound_variables:
+            raise BarendregtViolation
+        _set(self, 'binds', binds)
+        _set(self, 'term', term)
+        _set(self, '_free_variables', term.free_variables - {binds})
+        _set(self, '_bound_variables', term.bound_variables | {binds})
+        _set(self, '_is_redex', term.is_redex)
+        _set(self, '_size', term.size + 1)
+        _set(self, '_hash', hash((self.kind, binds._hash, term._hash)))
+
+        if self._free_variables & self._bound_variables:
             raise BarendregtViolation 
 
     @property
     @overrides
     def free_variables(self):
-        v = self.term.free_variables
-        v.discard(self.binds)
-        return v
+        return self._free_variables
 
     @property
     @overrides
     def bound_variables(self):
-        v = self.term.bound_variables
-        if self.binds in v:
-            raise BarendregtViolation
-        v.add(self.binds)
-        return v
+        return self._bound_variables
 
     @overrides
     def apply_substitution(self, sub):
-        sub = sub.copy()
-        sub.pop(self.binds, None)
-        return Abstraction(self.binds.symbol, self.term._app_sub(sub))
+        return _apply_substitution(self, sub)
 
     @property
     @overrides
     def is_redex(self):
-        return self.term.is_redex
+        return self._is_redex
+
+    @property
+    @overrides
+    def size(self):
+        return self._size
 
     @overrides
     def reduce(self):
-        if self.term.is_redex:
-            return Abstraction(self.binds.symbol, self.term.reduce())
-        else:
-            raise NotReduceable(self)
+        return _reduce(self)
+
+    def apply(self, term, taken=()):
+        """Substitutes ``term`` for the bound variable in the body.
 
-    def apply(self, term):
-        return self.term.substitute(self.binds, term)
+        Binders of ``term`` are renamed where a copy of it would end up
+        inside a binder of the same variable, and nowhere else. The new
+        names are used neither in the body nor in ``term``.
+
+        Args:
+            term (LambdaTerm): The argument.
+            taken (Iterable[Set[Variable]]): More variables the new names
+                must avoid, such as those of the term around a redex.
+
+        """
+        if instrumentation.recorder is not None:
+            instrumentation.recorder.count('substitutions')
+        return _instantiate(self.term, self.binds, term, taken)
 
     @overrides
     def _alpha_eq_helper(self, other, sub):
-        if other.kind == self.kind:
-            if self.binds in sub:
-                raise BarendregtViolation
-            sub[self.binds] = other.binds
-            res, sub = self.term._alpha_eq_helper(other.term, sub)
-            if res:
-                return AlphaEqResult(True, sub)
-            else: 
-                return AlphaEqResult(False)
-        else:
-            return AlphaEqResult(False)
+        return _alpha_eq(self, other, sub)
 
     @overrides
     def apply_alpha_substitution(self, sub):
-        return Abstraction(
-            sub.get(self.binds, self.binds).symbol, 
-            self.term.apply_alpha_substitution(sub)
-        )
+        return _apply_alpha_substitution(self, sub)
 
     @overrides
     def __eq__(self, other):
-        return (other.kind == self.kind and
-                other.binds == self.binds and
-                other.term == self.term)
+        if isinstance(other, LambdaTerm) and other._hash != self._hash:
+            return False
+        return _equal(self, other)
 
     @overrides
     def __hash__(self):
-        return hash(self.binds) ^ hash(self.term) ^ hash(self.kind)
+        return self._hash
+
+    def __reduce__(self):
+        return (self.__class__, (self.binds, self.term))
 
     def __repr__(self):
-        return 'Abstraction({!r}, {!r})'.format(self.binds.symbol, self.term)
+        return _repr(self)
 
     def __str__(self):
-        s = '\\' + str(self.binds)
-        term = self.term
-        while term.kind == self.kind:
-            s += str(term.binds)
-            term = term.term
-        s += '.' + str(term)
-        return s
+        return _str(self)
 
 class Application(LambdaTerm):
+    __slots__ = ('left', 'right', '_free_variables', '_bound_variables',
+                 '_is_redex', '_size', '_hash')
     kind = 'application'
 
     def __init__(self, left, right):
-        self.left = left
-        self.right = right
-        self.finalise()
-
-        if self.free_variables & self.bound_variables:
+        _set(self, 'left', left)
+        _set(self, 'right', right)
+        _set(self, '_free_variables',
+             left.free_variables | right.free_variables)
+        _set(self, '_bound_variables',
+             left.bound_variables | right.bound_variables)
+        _set(self, '_is_redex', (left.kind == 'abstraction' or
+                                 left.is_redex or right.is_redex))
+        _set(self, '_size', left.size + right.size + 1)
+        _set(self, '_hash', hash((self.kind, left._hash, right._hash)))
+
+        if self._free_variables & self._bound_variables:
             raise BarendregtViolation 
 
     @property
     @overrides
     def free_variables(self):
-        v = self.left.free_variables
-        v.update(self.right.free_variables)
-        return v
+        return self._free_variables
 
     @property
     @overrides
     def bound_variables(self):
-        v = self.left.bound_variables
-        v.update(self.right.bound_variables)
-        return v
+        return self._bound_variables
     
     @overrides
     def apply_substitution(self, sub):
-        return Application(self.left._app_sub(sub), self.right._app_sub(sub))
+        return _apply_substitution(self, sub)
 
     @property
     @overrides
     def is_redex(self):
-        return (self.left.is_redex or self.right.is_redex or 
-                self.left.kind == 'abstraction')
+        return self._is_redex
+
+    @property
+    @overrides
+    def size(self):
+        return self._size
 
     @overrides
     def reduce(self):
-        if self.left.kind == 'abstraction':
-            right = self.right
-            conflicts = self.left.bound_variables & self.right.bound_variables
-            for x in conflicts:
-                right = right.alpha_substitute(x, Variable.fresh())
-            return self.left.apply(right)
-        elif self.left.is_redex:
-            return Application(self.left.reduce(), self.right)
-        elif self.right.is_redex:
-            return Application(self.left, self.right.reduce())
-        else:
-            raise NotReduceable(self)
+        return _reduce(self)
+
+    def contract(self, taken=()):
+        """Contracts this term, which must be a beta redex.
+
+        ``taken`` is passed on to ``Abstraction.apply``.
+
+        """
+        if instrumentation.recorder is not None:
+            instrumentation.recorder.count('beta_steps')
+        return self.left.apply(self.right, taken)
 
     @overrides
     def _alpha_eq_helper(self, other, sub):
-        if other.kind == self.kind:
-            res, sub = self.left._alpha_eq_helper(other.left, sub)
-            if res:
-                res, sub = self.right._alpha_eq_helper(other.right, sub)
-                if res:
-                    return AlphaEqResult(True, sub)
-                else:
-                    return AlphaEqResult(False)
-            else:
-                return AlphaEqResult(False)
-        else:
-            return AlphaEqResult(False)
+        return _alpha_eq(self, other, sub)
 
     @overrides
     def apply_alpha_substitution(self, sub):
-        return Application(
-            self.left.apply_alpha_substitution(sub),
-            self.right.apply_alpha_substitution(sub)
-        )
+        return _apply_alpha_substitution(self, sub)
 
     @overrides
     def __eq__(self, other):
-        return (other.kind == self.kind and
-                other.left == self.left and other.right == self.right)
+        if isinstance(other, LambdaTerm) and other._hash != self._hash:
+            return False
+        return _equal(self, other)
 
     @overrides
     def __hash__(self):
-        return hash(self.left) ^ hash(self.right) ^ hash(self.kind)
+        return self._hash
+
+    def __reduce__(self):
+        return (self.__class__, (self.left, self.right))
 
     def __repr__(self):
-        return 'Application({!r}, {!r})'.format(self.left, self.right)
+        return _repr(self)
 
     def __str__(self):
-        left = ('(' + str(self.left) + ')' 
-                if self.left.kind == 'abstraction' else
-                str(self.left))
-        right = ('(' + str(self.right) + ')' 
-                 if self.right.kind in ['application', 'abstraction'] else
-                 str(self.right))
-        return left + right
-
+        return _str(self)
+
+# The compound terms can be nested far deeper than Python's recursion
+# limit allows, so all of their traversals below use explicit stacks.
+
+def _equal(a, b):
+    stack = [(a, b)]
+    while stack:
+        a, b = stack.pop()
+        if a is b:
+            continue
+        if a.kind != b.kind:
+            return False
+        if a.kind == 'variable':
+            if a.symbol != b.symbol:
+                return False
+        elif a.kind == 'abstraction':
+            if a.binds != b.binds:
+                return False
+            stack.append((a.term, b.term))
+        else:
+            stack.append((a.right, b.right))
+            stack.append((a.left, b.left))
+    return True
+
+def _str(term):
+    out = []
+    stack = [term]
+    while stack:
+        term = stack.pop()
+        if isinstance(term, str):
+            out.append(term)
+        elif term.kind == 'variable':
+            out.append(str(term))
+        elif term.kind == 'abstraction':
+            s = '\\' + str(term.binds)
+            term = term.term
+            while term.kind == 'abstraction':
+                s += str(term.binds)
+                term = term.term
+            out.append(s + '.')
+            stack.append(term)
+        else:
+            if term.right.kind in ['application', 'abstraction']:
+                stack.extend([')', term.right, '('])
+            else:
+                stack.append(term.right)
+            if term.left.kind == 'abstraction':
+                stack.extend([')', term.left, '('])
+            else:
+                stack.append(term.left)
+    return ''.join(out)
+
+def _repr(term):
+    out = []
+    stack = [term]
+    while stack:
+        term = stack.pop()
+        if isinstance(term, str):
+            out.append(term)
+        elif term.kind == 'variable':
+            out.append(repr(term))
+        elif term.kind == 'abstraction':
+            out.append('Abstraction({!r}, '.format(term.binds.symbol))
+            stack.extend([')', term.term])
+        else:
+            out.append('Application(')
+            stack.extend([')', term.right, ', ', term.left])
+    return ''.join(out)
+
+def _rebuild(term, children):
+    """A copy of ``term`` with new children, or ``term`` if unchanged."""
+    if term.kind == 'abstraction':
+        binds, body = children
+        if binds is term.binds and body is term.term:
+            return term
+        return Abstraction(binds, body)
+    else:
+        left, right = children
+        if left is term.left and right is term.right:
+            return term
+        return Application(left, right)
+
+def _apply_substitution(term, sub):
+    results = []
+    stack = [(term, sub, False)]
+    while stack:
+        term, sub, expanded = stack.pop()
+        if expanded:
+            if term.kind == 'abstraction':
+                results.append(_rebuild(term, (term.binds, results.pop())))
+            else:
+                right = results.pop()
+                results.append(_rebuild(term, (results.pop(), right)))
+        elif term.kind == 'variable':
+            results.append(sub.get(term, term))
+        elif term.free_variables.isdisjoint(sub):
+            results.append(term)
+        elif term.kind == 'abstraction':
+            if term.binds in sub:
+                sub = sub.copy()
+                del sub[term.binds]
+            stack.append((term, sub, True))
+            stack.append((term.term, sub, False))
+        else:
+            stack.append((term, sub, True))
+            stack.append((term.right, sub, False))
+            stack.append((term.left, sub, False))
+    return results.pop()
+
+def _fresh_variable(taken):
+    """A fresh variable that is in none of the sets ``taken``.
+
+    The current ``utils.NameSupply`` knows nothing of terms built under
+    other supplies, in other threads or by hand, so its names are checked
+    against the (cached) variable sets of the terms involved.
+
+    """
+    while True:
+        var = Variable.fresh()
+        if not any(var in variables for variables in taken):
+            return var
+
+def _instantiate(body, x, arg, taken=()):
+    """``body`` with ``arg`` substituted for ``x``, in one pass.
+
+    The binders enclosing each occurence of ``x`` are tracked on the
+    way down. Where some of them are also bound in ``arg``, the copy of
+    ``arg`` placed there has those binders renamed to fresh variables,
+    all at once; copies needing the same renaming are shared. Subterms
+    in which ``x`` does not occur are shared as well.
+
+    """
+    arg_bound = arg.bound_variables
+    taken = (body.free_variables, body.bound_variables,
+             arg.free_variables, arg_bound) + tuple(taken)
+    scope = set()
+    copies = {}
+    results = []
+    stack = [(body, False)]
+    while stack:
+        term, expanded = stack.pop()
+        if expanded:
+            if term.kind == 'abstraction':
+                scope.discard(term.binds)
+                results.append(_rebuild(term, (term.binds, results.pop())))
+            else:
+                right = results.pop()
+                results.append(_rebuild(term, (results.pop(), right)))
+        elif term.kind == 'variable':
+            if term != x:
+                results.append(term)
+                continue
+            conflicts = arg_bound & scope
+            if not conflicts:
+                results.append(arg)
+                continue
+            if conflicts not in copies:
+                if instrumentation.recorder is not None:
+                    instrumentation.recorder.count('alpha_renames',
+                                                   len(conflicts))
+                copies[conflicts] = _apply_alpha_substitution(
+                    arg, {v: _fresh_variable(taken) for v in conflicts}
+                )
+            results.append(copies[conflicts])
+        elif x not in term.free_variables:
+            results.append(term)
+        elif term.kind == 'abstraction':
+            scope.add(term.binds)
+            stack.append((term, True))
+            stack.append((term.term, False))
+        else:
+            stack.append((term, True))
+            stack.append((term.right, False))
+            stack.append((term.left, False))
+    return results.pop()
+
+def _apply_alpha_substitution(term, sub):
+    results = []
+    stack = [(term, False)]
+    while stack:
+        term, expanded = stack.pop()
+        if expanded:
+            if term.kind == 'abstraction':
+                binds = sub.get(term.binds, term.binds)
+                results.append(_rebuild(term, (binds, results.pop())))
+            else:
+                right = results.pop()
+                results.append(_rebuild(term, (results.pop(), right)))
+        elif term.kind == 'variable':
+            results.append(sub[term] if term in sub else term)
+        elif term.kind == 'abstraction':
+            stack.append((term, True))
+            stack.append((term.term, False))
+        else:
+            stack.append((term, True))
+            stack.append((term.right, False))
+            stack.append((term.left, False))
+    return results.pop()
+
+def _alpha_eq(term, other, sub):
+    stack = [(term, other)]
+    while stack:
+        term, other = stack.pop()
+        if other.kind != term.kind:
+            return AlphaEqResult(False)
+        elif term.kind == 'variable':
+            if term in sub:
+                if sub[term] != other:
+                    return AlphaEqResult(False)
+            elif term != other:
+                return AlphaEqResult(False)
+        elif term.kind == 'abstraction':
+            if term.binds in sub:
+                raise BarendregtViolation
+            sub[term.binds] = other.binds
+            stack.append((term.term, other.term))
+        else:
+            stack.append((term.right, other.right))
+            stack.append((term.left, other.left))
+    return AlphaEqResult(True, sub)
+
+def _reduce(term):
+    """Performs 1 step of beta reduction, see ``LambdaTerm.reduce``."""
+    if not term.is_redex:
+        raise NotReduceable(term)
+    # the binders renamed in the redex must not clash with the context
+    taken = (term.free_variables, term.bound_variables)
+    path = []
+    while not (term.kind == 'application' and
+               term.left.kind == 'abstraction'):
+        path.append(term)
+        if term.kind == 'abstraction':
+            term = term.term
+        elif term.left.is_redex:
+            term = term.left
+        else:
+            term = term.right
+    term = term.contract(taken)
+    for parent in reversed(path):
+        if parent.kind == 'abstraction':
+            term = Abstraction(parent.binds, term)
+        elif parent.left.is_redex:
+            term = Application(term, parent.right)
+        else:
+            term = Application(parent.left, term)
+    return term
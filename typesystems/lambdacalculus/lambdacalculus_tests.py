@@ -1,5 +1,6 @@
 import unittest
 from .lambdacalculus import *
+from .debruijn import to_debruijn
 
 S = Abstraction('x', Abstraction('y', Abstraction('z',
     Application(
@@ -99,6 +100,46 @@ class ReductionTestCase(unittest.TestCase):
             term = term.reduce()
         self.assertTrue(term.alpha_eq(THREE))
 
+    def testRenamesOnlyCapturingBinders(self):
+        I = Abstraction('y', Variable('y'))
+        # \x.(\y.y) x: the argument's y ends up outside any binder of y
+        term = Application(
+            Abstraction('x', Application(I, Variable('x'))), I
+        )
+        res = term.reduce()
+        self.assertEqual(res, Application(I, I))
+        self.assertIs(res.left, I)
+        self.assertIs(res.right, I)
+        # \x.\y.x x: both copies end up inside \y and share a renaming
+        term = Application(
+            Abstraction('x', Abstraction('y', Application(
+                Variable('x'), Variable('x')
+            ))),
+            I
+        )
+        res = term.reduce()
+        self.assertEqual(res.binds, Variable('y'))
+        left, right = res.term.left, res.term.right
+        self.assertIs(left, right)
+        self.assertNotEqual(left.binds, Variable('y'))
+        self.assertEqual(to_debruijn(left), to_debruijn(I))
+
+    def testRenamesInOnePass(self):
+        from .. import instrumentation
+        # \x.\a b c.x applied to \a b c.a: one copy, three binders renamed
+        body = Variable('x')
+        for v in 'cba':
+            body = Abstraction(v, body)
+        arg = Abstraction('a', Abstraction('b', Abstraction('c', Variable('a'))))
+        with instrumentation.record() as rec:
+            res = Application(Abstraction('x', body), arg).reduce()
+        self.assertEqual(rec.counters['alpha_renames'], 3)
+        self.assertEqual(rec.counters['substitutions'], 1)
+        self.assertEqual(to_debruijn(res.term.term.term), to_debruijn(arg))
+        self.assertTrue(res.term.term.term.bound_variables.isdisjoint(
+            body.bound_variables
+        ))
+
 class AlphaEquivalenceTestCase(unittest.TestCase):
     def assertAlphaEq(self, t0, t1, sub):
         self.assertTrue(t0.alpha_eq(t1))
@@ -200,6 +241,16 @@ class EqualityTestCase(unittest.TestCase):
             Application(Variable('y'), Variable('y'))
         )
 
+    def testHash(self):
+        x, y = Variable('x'), Variable('y')
+        self.assertEqual(hash(Application(x, y)), hash(Application(x, y)))
+        # hashes depend on the order of children
+        self.assertNotEqual(hash(Application(x, y)), hash(Application(y, x)))
+        self.assertNotEqual(hash(Application(Application(x, y), x)),
+                            hash(Application(x, Application(y, x))))
+        terms = {Application(x, y), Application(y, x), Abstraction('x', x)}
+        self.assertIn(Abstraction('x', Variable('x')), terms)
+
 class strTestCase(unittest.TestCase):
     def testVariable(self):
         self.assertEqual(str(Variable('x')), 'x')
@@ -244,3 +295,198 @@ class strTestCase(unittest.TestCase):
             )), 
             r'y(\x.x)'
         )
+
+class VariablesTestCase(unittest.TestCase):
+    def testFreeVariables(self):
+        self.assertEqual(Variable('x').free_variables, {Variable('x')})
+        self.assertEqual(ADD.free_variables, frozenset())
+        term = Application(Variable('w'), K)
+        self.assertEqual(term.free_variables, {Variable('w')})
+        self.assertIsInstance(term.free_variables, frozenset)
+
+    def testBoundVariables(self):
+        self.assertEqual(Variable('x').bound_variables, frozenset())
+        self.assertEqual(S.bound_variables, set(map(Variable, 'xyz')))
+        self.assertIs(S.bound_variables, S.bound_variables)
+
+    def testBarendregtViolation(self):
+        violation = type(BarendregtViolation)
+        self.assertRaises(violation, lambda: Application(Variable('x'), K))
+        self.assertRaises(violation, lambda: Abstraction('x', K))
+
+    def testSubstitutionSharing(self):
+        term = Application(K, Variable('w'))
+        res = term.substitute(Variable('w'), Variable('z'))
+        self.assertEqual(res, Application(K, Variable('z')))
+        self.assertIs(res.left, K)
+        self.assertIs(term.substitute(Variable('v'), Variable('z')), term)
+
+    def testSize(self):
+        self.assertEqual(Variable('x').size, 1)
+        # \xyz.xz(yz)
+        self.assertEqual(S.size, 10)
+        self.assertEqual(Application(Variable('w'), K).size, 5)
+
+def church(n):
+    """The Church numeral ``n``, built without recursion."""
+    term = Variable('x')
+    for _ in range(n):
+        term = Application(Variable('f'), term)
+    return Abstraction('f', Abstraction('x', term))
+
+def random_term(rng, size, binders='abcdefghijklmnopqrstuvw', free='yz'):
+    """A random term with distinct binders, so it respects Barendregt."""
+    binders = list(binders)
+    rng.shuffle(binders)
+    def term(size, scope):
+        if size <= 1 or (not binders and size < 3):
+            return Variable(rng.choice(scope + list(free)))
+        choice = rng.random()
+        if choice < 0.3 and binders:
+            binds = binders.pop()
+            return Abstraction(binds, term(size - 1, scope + [binds]))
+        left = rng.randint(1, size - 1)
+        return Application(term(left, scope), term(size - left, scope))
+    return term(size, [])
+
+def recursive_str(term):
+    """The original, recursive ``__str__``."""
+    if term.kind == 'variable':
+        return str(term)
+    elif term.kind == 'abstraction':
+        s = '\\' + str(term.binds)
+        while term.term.kind == 'abstraction':
+            term = term.term
+            s += str(term.binds)
+        return s + '.' + recursive_str(term.term)
+    left = ('(' + recursive_str(term.left) + ')'
+            if term.left.kind == 'abstraction' else recursive_str(term.left))
+    right = ('(' + recursive_str(term.right) + ')'
+             if term.right.kind in ['application', 'abstraction'] else
+             recursive_str(term.right))
+    return left + right
+
+def recursive_hash(term):
+    """The structural hash, computed recursively."""
+    if term.kind == 'variable':
+        return hash((term.kind, term.symbol))
+    elif term.kind == 'abstraction':
+        return hash((term.kind, recursive_hash(term.binds),
+                     recursive_hash(term.term)))
+    return hash((term.kind, recursive_hash(term.left),
+                 recursive_hash(term.right)))
+
+class TraversalTestCase(unittest.TestCase):
+    def testSameAsRecursive(self):
+        import random
+        rng = random.Random(0)
+        for _ in range(200):
+            term = random_term(rng, rng.randint(1, 40))
+            self.assertEqual(str(term), recursive_str(term))
+            self.assertEqual(hash(term), recursive_hash(term))
+            self.assertEqual(eval(repr(term)), term)
+            self.assertEqual(hash(eval(repr(term))), hash(term))
+            self.assertTrue(term.alpha_eq(term))
+            if term.is_redex:
+                self.assertNotEqual(term.reduce(), term)
+
+    def testDeepTerms(self):
+        depth = 5000
+        self.assertEqual(church(depth), church(depth))
+        self.assertNotEqual(church(depth), church(depth - 1))
+        self.assertEqual(hash(church(depth)), hash(church(depth)))
+        self.assertEqual(len(str(church(depth))), 3 * depth + 3)
+        self.assertTrue(church(depth).alpha_eq(
+            church(depth).alpha_substitute(Variable('f'), Variable('g'))
+        ))
+        body = church(depth).term.term
+        self.assertEqual(
+            body.substitute(Variable('x'), Variable('w')),
+            church(depth).term.term.apply_alpha_substitution(
+                {Variable('x'): Variable('w')}
+            )
+        )
+
+        term = Application(Application(ADD, church(depth)), church(depth))
+        while term.is_redex:
+            term = term.reduce()
+        self.assertTrue(term.alpha_eq(church(2 * depth)))
+
+    def testLongApplicationChain(self):
+        term = Variable('x')
+        for _ in range(20000):
+            term = Application(term, Variable('y'))
+        self.assertEqual(str(term), 'x' + 'y' * 20000)
+        self.assertFalse(term.is_redex)
+        self.assertRaises(NotReduceable, term.reduce)
+
+class ImmutabilityTestCase(unittest.TestCase):
+    def testImmutable(self):
+        for term in (Variable('x'), K, Application(S, K)):
+            self.assertRaises(AttributeError, setattr, term, 'kind', 'x')
+            self.assertRaises(AttributeError, setattr, term, 'cache', {})
+            self.assertFalse(hasattr(term, '__dict__'))
+        self.assertRaises(AttributeError, delattr, K, 'term')
+        self.assertEqual(K.term, Abstraction('y', Variable('x')))
+
+    def testPickle(self):
+        import copy
+        import pickle
+        term = Application(S, K)
+        for copied in (pickle.loads(pickle.dumps(term)), copy.deepcopy(term)):
+            self.assertEqual(copied, term)
+            self.assertEqual(copied.free_variables, term.free_variables)
+            self.assertEqual(copied.size, term.size)
+            self.assertTrue(copied.reduce().alpha_eq(term.reduce()))
+
+class FreshVariableTestCase(unittest.TestCase):
+    def testNameSupply(self):
+        from ..utils import NameSupply, fresh_names
+        names = NameSupply(Variable.freshtemplate)
+        names.reserve(['x_00'])
+        with fresh_names(names):
+            self.assertEqual(Variable.fresh(), Variable('x_01'))
+            # (\x.\w.xw)(\w.w): the copy of \w.w gets a fresh binder
+            term = Application(
+                Abstraction('x', Abstraction('w',
+                    Application(Variable('x'), Variable('w')))),
+                Abstraction('w', Variable('w'))
+            )
+            self.assertEqual(term.reduce(), Abstraction('w', Application(
+                Abstraction('x_02', Variable('x_02')), Variable('w')
+            )))
+
+    def testAcrossScopes(self):
+        from ..utils import fresh_names
+        from .normalization import normalize
+        # one step renames a binder to x_00, a fresh supply offers it again
+        with fresh_names():
+            term = Application(TWO, TWO).reduce()
+        self.assertIn(Variable('x_00'), term.variables)
+        with fresh_names():
+            self.assertTrue(normalize(term).alpha_eq(church(4)))
+        with fresh_names():
+            while term.is_redex:
+                term = term.reduce()
+        self.assertTrue(term.alpha_eq(church(4)))
+
+    def testAcrossThreads(self):
+        import threading
+        from ..utils import fresh_names
+        from .normalization import normalize
+        with fresh_names():
+            term = Application(TWO, TWO).reduce()
+        results = []
+        thread = threading.Thread(target=lambda: results.append(
+            normalize(term)))
+        thread.start()
+        thread.join()
+        self.assertTrue(results[0].alpha_eq(church(4)))
+
+    def testNothingReserved(self):
+        from ..utils import current_supply, variable_names
+        from .normalization import normalize
+        term = Application(TWO, TWO).reduce()
+        self.assertTrue(normalize(term).alpha_eq(church(4)))
+        supply = current_supply(variable_names, Variable.freshtemplate)
+        self.assertEqual(supply.reserved, set())
@@ -1,66 +1,128 @@
-"""Lexer and parser for lambda calculus."""
-import ply.lex as lex
-import ply.yacc as yacc
+"""Lexer and parser for lambda calculus.
 
-from .lambdacalculus import *
-
-# ============================= LEXER ==================================
+The grammar is::
 
-tokens = ('VARIABLE',)
-literals = [ '(', ')', '\\', '.', '@' ]
-t_VARIABLE = r'[^\W\d_]'
-t_ignore = ' \t\r\n'
+    term      : VARIABLE
+              | '(' term ')'
+              | term term                 (left associative)
+              | '\\' variables '.' term   (extends as far right as possible)
+    variables : VARIABLE | variables VARIABLE
 
-def t_error(t):
-    raise Exception('Illegal character {:s}'.format(repr(t.value)))
+where a VARIABLE is a single letter, and spaces, tabs and newlines are
+ignored. The parser is a hand-written shift-reduce loop over the source
+characters, with an explicit stack of open brackets and abstractions, so
+it needs no generated tables and no recursion.
 
-lexer = lex.lex()
+"""
+import re
 
+from .lambdacalculus import *
 
-# ============================= PARSER =================================
+# ============================= LEXER ==================================
 
+_VARIABLE, _IGNORE, _LITERAL, _ILLEGAL = range(4)
+_LETTER = re.compile(r'[^\W\d_]')
 
-precedence = (
-    ('nonassoc', 'Abstraction'),
-    ('nonassoc', '\\'),
-    ('left', '('),
-    ('right', ')'),
-    ('left', 'VARIABLE'),
-    ('left', 'Application'),
-)
+_classes = dict.fromkeys(' \t\r\n', _IGNORE)
+_classes.update(dict.fromkeys('()\\.@', _LITERAL))
 
-def p_term_variable(p):
-    "term : VARIABLE"
-    p[0] = Variable(p[1])
+def _class(char):
+    if char not in _classes:
+        _classes[char] = _VARIABLE if _LETTER.match(char) else _ILLEGAL
+    return _classes[char]
 
-def p_term_brackets(p):
-    "term : '(' term ')'"
-    p[0] = p[2]
+def _illegal(source, i):
+    return Exception('Illegal character {:s}'.format(repr(source[i:])))
 
-def p_term_application(p):
-    "term : term term %prec Application"
-    p[0] = Application(p[1], p[2])
+def _syntax_error():
+    return Exception('Syntax error!')
 
-def p_term_abstraction(p):
-    "term : '\\\\' variables '.' term %prec Abstraction"
-    for i in reversed(p[2]):
-        p[4] = Abstraction(i, p[4])
-    p[0] = p[4]
+# ============================= PARSER =================================
 
-def p_variables(p):
-    """variables : VARIABLE
-                 | variables VARIABLE"""
-    if len(p) == 2:
-        p[0] = [p[1]]
-    else:
-        p[1].append(p[2])
-        p[0] = p[1]
+# frames of the parser's stack: [kind, binders, term so far]
+_TOP, _BRACKET, _ABSTRACTION = range(3)
 
-def p_error(p):
-    raise Exception('Syntax error!')
+def _push(frame, term):
+    # adds a complete term to the application being built by ``frame``
+    frame[2] = term if frame[2] is None else Application(frame[2], term)
 
-parser = yacc.yacc()
+def _close_abstractions(stack):
+    while stack[-1][0] == _ABSTRACTION:
+        _, binders, term = stack.pop()
+        if term is None:
+            raise _syntax_error()
+        for binder in reversed(binders):
+            term = Abstraction(binder, term)
+        _push(stack[-1], term)
 
 def parse(source):
     """Parses a lambda calculus term."""
-    return parser.parse(source)
+    stack = [[_TOP, None, None]]
+    variables = {}
+    classes = _classes
+    n = len(source)
+    i = 0
+    while i < n:
+        char = source[i]
+        cls = classes.get(char)
+        if cls is None:
+            cls = _class(char)
+        i += 1
+        if cls == _VARIABLE:
+            var = variables.get(char)
+            if var is None:
+                var = variables[char] = Variable(char)
+            _push(stack[-1], var)
+        elif cls == _IGNORE:
+            continue
+        elif cls == _ILLEGAL:
+            raise _illegal(source, i - 1)
+        elif char == '(':
+            stack.append([_BRACKET, None, None])
+        elif char == ')':
+            _close_abstractions(stack)
+            kind, _, term = stack.pop()
+            if kind != _BRACKET or term is None:
+                raise _syntax_error()
+            _push(stack[-1], term)
+        elif char == '\\':
+            binders = []
+            while True:
+                if i == n:
+                    raise _syntax_error()
+                char = source[i]
+                cls = classes.get(char)
+                if cls is None:
+                    cls = _class(char)
+                i += 1
+                if cls == _VARIABLE:
+                    binders.append(char)
+                elif cls == _IGNORE:
+                    continue
+                elif cls == _ILLEGAL:
+                    raise _illegal(source, i - 1)
+                elif char == '.' and binders:
+                    break
+                else:
+                    raise _syntax_error()
+            stack.append([_ABSTRACTION, binders, None])
+        else:
+            raise _syntax_error()
+    _close_abstractions(stack)
+    if len(stack) != 1 or stack[0][2] is None:
+        raise _syntax_error()
+    return stack[0][2]
+
+def parse_many(lines):
+    """Parses one lambda calculus term per line.
+
+    Args:
+        lines (Iterable[str]): The sources to parse, such as the lines of
+            an open file.
+
+    Yields:
+        The term parsed from each line, in order.
+
+    """
+    for line in lines:
+        yield parse(line)
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import unittest
 from .lambdacalculus import *
-from .lexparse import parse
+from .lexparse import parse, parse_many
 
 class LexParseTestCase(unittest.TestCase):
     def testVariable(self):
@@ -35,3 +35,67 @@ class LexParseTestCase(unittest.TestCase):
             parse(r'\xy.z'), 
             Abstraction('x', Abstraction('y', Variable('z')))
         )
+
+    def testPrecedence(self):
+        self.assertEqual(
+            parse(r'x \y.y z'),
+            Application(
+                Variable('x'),
+                Abstraction('y', Application(Variable('y'), Variable('z')))
+            )
+        )
+        self.assertEqual(
+            parse(r'(\x.x) y'),
+            Application(Abstraction('x', Variable('x')), Variable('y'))
+        )
+        self.assertEqual(parse(' \\x y .\n x '), parse(r'\xy.x'))
+
+    def testErrors(self):
+        for source in ['', ' ', 'x)', '(x', '()', r'\.x', r'\x.', r'(\x.)',
+                       'x@y', 'x.y', r'\x(y).y']:
+            with self.subTest(source=source):
+                with self.assertRaisesRegex(Exception, '^Syntax error!$'):
+                    parse(source)
+        with self.assertRaisesRegex(Exception, "^Illegal character '1.x'$"):
+            parse(r'\x1.x')
+        with self.assertRaisesRegex(Exception, "^Illegal character '_'$"):
+            parse('x_')
+
+    def testDeep(self):
+        source = '(' * 5000 + 'x' + ')' * 5000
+        self.assertEqual(parse(source), Variable('x'))
+        source = ''.join(r'\{}.'.format(chr(0x4e00 + i)) for i in range(5000))
+        self.assertEqual(parse(source + 'x').kind, 'abstraction')
+
+    def testParseMany(self):
+        lines = ['x\n', r'\x.x', 'xy\n']
+        self.assertEqual(list(parse_many(lines)), [parse(l) for l in lines])
+
+class PlyComparisonTestCase(unittest.TestCase):
+    """Checks that the old ply parser agrees, if ply is installed."""
+    def setUp(self):
+        from ..benchmarks.parsing import ply_parse, has_ply
+        if not has_ply():
+            self.skipTest('ply is not installed')
+        self.ply_parse = ply_parse
+
+    def result(self, parse, source):
+        try:
+            return repr(parse(source))
+        except Exception as e:
+            return 'error: {}'.format(e)
+
+    def testRandomTerms(self):
+        from ..benchmarks.parsing import corpus
+        for source in corpus(200, size=30):
+            self.assertEqual(parse(source), self.ply_parse(source))
+
+    def testRandomStrings(self):
+        import random
+        rng = random.Random(0)
+        alphabet = 'xyzλ()\\\\..  @1'
+        for _ in range(2000):
+            source = ''.join(rng.choice(alphabet)
+                             for _ in range(rng.randint(0, 12)))
+            self.assertEqual(self.result(parse, source),
+                             self.result(self.ply_parse, source), source)
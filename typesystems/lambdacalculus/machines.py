@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""Abstract machines computing weak head normal forms.
+
+Rather than substituting arguments into the text of a term, as
+``Abstraction.apply`` does, these machines pair (nameless) terms with
+environments. Beta reduction only extends an environment, so no term is
+ever copied until the final result is read back into a ``LambdaTerm``.
+
+"""
+from .debruijn import (to_debruijn, from_debruijn, NamelessAbstraction,
+                       NamelessApplication)
+
+class OutOfSteps(Exception):
+    def __init__(self, steps):
+        super().__init__("Gave up after {} machine steps.".format(steps))
+
+class Closure:
+    """A nameless term together with values for its loose indices.
+
+    Environments are linked lists of pairs ``(value, rest)``, with
+    ``None`` as the empty environment; index ``n`` refers to the
+    ``n``-th value.
+
+    """
+    def __init__(self, term, env):
+        self.term = term
+        self.env = env
+        self._readback = None
+
+    def readback(self):
+        """The closure as a nameless term without loose indices."""
+        if self._readback is None:
+            _readback(self)
+        return self._readback
+
+class Neutral:
+    """A free variable applied to some arguments, which cannot reduce."""
+    def __init__(self, head, args=()):
+        self.head = head
+        self.args = args
+
+    def applied_to(self, arg):
+        return Neutral(self.head, self.args + (arg,))
+
+    def readback(self):
+        return _readback(self)
+
+def _lookup(env, index):
+    for _ in range(index):
+        env = env[1]
+    return env[0]
+
+# work items of _readback
+_VALUE, _TERM, _CLOSURE, _NEUTRAL = 'value', 'term', 'closure', 'neutral'
+
+def _readback(value):
+    """Reads back a closure or neutral term without recursion.
+
+    Values can nest as deeply as the terms they were built from, through
+    the arguments of neutral terms as well as through environments, so
+    terms and values share one explicit stack. Each closure caches its
+    result as it is finished.
+
+    """
+    results = []
+    stack = [(_VALUE, value)]
+    while stack:
+        item = stack.pop()
+        if item[0] is _VALUE:
+            value = item[1]
+            if isinstance(value, Neutral):
+                stack.append((_NEUTRAL, value))
+                stack.extend((_VALUE, arg) for arg in reversed(value.args))
+            elif value._readback is not None:
+                results.append(value._readback)
+            else:
+                stack.append((_CLOSURE, value))
+                stack.append((_TERM, value.term, value.env, 0, False))
+        elif item[0] is _CLOSURE:
+            item[1]._readback = results[-1]
+        elif item[0] is _NEUTRAL:
+            n = len(item[1].args)
+            term = item[1].head
+            if n:
+                for arg in results[-n:]:
+                    term = NamelessApplication(term, arg)
+                del results[-n:]
+            results.append(term)
+        else:
+            _, term, env, depth, expanded = item
+            if term.kind == 'index':
+                if term.index < depth:
+                    results.append(term)
+                else:
+                    stack.append((_VALUE, _lookup(env, term.index - depth)))
+            elif term.kind == 'free':
+                results.append(term)
+            elif term.kind == 'abstraction':
+                if expanded:
+                    results.append(NamelessAbstraction(results.pop(),
+                                                       term.hint))
+                else:
+                    stack.append((_TERM, term, env, depth, True))
+                    stack.append((_TERM, term.term, env, depth + 1, False))
+            elif expanded:
+                right = results.pop()
+                results.append(NamelessApplication(results.pop(), right))
+            else:
+                stack.append((_TERM, term, env, depth, True))
+                stack.append((_TERM, term.right, env, depth, False))
+                stack.append((_TERM, term.left, env, depth, False))
+    return results.pop()
+
+class KrivineMachine:
+    """Call-by-name evaluation to weak head normal form.
+
+    The state is a closure under evaluation and a stack of unevaluated
+    argument closures.
+
+    Attributes:
+        steps (int): The number of machine transitions taken.
+        beta_steps (int): How many of those were beta reductions.
+
+    """
+    def __init__(self, term):
+        self.closure = Closure(to_debruijn(term), None)
+        self.stack = []
+        self.steps = 0
+        self.beta_steps = 0
+
+    def run(self, max_steps=None):
+        """Runs the machine until it reaches a weak head normal form.
+
+        Returns:
+            (LambdaTerm) The weak head normal form.
+
+        Raises:
+            OutOfSteps if that takes more than ``max_steps`` transitions.
+
+        """
+        term, env, stack = self.closure.term, self.closure.env, self.stack
+        steps = self.steps
+        while True:
+            if max_steps is not None and steps >= max_steps:
+                self.closure, self.steps = Closure(term, env), steps
+                raise OutOfSteps(steps)
+            if term.kind == 'application':
+                stack.append(Closure(term.right, env))
+                term = term.left
+            elif term.kind == 'abstraction' and stack:
+                env = (stack.pop(), env)
+                term = term.term
+                self.beta_steps += 1
+            elif term.kind == 'index':
+                closure = _lookup(env, term.index)
+                term, env = closure.term, closure.env
+            else:
+                break
+            steps += 1
+        self.closure, self.steps = Closure(term, env), steps
+
+        if term.kind == 'free':
+            result = Neutral(term, tuple(reversed(stack)))
+        else:
+            result = self.closure
+        return from_debruijn(result.readback())
+
+class CEKMachine:
+    """Call-by-value evaluation to weak normal form.
+
+    The state is a control term, its environment and a continuation.
+    Environments map indices to values, which are closures of
+    abstractions or neutral terms.
+
+    Attributes:
+        steps (int): The number of machine transitions taken.
+        beta_steps (int): How many of those were beta reductions.
+
+    """
+    # continuation frames
+    ARG, FUN = 'arg', 'fun'
+
+    def __init__(self, term):
+        self.term = to_debruijn(term)
+        self.steps = 0
+        self.beta_steps = 0
+
+    def run(self, max_steps=None):
+        """Runs the machine until the term is a value.
+
+        Returns:
+            (LambdaTerm) The value, read back into a term.
+
+        Raises:
+            OutOfSteps if that takes more than ``max_steps`` transitions.
+
+        """
+        term, env, cont = self.term, None, None
+        value = None
+        steps = 0
+        while value is None or cont is not None:
+            if max_steps is not None and steps >= max_steps:
+                self.steps = steps
+                raise OutOfSteps(steps)
+            steps += 1
+            if value is None:
+                if term.kind == 'application':
+                    cont = (self.ARG, Closure(term.right, env), cont)
+                    term = term.left
+                elif term.kind == 'abstraction':
+                    value = Closure(term, env)
+                elif term.kind == 'index':
+                    value = _lookup(env, term.index)
+                else:
+                    value = Neutral(term)
+            else:
+                frame, other, cont = cont
+                if frame is self.ARG:
+                    cont = (self.FUN, value, cont)
+                    term, env, value = other.term, other.env, None
+                elif isinstance(other, Neutral):
+                    value = other.applied_to(value)
+                else:
+                    term, env = other.term.term, (value, other.env)
+                    value = None
+                    self.beta_steps += 1
+        self.steps = steps
+        return from_debruijn(value.readback())
+
+def whnf(term, machine=KrivineMachine, max_steps=None):
+    """Evaluates ``term`` to weak head normal form on an abstract machine."""
+    return machine(term).run(max_steps)
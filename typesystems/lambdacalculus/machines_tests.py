@@ -0,0 +1,79 @@
+import unittest
+from .lambdacalculus import *
+from .lambdacalculus_tests import S, K, ONE, TWO, THREE, ADD, church
+from .normalization import normalize
+from .normalization_tests import I, OMEGA
+from .debruijn import to_debruijn
+from .machines import *
+
+class MachineTestCase(unittest.TestCase):
+    machine = None
+
+    def assertAlphaEq(self, t0, t1):
+        self.assertEqual(to_debruijn(t0), to_debruijn(t1))
+
+    def testVariable(self):
+        self.assertEqual(whnf(Variable('x'), self.machine), Variable('x'))
+
+    def testAbstraction(self):
+        # weak head normal forms do not reduce under binders
+        term = Abstraction('w', Application(I, Variable('w')))
+        self.assertEqual(whnf(term, self.machine), term)
+
+    def testApplication(self):
+        self.assertAlphaEq(whnf(Application(S, K), self.machine),
+                           Application(S, K).reduce())
+        self.assertEqual(
+            whnf(Application(Application(K, Variable('v')), Variable('w')),
+                 self.machine),
+            Variable('v')
+        )
+
+    def testNeutral(self):
+        term = Application(Application(Variable('f'), Application(I, Variable('v'))),
+                           Variable('w'))
+        res = whnf(term, self.machine)
+        self.assertEqual(normalize(res), Application(Application(
+            Variable('f'), Variable('v')), Variable('w')))
+
+    def testChurchNumerals(self):
+        res = whnf(Application(Application(ADD, ONE), TWO), self.machine)
+        self.assertEqual(res.kind, 'abstraction')
+        self.assertAlphaEq(normalize(res), THREE)
+
+    def testStepCounters(self):
+        machine = self.machine(Application(Application(K, I), Variable('v')))
+        self.assertAlphaEq(machine.run(), I)
+        self.assertEqual(machine.beta_steps, 2)
+        self.assertGreater(machine.steps, machine.beta_steps)
+
+    def testOutOfSteps(self):
+        machine = self.machine(OMEGA)
+        self.assertRaises(OutOfSteps, lambda: machine.run(max_steps=100))
+        self.assertEqual(machine.steps, 100)
+
+    def testDeep(self):
+        # the argument is read back from its environment
+        term = Application(Abstraction('n', Application(
+            Application(Variable('n'), Variable('g')), Variable('v')
+        )), church(20000))
+        res = whnf(term, self.machine)
+        self.assertEqual(res.kind, 'application')
+        self.assertEqual(res.left, Variable('g'))
+
+class KrivineMachineTestCase(MachineTestCase):
+    machine = KrivineMachine
+
+    def testCallByName(self):
+        # the diverging argument is never evaluated
+        term = Application(Application(K, Variable('v')), OMEGA)
+        self.assertEqual(whnf(term, self.machine), Variable('v'))
+
+class CEKMachineTestCase(MachineTestCase):
+    machine = CEKMachine
+
+    def testCallByValue(self):
+        term = Application(Application(K, Variable('v')), OMEGA)
+        self.assertRaises(OutOfSteps, lambda: whnf(term, self.machine, 1000))
+
+del MachineTestCase
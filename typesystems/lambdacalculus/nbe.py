@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Normalization by evaluation.
+
+A term is evaluated into Python values: abstractions become Python
+callables, so beta reduction is just a function call, and free variables
+become neutral values that collect their arguments. Reading the value
+back, applying each function to a fresh neutral variable, yields the
+beta normal form.
+
+Arguments are evaluated lazily and at most once, so a term has a normal
+form here exactly when leftmost outermost reduction finds one.
+
+"""
+from .debruijn import (to_debruijn, from_debruijn, Index,
+                       NamelessAbstraction, NamelessApplication)
+
+class _Thunk:
+    """A suspended evaluation, forced at most once."""
+    def __init__(self, term, env):
+        self.term = term
+        self.env = env
+        self.value = None
+
+    def force(self):
+        if self.value is None:
+            self.value = _eval(self.term, self.env)
+            self.term = self.env = None
+        return self.value
+
+class _Function:
+    """The value of an abstraction."""
+    def __init__(self, body, env, hint):
+        self.body = body
+        self.env = env
+        self.hint = hint
+
+    def __call__(self, arg):
+        return _eval(self.body, (arg, self.env))
+
+class _Neutral:
+    """A variable applied to some (unevaluated) arguments.
+
+    The head is either a ``Free`` term or the de Bruijn level (counting
+    binders from the outside) of a variable introduced by readback.
+
+    """
+    def __init__(self, head, args=()):
+        self.head = head
+        self.args = args
+
+class _Evaluated(_Thunk):
+    def __init__(self, value):
+        self.value = value
+
+# frames on the stack of _eval: an argument waiting for the function
+# being evaluated, or a thunk waiting for its value
+_ARG, _UPDATE = 'arg', 'update'
+
+def _eval(term, env):
+    frames = []
+    while True:
+        if term.kind == 'application':
+            frames.append((_ARG, _Thunk(term.right, env)))
+            term = term.left
+            continue
+        elif term.kind == 'index':
+            for _ in range(term.index):
+                env = env[1]
+            thunk = env[0]
+            if thunk.value is None:
+                frames.append((_UPDATE, thunk))
+                term, env = thunk.term, thunk.env
+                continue
+            value = thunk.value
+        elif term.kind == 'free':
+            value = _Neutral(term)
+        else:
+            value = _Function(term.term, env, term.hint)
+        # hand the value to the frames waiting for it
+        while frames:
+            frame, thunk = frames.pop()
+            if frame is _UPDATE:
+                thunk.value = value
+                thunk.term = thunk.env = None
+            elif isinstance(value, _Function):
+                term, env = value.body, (thunk, value.env)
+                break
+            else:
+                value = _Neutral(value.head, value.args + (thunk,))
+        else:
+            return value
+
+# exit markers on the stack of _readback
+_ABSTRACTION, _APPLICATION = 'abstraction', 'application'
+
+def _readback(value, depth):
+    results = []
+    stack = [(value, depth)]
+    while stack:
+        item = stack.pop()
+        if item[0] is _ABSTRACTION:
+            results.append(NamelessAbstraction(results.pop(), item[1]))
+            continue
+        elif item[0] is _APPLICATION:
+            _, term, n = item
+            if n:
+                for arg in results[-n:]:
+                    term = NamelessApplication(term, arg)
+                del results[-n:]
+            results.append(term)
+            continue
+        value, depth = item
+        if isinstance(value, _Thunk):
+            value = value.force()
+        if isinstance(value, _Function):
+            var = _Evaluated(_Neutral(depth))
+            stack.append((_ABSTRACTION, value.hint))
+            stack.append((value(var), depth + 1))
+        else:
+            head = value.head
+            term = Index(depth - head - 1) if isinstance(head, int) else head
+            stack.append((_APPLICATION, term, len(value.args)))
+            stack.extend((arg, depth) for arg in reversed(value.args))
+    return results.pop()
+
+def normalize(term):
+    """Computes the beta normal form of a ``LambdaTerm``.
+
+    Diverges if the term has no normal form.
+
+    """
+    return from_debruijn(_readback(_eval(to_debruijn(term), None), 0))
@@ -0,0 +1,55 @@
+import unittest
+from .lambdacalculus import *
+from .lambdacalculus_tests import S, K, FALSE, ONE, TWO, THREE, ADD, church
+from .normalization import normalize as rewrite
+from .normalization_tests import I, OMEGA
+from .debruijn import to_debruijn
+from .nbe import normalize
+
+class NbETestCase(unittest.TestCase):
+    def assertSameNormalForm(self, term):
+        self.assertEqual(to_debruijn(normalize(term)),
+                         to_debruijn(rewrite(term)))
+
+    def testClosed(self):
+        self.assertTrue(normalize(Application(S, K)).alpha_eq(FALSE))
+        self.assertTrue(
+            normalize(Application(Application(ADD, ONE), TWO)).alpha_eq(THREE)
+        )
+        self.assertSameNormalForm(Application(Application(ADD, THREE), THREE))
+        # 2^3 and 3^2
+        self.assertSameNormalForm(Application(THREE, TWO))
+        self.assertSameNormalForm(Application(TWO, THREE))
+
+    def testOpen(self):
+        term = Application(Application(THREE, Variable('g')), Variable('v'))
+        self.assertEqual(normalize(term), rewrite(term))
+        self.assertSameNormalForm(Abstraction('w',
+            Application(Variable('w'), Application(I, Variable('v')))
+        ))
+
+    def testNormalForm(self):
+        self.assertEqual(normalize(S), S)
+        self.assertEqual(normalize(Variable('x')), Variable('x'))
+
+    def testLazy(self):
+        term = Application(Application(K, Variable('v')), OMEGA)
+        self.assertEqual(normalize(term), Variable('v'))
+
+    def testBackend(self):
+        term = Application(Application(ADD, TWO), THREE)
+        self.assertEqual(to_debruijn(rewrite(term, backend='nbe')),
+                         to_debruijn(rewrite(term)))
+        self.assertRaises(ValueError, lambda: rewrite(term, backend='x'))
+
+    def testDeep(self):
+        # evaluated without falling back to rewriting
+        depth = 5000
+        term = Application(Application(ADD, church(depth)), church(depth))
+        self.assertTrue(normalize(term).alpha_eq(church(2 * depth)))
+        # each argument is a thunk forced while forcing the one around it
+        term = Variable('y')
+        for i in range(3000):
+            x = 'x_{}'.format(i)
+            term = Application(Abstraction(x, Variable(x)), term)
+        self.assertEqual(normalize(term), Variable('y'))
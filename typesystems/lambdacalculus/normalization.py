@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""Normal order reduction with a zipper.
+
+``LambdaTerm.reduce`` starts from the root every time, so it has to find
+the next redex again (through ``is_redex``) after every step. A zipper
+keeps the focus on the position of the last redex instead: everything to
+the left of and above the focus is known to be in normal form, so the
+search for the next redex carries on from where the last one was, and a
+step only rebuilds the nodes it actually changes.
+
+"""
+from collections import deque, namedtuple
+import threading
+import time
+
+from .lambdacalculus import Abstraction, Application
+from .debruijn import alpha_key
+from .. import instrumentation
+from . import nbe, explicit
+
+LEFT, RIGHT, BODY = 'left', 'right', 'body'
+
+def _plug(tag, parent, focus):
+    """Rebuilds ``parent`` with ``focus`` in place of the child ``tag``."""
+    if tag is LEFT:
+        if parent.left is focus:
+            return parent
+        return Application(focus, parent.right)
+    elif tag is RIGHT:
+        if parent.right is focus:
+            return parent
+        return Application(parent.left, focus)
+    else:
+        if parent.term is focus:
+            return parent
+        return Abstraction(parent.binds, focus)
+
+class Zipper:
+    """A term with a focus, performing leftmost outermost beta reduction.
+
+    The redexes are contracted in exactly the order ``LambdaTerm.reduce``
+    would contract them.
+
+    Attributes:
+        focus (LambdaTerm): The subterm under focus.
+        path (List[Tuple[str, LambdaTerm]]): For each ancestor of the
+            focus, which child of it leads to the focus, and the ancestor
+            as it was when the focus moved below it.
+        steps (int): The number of beta steps performed so far.
+        size (int): The size of the whole term.
+
+    """
+    def __init__(self, term):
+        # the term may use names from other supplies; the binders renamed
+        # later all get new names from the current one
+        self._taken = (term.free_variables, term.bound_variables)
+        self.focus = term
+        self.path = []
+        self.steps = 0
+        self.size = term.size
+
+    @property
+    def term(self):
+        """The whole term, with the current focus plugged in."""
+        focus = self.focus
+        for tag, parent in reversed(self.path):
+            focus = _plug(tag, parent, focus)
+        return focus
+
+    def seek(self):
+        """Moves the focus to the next redex.
+
+        Returns:
+            (bool) ``False`` if there is no redex left, in which case the
+            focus is moved back to the root.
+
+        """
+        focus, path = self.focus, self.path
+        descending = True
+        while True:
+            if descending:
+                if focus.kind == 'application':
+                    if focus.left.kind == 'abstraction':
+                        self.focus = focus
+                        return True
+                    path.append((LEFT, focus))
+                    focus = focus.left
+                elif focus.kind == 'abstraction':
+                    path.append((BODY, focus))
+                    focus = focus.term
+                else:
+                    descending = False
+            elif not path:
+                self.focus = focus
+                return False
+            else:
+                tag, parent = path.pop()
+                focus = _plug(tag, parent, focus)
+                if tag is LEFT:
+                    path.append((RIGHT, focus))
+                    focus = focus.right
+                    descending = True
+
+    def contract(self):
+        """Contracts the redex under focus.
+
+        If the contractum is an abstraction in function position, the
+        focus moves up to the application, which is the next redex.
+
+        """
+        focus = self.focus.contract(self._taken)
+        self.steps += 1
+        self.size += focus.size - self.focus.size
+        path = self.path
+        if path and path[-1][0] is LEFT and focus.kind == 'abstraction':
+            tag, parent = path.pop()
+            focus = _plug(tag, parent, focus)
+        self.focus = focus
+
+    def step(self):
+        """Performs 1 step of beta reduction.
+
+        Returns:
+            (bool) ``False`` if the term was already in normal form.
+
+        """
+        if self.seek():
+            self.contract()
+            return True
+        else:
+            return False
+
+NORMAL, CYCLE = 'normal', 'cycle'
+FUEL, SIZE, DEADLINE, CANCELLED = 'fuel', 'size', 'deadline', 'cancelled'
+
+class ReductionSequence:
+    """The terms ``term`` reduces to, one beta step at a time.
+
+    Iterating yields each reduct lazily, in leftmost outermost order,
+    starting with the result of the first step. Iteration stops when a
+    normal form is reached or, if cycle detection is on, right after a
+    term alpha equivalent to one of the last ``window`` terms.
+
+    Only those terms are kept, so memory stays bounded however long the
+    sequence runs. Each is fingerprinted by its size (which the
+    ``Zipper`` tracks) and its free variables, and only terms with the
+    same fingerprint are compared in full, by their ``alpha_key``. Cycles
+    longer than ``window`` steps are not detected, nor are sequences that
+    never repeat a term, such as those of terms that grow forever.
+
+    Attributes:
+        steps (int): The number of steps taken so far.
+        outcome (Optional[str]): ``None`` while the sequence may go on,
+            then ``NORMAL`` or ``CYCLE``.
+        cycle (Optional[Tuple[int, int]]): If ``outcome`` is ``CYCLE``,
+            the step at which the repeated term first occured (``0`` for
+            ``term`` itself) and the length of the cycle.
+
+    """
+    def __init__(self, term, detect_cycles=True, window=64):
+        self._zipper = Zipper(term)
+        self.outcome = None
+        self.cycle = None
+        # [step, fingerprint, term, alpha_key or None until needed]
+        self._recent = deque(maxlen=window) if detect_cycles else None
+        self._remember(term)
+
+    @property
+    def steps(self):
+        return self._zipper.steps
+
+    def _remember(self, term):
+        """Checks ``term`` against the recent terms, then records it."""
+        if self._recent is None:
+            return
+        fingerprint = (self._zipper.size, term.free_variables)
+        key = None
+        for entry in self._recent:
+            if entry[1] != fingerprint:
+                continue
+            if key is None:
+                key = alpha_key(term)
+            if entry[3] is None:
+                entry[3] = alpha_key(entry[2])
+            if entry[3] == key:
+                self.outcome = CYCLE
+                self.cycle = (entry[0], self.steps - entry[0])
+                return
+        self._recent.append([self.steps, fingerprint, term, key])
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.outcome is not None:
+            raise StopIteration
+        if not self._zipper.step():
+            self.outcome = NORMAL
+            raise StopIteration
+        term = self._zipper.term
+        self._remember(term)
+        return term
+
+def reduction_sequence(term, detect_cycles=True, window=64):
+    """Lazily reduces ``term``, see ``ReductionSequence``."""
+    return ReductionSequence(term, detect_cycles, window)
+
+@instrumentation.timed('normalize')
+def normalize(term, max_steps=None, backend='rewrite'):
+    """Reduces ``term`` to normal form in leftmost outermost order.
+
+    Args:
+        term (LambdaTerm): The term to normalize.
+        max_steps (Optional[int]): Stop after this many steps, even if
+            the term is not yet in normal form.
+        backend (str): ``'rewrite'`` contracts one redex at a time with a
+            ``Zipper``. ``'nbe'`` uses normalization by evaluation, which
+            is much faster on terms with large normal forms; it falls
+            back to rewriting if ``max_steps`` is given or the term is too
+            deep for the interpreter's recursion limit. ``'explicit'``
+            delays substitutions (see ``explicit``) and falls back in the
+            same way.
+
+    """
+    if backend not in BACKENDS:
+        raise ValueError('unknown backend {!r}'.format(backend))
+    if backend != 'rewrite' and max_steps is None:
+        try:
+            return (nbe if backend == 'nbe' else explicit).normalize(term)
+        except RecursionError:
+            pass
+    zipper = Zipper(term)
+    while max_steps is None or zipper.steps < max_steps:
+        if not zipper.step():
+            break
+    return zipper.term
+
+BACKENDS = ('rewrite', 'nbe', 'explicit')
+
+class CancellationToken:
+    """A flag for stopping ``normalize_bounded`` from another thread."""
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+BoundedResult = namedtuple('BoundedResult', ['term', 'reason', 'steps'])
+
+def normalize_bounded(term, max_steps=None, max_size=None, timeout=None,
+                      deadline=None, token=None):
+    """Normalizes ``term`` like ``normalize``, within resource limits.
+
+    Every limit is checked before each step, and the size of the term is
+    tracked incrementally by the ``Zipper``, so the limits cost a few
+    comparisons per step.
+
+    Args:
+        term (LambdaTerm): The term to normalize.
+        max_steps (Optional[int]): The number of steps to take at most.
+        max_size (Optional[int]): The largest term ``size`` allowed. The
+            step that would exceed it is undone, so the result is never
+            bigger than this (unless ``term`` already is).
+        timeout (Optional[float]): Seconds to run for at most.
+        deadline (Optional[float]): A ``time.monotonic()`` value by which
+            to stop.
+        token (Optional[CancellationToken]): Stop once it is cancelled.
+
+    Returns:
+        (BoundedResult) The term reached, why reduction stopped (one of
+        ``NORMAL``, ``FUEL``, ``SIZE``, ``DEADLINE`` and ``CANCELLED``)
+        and the number of steps taken.
+
+    """
+    if timeout is not None:
+        end = time.monotonic() + timeout
+        deadline = end if deadline is None else min(deadline, end)
+    zipper = Zipper(term)
+    path = zipper.path
+    while True:
+        # a term in normal form is reported as such, whatever is left
+        if not zipper.seek():
+            reason = NORMAL
+        elif max_steps is not None and zipper.steps >= max_steps:
+            reason = FUEL
+        elif token is not None and token.cancelled:
+            reason = CANCELLED
+        elif deadline is not None and time.monotonic() >= deadline:
+            reason = DEADLINE
+        elif max_size is None:
+            zipper.contract()
+            continue
+        else:
+            redex, size, depth, top = (zipper.focus, zipper.size, len(path),
+                                       path[-1:])
+            zipper.contract()
+            if zipper.size <= max_size:
+                continue
+            # undo the step; contract moves the focus up at most once
+            if len(path) < depth:
+                path.extend(top)
+            zipper.focus, zipper.size = redex, size
+            zipper.steps -= 1
+            reason = SIZE
+        return BoundedResult(zipper.term, reason, zipper.steps)
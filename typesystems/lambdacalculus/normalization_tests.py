@@ -0,0 +1,210 @@
+import unittest
+from .lambdacalculus import *
+from .lambdacalculus_tests import S, K, FALSE, ONE, TWO, THREE, ADD
+from .normalization import *
+from .debruijn import to_debruijn
+
+I = Abstraction('i', Variable('i'))
+OMEGA = Application(
+    Abstraction('x', Application(Variable('x'), Variable('x'))),
+    Abstraction('y', Application(Variable('y'), Variable('y'))),
+)
+
+class ZipperTestCase(unittest.TestCase):
+    def assertAlphaEq(self, t0, t1):
+        # reduction can duplicate binders, which ``alpha_eq`` rejects
+        self.assertEqual(to_debruijn(t0), to_debruijn(t1))
+
+    def assertSameSteps(self, term):
+        zipper = Zipper(term)
+        while term.is_redex:
+            term = term.reduce()
+            self.assertTrue(zipper.step())
+            self.assertAlphaEq(zipper.term, term)
+        self.assertFalse(zipper.step())
+        self.assertAlphaEq(zipper.term, term)
+
+    def testSameSteps(self):
+        self.assertSameSteps(Application(S, K))
+        self.assertSameSteps(Application(Application(ADD, ONE), TWO))
+        self.assertSameSteps(Application(Application(ADD, TWO), THREE))
+        self.assertSameSteps(Abstraction('w',
+            Application(Variable('w'), Application(I, Variable('v')))
+        ))
+
+    def testContractumInFunctionPosition(self):
+        # (K I) w v reduces to I v before anything to the right
+        term = Application(
+            Application(Application(K, I), Variable('w')),
+            Application(I, Variable('v')),
+        )
+        self.assertSameSteps(term)
+
+    def testSharing(self):
+        term = Application(
+            Application(Variable('w'), Application(I, Variable('v'))),
+            THREE
+        )
+        res = normalize(term)
+        self.assertEqual(res, Application(
+            Application(Variable('w'), Variable('v')), THREE
+        ))
+        self.assertIs(res.left.left, term.left.left)
+        self.assertIs(res.right, THREE)
+
+class NormalizeTestCase(unittest.TestCase):
+    def testNormalize(self):
+        self.assertTrue(normalize(Application(S, K)).alpha_eq(FALSE))
+        self.assertTrue(
+            normalize(Application(Application(ADD, ONE), TWO)).alpha_eq(THREE)
+        )
+        self.assertIs(normalize(THREE), THREE)
+
+    def testMaxSteps(self):
+        term = Application(Application(ADD, ONE), TWO)
+        self.assertIs(normalize(term, max_steps=0), term)
+        self.assertEqual(to_debruijn(normalize(term, max_steps=1)),
+                         to_debruijn(term.reduce()))
+        self.assertEqual(to_debruijn(normalize(OMEGA, max_steps=10)),
+                         to_debruijn(OMEGA))
+
+class ReductionSequenceTestCase(unittest.TestCase):
+    def testNormalForm(self):
+        term = Application(Application(ADD, ONE), TWO)
+        sequence = reduction_sequence(term)
+        expected = []
+        while term.is_redex:
+            term = term.reduce()
+            expected.append(to_debruijn(term))
+        self.assertEqual([to_debruijn(t) for t in sequence], expected)
+        self.assertEqual(sequence.outcome, NORMAL)
+        self.assertEqual(sequence.steps, len(expected))
+        self.assertIsNone(sequence.cycle)
+        self.assertEqual(list(sequence), [])
+
+    def testAlreadyNormal(self):
+        sequence = reduction_sequence(THREE)
+        self.assertEqual(list(sequence), [])
+        self.assertEqual((sequence.outcome, sequence.steps), (NORMAL, 0))
+
+    def testOmega(self):
+        sequence = reduction_sequence(OMEGA)
+        terms = list(sequence)
+        self.assertEqual(len(terms), 1)
+        self.assertEqual(to_debruijn(terms[0]), to_debruijn(OMEGA))
+        self.assertEqual((sequence.outcome, sequence.cycle), (CYCLE, (0, 1)))
+
+    def testLongerCycle(self):
+        # (\x.xx) N, with N = \y.Iyy, goes to N N, then I N N, then N N
+        N = Abstraction('y', Application(
+            Application(I, Variable('y')), Variable('y')
+        ))
+        sequence = reduction_sequence(Application(
+            Abstraction('x', Application(Variable('x'), Variable('x'))), N
+        ))
+        self.assertEqual(len(list(sequence)), 3)
+        self.assertEqual((sequence.outcome, sequence.cycle), (CYCLE, (1, 2)))
+
+    def testLazy(self):
+        import itertools
+        grow = Abstraction('x', Application(
+            Application(Variable('x'), Variable('x')), Variable('x')
+        ))
+        sequence = reduction_sequence(Application(grow, grow))
+        terms = list(itertools.islice(sequence, 5))
+        self.assertEqual(len(terms), 5)
+        self.assertIsNone(sequence.outcome)
+        self.assertEqual(sequence.steps, 5)
+
+    def testWindow(self):
+        import itertools
+        N = Abstraction('y', Application(
+            Application(I, Variable('y')), Variable('y')
+        ))
+        term = Application(
+            Abstraction('x', Application(Variable('x'), Variable('x'))), N
+        )
+        # only the last term is remembered, the cycle has length 2
+        sequence = reduction_sequence(term, window=1)
+        self.assertEqual(len(list(itertools.islice(sequence, 10))), 10)
+        self.assertIsNone(sequence.outcome)
+        sequence = reduction_sequence(term, window=2)
+        self.assertEqual(len(list(sequence)), 3)
+        self.assertEqual(sequence.cycle, (1, 2))
+
+    def testBoundedMemory(self):
+        import itertools
+        grow = Abstraction('x', Application(
+            Application(Variable('x'), Variable('x')), Variable('x')
+        ))
+        sequence = reduction_sequence(Application(grow, grow), window=8)
+        for _ in itertools.islice(sequence, 100):
+            pass
+        self.assertEqual(len(sequence._recent), 8)
+
+    def testWithoutCycleDetection(self):
+        import itertools
+        sequence = reduction_sequence(OMEGA, detect_cycles=False)
+        self.assertEqual(len(list(itertools.islice(sequence, 10))), 10)
+        self.assertIsNone(sequence.outcome)
+
+class NormalizeBoundedTestCase(unittest.TestCase):
+    def testNormal(self):
+        term = Application(Application(ADD, ONE), TWO)
+        result = normalize_bounded(term, max_steps=100, max_size=100,
+                                   timeout=60, token=CancellationToken())
+        self.assertEqual(result.reason, NORMAL)
+        self.assertEqual(to_debruijn(result.term), to_debruijn(normalize(term)))
+        self.assertEqual(result.steps, len(list(reduction_sequence(term))))
+
+    def testFuel(self):
+        result = normalize_bounded(OMEGA, max_steps=10)
+        self.assertEqual((result.reason, result.steps), (FUEL, 10))
+        self.assertEqual(to_debruijn(result.term), to_debruijn(OMEGA))
+
+    def testNormalOnLastStep(self):
+        y = Variable('y')
+        self.assertEqual(normalize_bounded(Application(I, y), max_steps=1),
+                         (y, NORMAL, 1))
+        self.assertEqual(normalize_bounded(y, max_steps=0), (y, NORMAL, 0))
+        self.assertEqual(normalize_bounded(y, deadline=0), (y, NORMAL, 0))
+
+    def testSize(self):
+        grow = Abstraction('x', Application(
+            Application(Variable('x'), Variable('x')), Variable('x')
+        ))
+        term = Application(grow, grow)
+        result = normalize_bounded(term, max_size=50)
+        self.assertEqual(result.reason, SIZE)
+        self.assertLessEqual(result.term.size, 50)
+        self.assertEqual(to_debruijn(result.term),
+                         to_debruijn(normalize(term, result.steps)))
+        # the next step would have been too big
+        self.assertGreater(normalize(term, result.steps + 1).size, 50)
+        # the result can be normalized further from where it stopped
+        again = normalize_bounded(result.term, max_steps=3)
+        self.assertEqual(to_debruijn(again.term),
+                         to_debruijn(normalize(term, result.steps + 3)))
+
+    def testDeadline(self):
+        import time
+        result = normalize_bounded(OMEGA, timeout=0.05)
+        self.assertEqual(result.reason, DEADLINE)
+        self.assertGreater(result.steps, 0)
+        result = normalize_bounded(OMEGA, deadline=time.monotonic() - 1)
+        self.assertEqual((result.reason, result.steps), (DEADLINE, 0))
+
+    def testCancellation(self):
+        import threading
+        token = CancellationToken()
+        timer = threading.Timer(0.05, token.cancel)
+        timer.start()
+        result = normalize_bounded(OMEGA, token=token)
+        timer.join()
+        self.assertTrue(token.cancelled)
+        self.assertEqual(result.reason, CANCELLED)
+
+    def testZipperSize(self):
+        zipper = Zipper(Application(Application(ADD, ONE), TWO))
+        while zipper.step():
+            self.assertEqual(zipper.size, zipper.term.size)
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+from . import repl
+from .lambdacalculus import repl as lambda_repl
+
+class ReplTestCase(unittest.TestCase):
+    def run_repl(self, repl, lines):
+        out = io.StringIO()
+        inputs = mock.patch('builtins.input', side_effect=lines + [EOFError])
+        with inputs, contextlib.redirect_stdout(out):
+            self.assertRaises(EOFError, repl)
+        return out.getvalue()
+
+    def testRepl(self):
+        out = self.run_repl(repl, [r'\x.x', r'(\x.x)y', r'\x.xx'])
+        lines = out.splitlines()
+        self.assertEqual(lines[0], 'Type: φ₀₀ ⟶ φ₀₀')
+        self.assertIn('  y ↦ φ₀₁', lines)
+        self.assertIn('  ⟶ᵦ y', lines)
+        self.assertTrue(lines[-1].startswith('could not unify'))
+
+    def testLambdaRepl(self):
+        out = self.run_repl(lambda_repl, [r'(\x.xy)(\fx.fx)',
+                                          r'(\x.xx)(\x.xx)'])
+        lines = out.splitlines()
+        self.assertEqual(lines[:2], [r'(\fx.fx)y', r'\x.yx'])
+        self.assertEqual(lines[-1], '(loops back to step 0)')
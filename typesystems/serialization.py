@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""A compact binary format for lambda terms and Curry types.
+
+An encoded entry is a sequence of records, each starting with a tag
+byte, followed by the entry's roots. Numbers are unsigned LEB128
+varints. Every node record gets the next node id, and refers to its
+children by their (smaller) ids, so a subterm that occurs several times
+is written once and referred back to; names are likewise stored once in
+a per-entry name table::
+
+    NAME        length, utf-8 bytes
+    VARIABLE    name              ABSTRACTION  name, body
+    APPLICATION left, right       TYPEVARIABLE name
+    CONSTANT    name              ARROW        left, right
+    ROOTS       count, node...
+
+A corpus file is a header, the entries back to back, an offset table and
+a footer, so that it can be memory-mapped and its entries decoded
+individually and lazily, straight from the mapped pages. The offset
+table and the footer are little-endian 64-bit integers on every host.
+
+"""
+from array import array
+import mmap
+import struct
+import sys
+
+from .currytypes import ArrowType, ConstantType, TypeVariable
+from .lambdacalculus.lambdacalculus import (Variable, Abstraction, Application,
+                                           BarendregtViolation)
+
+NAME, VARIABLE, ABSTRACTION, APPLICATION = 0, 1, 2, 3
+TYPEVARIABLE, CONSTANT, ARROW, ROOTS = 4, 5, 6, 7
+
+_TAGS = {
+    'variable': VARIABLE,
+    'abstraction': ABSTRACTION,
+    'application': APPLICATION,
+    'typevariable': TYPEVARIABLE,
+    'constanttype': CONSTANT,
+    'arrowtype': ARROW,
+}
+
+class DecodeError(Exception):
+    pass
+
+def _write_varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def _read_varint(buf, pos):
+    n = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+class _Encoder:
+    def __init__(self):
+        self.out = bytearray()
+        self.names = {}
+        self.nodes = {}
+        self.seen = {}
+
+    def name(self, name):
+        if name not in self.names:
+            self.names[name] = len(self.names)
+            data = name.encode('utf-8')
+            self.out.append(NAME)
+            _write_varint(self.out, len(data))
+            self.out += data
+        return self.names[name]
+
+    def record(self, tag, *fields):
+        key = (tag,) + fields
+        if key not in self.nodes:
+            self.nodes[key] = len(self.nodes)
+            self.out.append(tag)
+            for field in fields:
+                _write_varint(self.out, field)
+        return self.nodes[key]
+
+    def encode(self, obj):
+        results = []
+        stack = [(obj, False)]
+        while stack:
+            obj, expanded = stack.pop()
+            if id(obj) in self.seen:
+                results.append(self.seen[id(obj)][0])
+                continue
+            kind = getattr(obj, 'kind', None)
+            if kind in ('variable', 'typevariable', 'constanttype'):
+                symbol = obj.symbol if kind == 'variable' else obj.name
+                node = self.record(_TAGS[kind], self.name(symbol))
+            elif not expanded:
+                stack.append((obj, True))
+                if kind == 'abstraction':
+                    stack.append((obj.term, False))
+                elif kind in ('application', 'arrowtype'):
+                    stack.append((obj.right, False))
+                    stack.append((obj.left, False))
+                else:
+                    raise TypeError('cannot encode {!r}'.format(obj))
+                continue
+            elif kind == 'abstraction':
+                node = self.record(ABSTRACTION, self.name(obj.binds.symbol),
+                                   results.pop())
+            else:
+                right = results.pop()
+                node = self.record(_TAGS[kind], results.pop(), right)
+            # keep obj alive so that its id is not reused
+            self.seen[id(obj)] = (node, obj)
+            results.append(node)
+        return results.pop()
+
+def encode_many(objs):
+    """Encodes lambda terms and Curry types into one entry.
+
+    Subterms shared between the objects are stored once.
+
+    """
+    encoder = _Encoder()
+    roots = [encoder.encode(obj) for obj in objs]
+    encoder.out.append(ROOTS)
+    _write_varint(encoder.out, len(roots))
+    for root in roots:
+        _write_varint(encoder.out, root)
+    return bytes(encoder.out)
+
+def encode(obj):
+    """Encodes a lambda term or Curry type."""
+    return encode_many([obj])
+
+_TERMS = ('variable', 'abstraction', 'application')
+_TYPES = ('typevariable', 'constanttype', 'arrowtype')
+
+def _child(nodes, i, kinds):
+    """Node ``i``, checked to be a term or type as ``kinds`` requires."""
+    if i >= len(nodes) or nodes[i].kind not in kinds:
+        raise DecodeError('node {} is not a {}'.format(
+            i, 'term' if kinds is _TERMS else 'type'))
+    return nodes[i]
+
+def decode_many(buf):
+    """Decodes an entry from a bytes-like object without copying it.
+
+    Returns:
+        (list) The objects passed to ``encode_many``, with subterms that
+        were stored once shared between their occurences.
+
+    Raises:
+        DecodeError if ``buf`` is not an entry written by
+        ``encode_many``, whatever is wrong with it.
+
+    """
+    buf = memoryview(buf)
+    names, nodes = [], []
+    pos = 0
+    try:
+        while True:
+            tag = buf[pos]
+            pos += 1
+            if tag == NAME:
+                n, pos = _read_varint(buf, pos)
+                if pos + n > len(buf):
+                    raise DecodeError('truncated name')
+                names.append(str(buf[pos:pos + n], 'utf-8'))
+                pos += n
+            elif tag == ROOTS:
+                count, pos = _read_varint(buf, pos)
+                roots = []
+                for _ in range(count):
+                    root, pos = _read_varint(buf, pos)
+                    if root >= len(nodes):
+                        raise DecodeError('no node {}'.format(root))
+                    roots.append(nodes[root])
+                if pos != len(buf):
+                    raise DecodeError('trailing bytes after the roots')
+                return roots
+            elif tag in (VARIABLE, TYPEVARIABLE, CONSTANT):
+                a, pos = _read_varint(buf, pos)
+                if a >= len(names):
+                    raise DecodeError('no name {}'.format(a))
+                if tag == VARIABLE:
+                    nodes.append(Variable(names[a]))
+                elif tag == TYPEVARIABLE:
+                    nodes.append(TypeVariable(names[a]))
+                else:
+                    nodes.append(ConstantType(names[a]))
+            elif tag in (ABSTRACTION, APPLICATION, ARROW):
+                a, pos = _read_varint(buf, pos)
+                b, pos = _read_varint(buf, pos)
+                if tag == ABSTRACTION:
+                    if a >= len(names):
+                        raise DecodeError('no name {}'.format(a))
+                    nodes.append(Abstraction(names[a],
+                                             _child(nodes, b, _TERMS)))
+                elif tag == APPLICATION:
+                    nodes.append(Application(_child(nodes, a, _TERMS),
+                                             _child(nodes, b, _TERMS)))
+                else:
+                    nodes.append(ArrowType(_child(nodes, a, _TYPES),
+                                           _child(nodes, b, _TYPES)))
+            else:
+                raise DecodeError('unknown tag {}'.format(tag))
+    except IndexError:
+        raise DecodeError('truncated or corrupt entry')
+    except UnicodeDecodeError:
+        raise DecodeError('corrupt name')
+    except type(BarendregtViolation):
+        # e.g. a child of an abstraction with the wrong binder name
+        raise DecodeError("entry violates Barendregt's convention")
+
+def decode(buf):
+    """Decodes an entry holding a single term or type."""
+    objs = decode_many(buf)
+    if len(objs) != 1:
+        raise DecodeError('expected 1 object, found {}'.format(len(objs)))
+    return objs[0]
+
+# ============================ CORPUS FILES ============================
+
+MAGIC = b'TSYSCRP1'
+_FOOTER = struct.Struct('<QQ8s')  # entry count, index offset, magic
+
+class CorpusWriter:
+    """Writes encoded entries to a corpus file.
+
+    Use as a context manager, or call ``close`` to write the index.
+
+    """
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.offsets = array('Q', [len(MAGIC)])
+
+    def append(self, obj):
+        self.append_encoded(encode(obj))
+
+    def append_many(self, objs):
+        self.append_encoded(encode_many(objs))
+
+    def append_encoded(self, data):
+        self.file.write(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+
+    def close(self):
+        if self.file.closed:
+            return
+        index_offset = self.offsets[-1]
+        offsets = self.offsets
+        if sys.byteorder != 'little':
+            offsets = array('Q', offsets)
+            offsets.byteswap()
+        self.file.write(offsets.tobytes())
+        self.file.write(_FOOTER.pack(len(self.offsets) - 1, index_offset,
+                                     MAGIC))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class Corpus:
+    """A read-only, memory-mapped corpus file.
+
+    Opening a corpus only maps the file and reads its footer; entries are
+    decoded when they are accessed, directly from the mapped memory.
+
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buf = memoryview(self._mmap)
+        if (len(self._buf) < len(MAGIC) + _FOOTER.size or
+                self._buf[:len(MAGIC)] != MAGIC):
+            self.close()
+            raise DecodeError('{} is not a corpus file'.format(path))
+        count, index_offset, magic = _FOOTER.unpack_from(
+            self._buf, len(self._buf) - _FOOTER.size
+        )
+        if magic != MAGIC:
+            self.close()
+            raise DecodeError('{} is not a corpus file'.format(path))
+        table = self._buf[index_offset:index_offset + 8 * (count + 1)]
+        if sys.byteorder == 'little':
+            self._offsets = table.cast('Q')
+        else:
+            # the table cannot be used in place, swap a copy
+            self._offsets = array('Q', table.tobytes())
+            self._offsets.byteswap()
+            table.release()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def raw(self, index):
+        """The encoded bytes of an entry, as a view into the file."""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('corpus index out of range')
+        return self._buf[self._offsets[index]:self._offsets[index + 1]]
+
+    def __getitem__(self, index):
+        return decode(self.raw(index))
+
+    def get_many(self, index):
+        return decode_many(self.raw(index))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def close(self):
+        if isinstance(getattr(self, '_offsets', None), memoryview):
+            self._offsets.release()
+        self._buf.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,133 @@
+import os
+import tempfile
+import unittest
+from .lambdacalculus.lambdacalculus import *
+from .lambdacalculus.lambdacalculus_tests import S, K, TWO, THREE, church
+from .currytypes import *
+from .currytypes_tests import arrows
+from .serialization import *
+
+a, b = TypeVariable('a'), TypeVariable('b')
+INT = ConstantType('int')
+
+class EncodingTestCase(unittest.TestCase):
+    objs = [S, K, TWO, Variable('y'), Application(Variable('w'), K),
+            Abstraction('λ', Variable('λ')), a, INT,
+            ArrowType(ArrowType(a, INT), ArrowType(b, a))]
+
+    def testRoundTrip(self):
+        for obj in self.objs:
+            with self.subTest(obj=obj):
+                decoded = decode(encode(obj))
+                self.assertEqual(decoded.kind, obj.kind)
+                self.assertEqual(repr(decoded), repr(obj))
+
+    def testMany(self):
+        self.assertEqual(repr(decode_many(encode_many(self.objs))),
+                         repr(self.objs))
+        self.assertEqual(decode_many(encode_many([])), [])
+
+    def testSharing(self):
+        ff = Application(Variable('f'), Variable('f'))
+        term = Application(ff, ff)
+        decoded = decode(encode(term))
+        self.assertIs(decoded.left, decoded.right)
+        # name, variable, application, application, roots
+        self.assertEqual(len(encode(term)), 3 + 2 + 3 + 3 + 3)
+        shared, unshared = encode_many([THREE, THREE]), encode(THREE)
+        self.assertEqual(len(shared), len(unshared) + 1)
+        first, second = decode_many(shared)
+        self.assertIs(first, second)
+
+    def testCompact(self):
+        self.assertLess(len(encode(church(100))), 4 * 100 + 20)
+        self.assertLess(len(encode(arrows(100, lambda i: a))), 4 * 100 + 20)
+
+    def testDeep(self):
+        term = church(5000)
+        self.assertEqual(decode(encode(term)), term)
+        type_ = arrows(5000)
+        self.assertEqual(decode(encode(type_)), type_)
+
+    def testErrors(self):
+        with self.assertRaises(TypeError):
+            encode(3)
+        with self.assertRaises(DecodeError):
+            decode(encode(S)[:-3])
+        with self.assertRaises(DecodeError):
+            decode(encode_many([S, K]))
+        with self.assertRaises(DecodeError):
+            decode(b'\xff')
+
+    def testCorrupt(self):
+        x = ord('x')
+        corrupt = [
+            # a name that is not utf-8
+            bytes([NAME, 1, 0xff, ROOTS, 0]),
+            # a type as the body of an abstraction
+            bytes([NAME, 1, x, TYPEVARIABLE, 0, ABSTRACTION, 0, 0,
+                   ROOTS, 1, 1]),
+            # terms as the sides of an arrow
+            bytes([NAME, 1, x, VARIABLE, 0, ARROW, 0, 0, ROOTS, 1, 1]),
+            # (\x.x)x
+            bytes([NAME, 1, x, VARIABLE, 0, ABSTRACTION, 0, 0,
+                   APPLICATION, 1, 0, ROOTS, 1, 2]),
+            # names and nodes that have not been defined (yet)
+            bytes([VARIABLE, 0, ROOTS, 1, 0]),
+            bytes([NAME, 1, x, VARIABLE, 0, APPLICATION, 0, 1, ROOTS, 1, 1]),
+            bytes([NAME, 5, x]),
+            encode(S) + b'\x00',
+        ]
+        for data in corrupt:
+            with self.subTest(data=data):
+                self.assertRaises(DecodeError, decode_many, data)
+
+class CorpusTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def testRoundTrip(self):
+        objs = EncodingTestCase.objs
+        with CorpusWriter(self.path) as writer:
+            for obj in objs:
+                writer.append(obj)
+            writer.append_many([S, a])
+        with Corpus(self.path) as corpus:
+            self.assertEqual(len(corpus), len(objs) + 1)
+            self.assertEqual(repr(corpus[2]), repr(TWO))
+            self.assertEqual(repr(corpus[-2]), repr(objs[-1]))
+            self.assertEqual(repr([corpus[i] for i in range(len(objs))]), repr(objs))
+            self.assertEqual(repr(corpus.get_many(len(objs))), repr([S, a]))
+            self.assertEqual(bytes(corpus.raw(0)), encode(S))
+            with self.assertRaises(IndexError):
+                corpus[len(objs) + 1]
+
+    def testLittleEndian(self):
+        # the file format does not depend on the host's byte order
+        import struct
+        with CorpusWriter(self.path) as writer:
+            writer.append(S)
+            writer.append(TWO)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        count, index_offset, magic = struct.unpack('<QQ8s', data[-24:])
+        self.assertEqual((count, magic), (2, MAGIC))
+        offsets = struct.unpack_from('<3Q', data, index_offset)
+        self.assertEqual(offsets, (len(MAGIC), len(MAGIC) + len(encode(S)),
+                                   index_offset))
+
+    def testEmpty(self):
+        CorpusWriter(self.path).close()
+        with Corpus(self.path) as corpus:
+            self.assertEqual(len(corpus), 0)
+            self.assertEqual(list(corpus), [])
+
+    def testNotACorpus(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'\\x.x' * 20)
+        with self.assertRaises(DecodeError):
+            Corpus(self.path)
@@ -1,4 +1,12 @@
+from collections import deque
 from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+import itertools
+import os
+
+from . import instrumentation
 
 class Finalisable:
     def finalise(self):
@@ -10,12 +18,41 @@ class Finalisable:
         else:
             raise AttributeError("LambdaTerms are immutable once instantiated.")
 
+class Immutable:
+    """A base for slotted classes whose instances never change.
+
+    Subclasses list their fields in ``__slots__`` and set them in
+    ``__init__`` with ``object.__setattr__``; assigning to or deleting an
+    attribute afterwards raises ``AttributeError``. Unlike
+    ``Finalisable``, this costs nothing while the instance is built, and
+    instances have no ``__dict__``.
+
+    Subclasses pickle by calling their constructor again (see
+    ``__reduce__``), so that cached fields such as hashes of strings,
+    which differ between processes, are computed afresh.
+
+    """
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError('{} objects are immutable'
+                             .format(self.__class__.__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError('{} objects are immutable'
+                             .format(self.__class__.__name__))
+
 class Substitution(MutableMapping):
+    __slots__ = ('dict',)
+
     def __init__(self, *args, **kwargs):
         self.dict = dict(*args, **kwargs)
 
     # --------------------- all of this is boring ---------------------
     def __getattr__(self, name):
+        if name == 'dict':
+            # not set yet, e.g. while unpickling
+            raise AttributeError(name)
         return getattr(self.dict, name)
 
     def __contains__(self, item):
@@ -52,6 +89,8 @@ class Substitution(MutableMapping):
 
     def __rshift__(self, other):
         """Use the >> operator to chain together substitutions."""
+        if instrumentation.recorder is not None:
+            instrumentation.recorder.count('compositions')
         res = {k: self(v) for k, v in other.items()}
         for k, v in self.items():
             if k not in other:
@@ -60,3 +99,97 @@ class Substitution(MutableMapping):
 
     def __repr__(self):
         return '{}({!r})'.format(self.__class__.__name__, self.dict)
+
+class NameSupply:
+    """A source of fresh names, numbered by a counter.
+
+    Names are ``template.format(n)`` for ``n`` counting up from
+    ``start``, skipping any that have been reserved.
+
+    """
+    def __init__(self, template, start=0):
+        self.template = template
+        self.counter = start
+        self.reserved = set()
+
+    def reserve(self, names):
+        """Makes sure none of ``names`` is handed out later."""
+        self.reserved.update(names)
+
+    def fresh(self):
+        while True:
+            name = self.template.format(self.counter)
+            self.counter += 1
+            if name not in self.reserved:
+                return name
+
+# the supplies used by ``Variable.fresh`` and ``TypeVariable.fresh``
+variable_names = ContextVar('variable_names', default=None)
+type_variable_names = ContextVar('type_variable_names', default=None)
+
+def current_supply(names, template):
+    """The supply in the ``ContextVar`` ``names``, made if there is none.
+
+    A supply made here lasts as long as the current context, so outside
+    of ``fresh_names`` every name a thread gets is new.
+
+    """
+    supply = names.get()
+    if supply is None:
+        supply = NameSupply(template)
+        names.set(supply)
+    return supply
+
+@contextmanager
+def fresh_names(variables=None, type_variables=None):
+    """Gives the code in a ``with`` block its own fresh names.
+
+    Names are numbered from scratch, so the block produces the same
+    names however often it runs, and it does not interfere with other
+    threads or asyncio tasks, which have their own context.
+
+    Args:
+        variables (Optional[NameSupply]): The supply for ``Variable.fresh``,
+            by default a new one.
+        type_variables (Optional[NameSupply]): The supply for
+            ``TypeVariable.fresh``, by default a new one.
+
+    """
+    tokens = (variable_names.set(variables),
+              type_variable_names.set(type_variables))
+    try:
+        yield
+    finally:
+        variable_names.reset(tokens[0])
+        type_variable_names.reset(tokens[1])
+
+def ordered_map(function, args, workers=None):
+    """Maps a function over arguments in worker processes, in order.
+
+    Arguments are read lazily and only a couple per worker are in flight
+    at a time, so ``args`` may be a long stream.
+
+    Args:
+        function: A picklable function of one argument.
+        args (Iterable): The arguments; they have to be picklable too.
+        workers (Optional[int]): The number of worker processes, by
+            default one per CPU. With ``0`` the function is called in this
+            process instead.
+
+    Yields:
+        ``function(arg)`` for each argument, in order.
+
+    """
+    args = iter(args)
+    if workers == 0:
+        yield from map(function, args)
+        return
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque(pool.submit(function, arg)
+                        for arg in itertools.islice(args, 2 * workers))
+        while pending:
+            result = pending.popleft().result()
+            for arg in itertools.islice(args, 1):
+                pending.append(pool.submit(function, arg))
+            yield result